@@ -0,0 +1,253 @@
+"""
+Benchmarks for the hot paths of viiva.
+
+    python benchmarks/bench.py                       # run everything, print a table
+    python benchmarks/bench.py --quick -k parse      # smaller corpora, only matching cases
+    python benchmarks/bench.py --save baseline.json  # store the results
+    python benchmarks/bench.py --compare baseline.json --threshold 1.25
+
+Each case is timed a few times on a seeded synthetic corpus (see corpus.py)
+and the best time is kept; peak memory is measured with tracemalloc in a
+separate run. With --compare the run fails (exit status 1) when a case is
+slower, or allocates more at peak, than the baseline times the threshold.
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import svgpathtools
+
+from viiva import Path, iter_paths, to_shapely_array, write_d
+from viiva.paths import boolean, transform
+
+import corpus
+
+
+def _parsed(ds):
+    return [Path.parse_d(d) for d in ds]
+
+
+def _segments(paths):
+    return sum(len(path) for path in paths)
+
+
+def _cases():
+    """
+    Yield (name, corpus, prepare, run) tuples. `prepare` turns the corpus into
+    the input of `run` and the number of items it processes, untimed.
+    """
+    for name in ("short", "giant", "arcs", "quadratics"):
+        yield ("parse_d/" + name, name,
+               lambda ds: (ds, _segments(_parsed(ds))),
+               lambda ds: [Path.parse_d(d) for d in ds])
+
+    yield ("parse_element/elements", "elements",
+           lambda shapes: (shapes, len(shapes)),
+           lambda shapes: [Path.parse_element(shape) for shape in shapes])
+    yield ("iter_paths/document", "document",
+           lambda doc: (doc.encode(), doc.count("/>")),
+           lambda doc: list(iter_paths(io.BytesIO(doc))))
+
+    def by_segments(ds):
+        paths = _parsed(ds)
+        return paths, _segments(paths)
+
+    for name in ("short", "giant", "arcs", "quadratics"):
+        yield ("to_cubics/" + name, name, by_segments,
+               lambda paths: [path.to_cubics() for path in paths])
+        yield ("to_polyline/" + name, name, by_segments,
+               lambda paths: [path.to_polyline() for path in paths])
+        yield ("to_shapely/" + name, name, by_segments,
+               lambda paths: [path.to_shapely() for path in paths])
+        yield ("offset/" + name, name, by_segments,
+               lambda paths: [path.offset(1.0, tolerance=0.1, as_coords=True) for path in paths])
+        yield ("d/" + name, name, by_segments,
+               lambda paths: [path.d() for path in paths])
+        yield ("write_d/" + name, name, by_segments,
+               lambda paths: write_d(paths, precision=3, shorthand=True, minify=True))
+
+    yield ("point_at_length/giant", "giant", by_segments,
+           lambda paths: [path.point_at_length(np.linspace(0, 1000, 10000)) for path in paths])
+
+    yield ("to_shapely_array/short", "short", by_segments,
+           lambda paths: to_shapely_array(paths))
+
+    def polylines(ds):
+        paths = [path.to_polyline(0.01) for path in _parsed(ds)]
+        return paths, _segments(paths)
+    yield ("simplify/short", "short", polylines,
+           lambda paths: [path.simplify(0.1) for path in paths])
+    yield ("refit/short", "short", polylines,
+           lambda paths: [path.refit(0.1) for path in paths])
+
+    for mode in ("flat", "exact"):
+        yield ("union/%s/short" % mode, "short", lambda ds: by_segments(ds[:500]),
+               lambda paths, mode=mode: boolean.union(paths, mode=mode))
+
+    def samples(ds):
+        rng = np.random.default_rng(0)
+        paths = _parsed(ds[:50])
+        pairs = []
+        for path in paths:
+            xmin, xmax, ymin, ymax = path.bbox()
+            pairs.append((path, rng.uniform((xmin, ymin), (xmax, ymax), (20000, 2))))
+        return pairs, 20000 * len(pairs)
+    for name in ("short", "arcs"):
+        yield ("contains/" + name, name, samples,
+               lambda pairs: [path.contains(points) for path, points in pairs])
+
+    for name in ("short", "arcs"):
+        yield ("transform/" + name, name, by_segments,
+               lambda paths: transform.transform_paths(paths, "rotate(30) scale(2, 0.5) skewX(10)"))
+
+    for name in ("short", "arcs"):
+        yield ("to_beziers/" + name, name, by_segments,
+               lambda paths: [path.to_beziers() for path in paths])
+
+        def beziers(ds):
+            paths = _parsed(ds)
+            return [path.to_beziers() for path in paths], _segments(paths)
+        yield ("BezierPath.to_path/" + name, name, beziers,
+               lambda bps: [bp.to_path() for bp in bps])
+
+
+# cold imports, each timed in a fresh interpreter
+IMPORTS = {
+    "import/viiva": "import viiva",
+    "import/viiva+parse_d": "import viiva; viiva.Path.parse_d('M 0,0 L 1,1').d()",
+    "import/viiva.BezierPath": "from viiva import BezierPath",
+}
+
+_IMPORT_PROBE = """
+import time, tracemalloc, json
+if %(traced)s:
+    tracemalloc.start()
+start = time.perf_counter()
+%(statement)s
+seconds = time.perf_counter() - start
+print(json.dumps([seconds, tracemalloc.get_traced_memory()[1]]))
+"""
+
+
+def _probe(statement, traced):
+    output = subprocess.run([sys.executable, "-c", _IMPORT_PROBE % {"statement": statement, "traced": traced}],
+                            cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def measure_import(statement, repeat):
+    best = min(_probe(statement, False)[0] for _ in range(repeat))
+    return best, _probe(statement, True)[1]
+
+
+def measure(run, data, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run(data)
+        best = min(best, time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    run(data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def environment(args):
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "svgpathtools": getattr(svgpathtools, "__version__", "unknown"),
+        "scale": args.scale,
+        "seed": args.seed,
+    }
+
+
+def compare(results, baseline, threshold, memory_threshold):
+    """
+    Print the ratios to the baseline and return the names of the regressed cases.
+    """
+    regressed = []
+    print("\n%-34s %10s %10s" % ("vs baseline", "time", "memory"))
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            print("%-34s %10s %10s" % (name, "new", "new"))
+            continue
+        time_ratio = result["seconds"] / old["seconds"] if old["seconds"] else 1.0
+        memory_ratio = result["peak_bytes"] / old["peak_bytes"] if old["peak_bytes"] else 1.0
+        flag = ""
+        if time_ratio > threshold or memory_ratio > memory_threshold:
+            regressed.append(name)
+            flag = "  REGRESSION"
+        print("%-34s %9.2fx %9.2fx%s" % (name, time_ratio, memory_ratio, flag))
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", "--filter", default="", help="run only cases whose name contains this")
+    parser.add_argument("--quick", action="store_true", help="shortcut for --scale 0.1 --repeat 1")
+    parser.add_argument("--scale", type=float, default=1.0, help="corpus size factor (default 1)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case (default 3)")
+    parser.add_argument("--seed", type=int, default=0, help="corpus seed (default 0)")
+    parser.add_argument("--save", metavar="FILE", help="write the results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="compare with results saved by --save")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown ratio that counts as a regression (default 1.25)")
+    parser.add_argument("--memory-threshold", type=float, default=1.25,
+                        help="peak memory ratio that counts as a regression (default 1.25)")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.scale, args.repeat = 0.1, 1
+
+    corpora = {}
+    results = {}
+    print("%-34s %10s %14s %12s" % ("case", "seconds", "items/s", "peak KiB"))
+    for name, statement in IMPORTS.items():
+        if args.filter not in name:
+            continue
+        # the interpreter start is not included
+        seconds, peak = measure_import(statement, max(args.repeat, 3))
+        results[name] = {"seconds": seconds, "items": 1, "peak_bytes": peak}
+        print("%-34s %10.4f %14s %12.0f" % (name, seconds, "-", peak / 1024))
+    for name, corpus_name, prepare, run in _cases():
+        if args.filter not in name:
+            continue
+        if corpus_name not in corpora:
+            corpora[corpus_name] = corpus.build(corpus_name, args.seed, args.scale)
+        data, items = prepare(corpora[corpus_name])
+        seconds, peak = measure(run, data, args.repeat)
+        results[name] = {"seconds": seconds, "items": items, "peak_bytes": peak}
+        print("%-34s %10.4f %14.0f %12.0f" % (name, seconds, items / seconds if seconds else 0, peak / 1024))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"environment": environment(args), "results": results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            saved = json.load(f)
+        if saved["environment"].get("scale") != args.scale:
+            print("warning: the baseline was run at scale %s" % saved["environment"].get("scale"))
+        if compare(results, saved["results"], args.threshold, args.memory_threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Synthetic, seeded corpora for the benchmarks.
+
+Every generator takes a random.Random and a scale factor and returns path
+data strings, or a whole SVG document, so that runs are reproducible
+offline and comparable between machines running the same scale.
+"""
+import random
+
+
+def _pt(rng, x, y, spread=10.0):
+    return "%.3f,%.3f" % (x + rng.uniform(-spread, spread), y + rng.uniform(-spread, spread))
+
+
+def _mixed(rng, segments, x=0.0, y=0.0, weights=(4, 1, 4, 1)):
+    """
+    Path data of `segments` segments drawn with L, Q, C and A commands.
+    """
+    d = ["M " + _pt(rng, x, y)]
+    for i in range(segments):
+        x += rng.uniform(-3, 8)
+        y += rng.uniform(-5, 5)
+        kind = rng.choices("LQCA", weights)[0]
+        if kind == "L":
+            d.append("L " + _pt(rng, x, y, 0))
+        elif kind == "Q":
+            d.append("Q %s %s" % (_pt(rng, x - 2, y), _pt(rng, x, y, 0)))
+        elif kind == "C":
+            d.append("C %s %s %s" % (_pt(rng, x - 4, y, 4), _pt(rng, x - 2, y, 4), _pt(rng, x, y, 0)))
+        else:
+            d.append("A %.3f %.3f %.1f %d %d %s" % (rng.uniform(3, 9), rng.uniform(3, 9), rng.uniform(0, 90),
+                                                     rng.random() < 0.5, rng.random() < 0.5, _pt(rng, x, y, 0)))
+    if rng.random() < 0.5:
+        d.append("Z")
+    return " ".join(d)
+
+
+def short_paths(rng, scale=1.0):
+    """Many paths of a handful of mixed segments."""
+    return [_mixed(rng, rng.randint(3, 8), rng.uniform(0, 1000), rng.uniform(0, 1000))
+            for _ in range(int(5000 * scale))]
+
+
+def giant_paths(rng, scale=1.0):
+    """A few paths of tens of thousands of segments."""
+    return [_mixed(rng, int(20000 * scale)) for _ in range(3)]
+
+
+def arc_paths(rng, scale=1.0):
+    """Paths made mostly of elliptical arcs."""
+    return [_mixed(rng, rng.randint(4, 12), weights=(1, 0, 1, 8)) for _ in range(int(2000 * scale))]
+
+
+def quadratic_paths(rng, scale=1.0):
+    """Paths made mostly of quadratic Beziers."""
+    return [_mixed(rng, rng.randint(4, 12), weights=(1, 8, 1, 0)) for _ in range(int(2000 * scale))]
+
+
+def elements(rng, scale=1.0):
+    """SVG shape elements as markup, one string each."""
+    shapes = []
+    for i in range(int(3000 * scale)):
+        x, y = rng.uniform(0, 1000), rng.uniform(0, 1000)
+        kind = i % 5
+        if kind == 0:
+            shapes.append('<rect x="%.2f" y="%.2f" width="%.2f" height="%.2f"/>' % (x, y, rng.uniform(1, 50), rng.uniform(1, 50)))
+        elif kind == 1:
+            shapes.append('<circle cx="%.2f" cy="%.2f" r="%.2f"/>' % (x, y, rng.uniform(1, 30)))
+        elif kind == 2:
+            shapes.append('<ellipse cx="%.2f" cy="%.2f" rx="%.2f" ry="%.2f"/>' % (x, y, rng.uniform(1, 30), rng.uniform(1, 30)))
+        elif kind == 3:
+            points = " ".join(_pt(rng, x, y, 20) for _ in range(rng.randint(3, 10)))
+            shapes.append('<polygon points="%s"/>' % points)
+        else:
+            shapes.append('<path d="%s"/>' % _mixed(rng, rng.randint(3, 8), x, y))
+    return shapes
+
+
+def document(rng, scale=1.0):
+    """A large SVG document with nested, transformed groups of shapes."""
+    parts = ['<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 1000 1000">']
+    shapes = elements(rng, 4 * scale)
+    for i in range(0, len(shapes), 50):
+        parts.append('<g transform="translate(%.1f,%.1f) rotate(%.1f)">' % (rng.uniform(-5, 5), rng.uniform(-5, 5), rng.uniform(0, 30)))
+        parts.extend(shapes[i:i + 50])
+        parts.append('</g>')
+    parts.append('</svg>')
+    return "\n".join(parts)
+
+
+CORPORA = {
+    "short": short_paths,
+    "giant": giant_paths,
+    "arcs": arc_paths,
+    "quadratics": quadratic_paths,
+    "elements": elements,
+    "document": document,
+}
+
+
+def build(name, seed=0, scale=1.0):
+    return CORPORA[name](random.Random(seed), scale)
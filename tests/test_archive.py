@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from viiva.paths import archive
+from viiva.paths.archive import PathFile, write_paths
+from viiva.paths.packed import PackedPath
+from viiva.paths.path import Path
+
+D = ["M10 10 L 50 10 C 90 80 110 80 120 60 A 20 10 30 0 1 240 70 Z",
+     "M0 0 Q 5 10 10 0 T 20 0",
+     "M0 0 A 5 5 0 1 0 10 0 A 5 5 0 1 0 0 0 Z",
+     "M1 2 L 3 4"]
+
+
+def _paths():
+    return [Path(d) for d in D * 3]
+
+
+@pytest.mark.parametrize("chunk", [2, 1024])
+def test_round_trip(tmp_path, monkeypatch, chunk):
+    monkeypatch.setattr(archive, "_CHUNK", chunk)
+    paths = _paths()
+    file = str(tmp_path / "paths.viiva")
+    attributes = [{"id": "p%d" % i} for i in range(len(paths))]
+    assert write_paths(file, iter(paths), metadata={"source": "test"}, attributes=attributes) == len(paths)
+
+    stored = PathFile(file)
+    assert len(stored) == len(paths)
+    assert stored.metadata == {"source": "test"}
+    assert stored.attributes == attributes
+    for path, back in zip(paths, stored):
+        assert back.d() == path.d()
+        assert back._closed == path._closed
+    whole, first = PackedPath.from_paths(paths)
+    assert stored.path_first.tolist() == list(first)
+    assert np.array_equal(stored.packed().points, whole.points)
+    assert np.array_equal(stored.packed().arcs, whole.arcs)
+    assert [p.d() for p in stored[1:3]] == [p.d() for p in paths[1:3]]
+    assert stored[-1].d() == paths[-1].d()
+
+
+def test_float32_and_packed_input(tmp_path):
+    paths = _paths()
+    file = str(tmp_path / "paths.viiva")
+    write_paths(file, [PackedPath.from_path(path) for path in paths], dtype="float32")
+    stored = PathFile(file)
+    assert stored.metadata is None and stored.attributes is None
+    for i, path in enumerate(paths):
+        packed = PackedPath.from_path(path)
+        assert np.allclose(stored.packed(i).points, packed.points, atol=1e-4)
+        # arc parameters stay float64
+        assert np.array_equal(stored.packed(i).arcs, packed.arcs)
+
+
+def test_rejects_other_files(tmp_path):
+    file = tmp_path / "other.bin"
+    file.write_bytes(b"\0" * 128)
+    with pytest.raises(ValueError):
+        PathFile(str(file))
+    with pytest.raises(ValueError):
+        write_paths(str(tmp_path / "x.viiva"), _paths(), attributes=[{}])
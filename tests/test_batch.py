@@ -0,0 +1,31 @@
+import os
+
+import numpy as np
+import pytest
+
+from viiva.batch import run_batch
+from viiva.paths.path import Path
+
+PATHS = ["M0 0 L%d 0 L5 5 Z" % i for i in range(1, 2000)]
+
+
+def _blocks():
+    return {name for name in os.listdir("/dev/shm") if name.startswith("viiva")}
+
+
+@pytest.mark.parametrize("shared_memory", [False, True])
+def test_flatten_matches_path(shared_memory):
+    results = list(run_batch(PATHS[:300], processes=2, chunksize=64, shared_memory=shared_memory))
+    assert len(results) == 300
+    for d, (coords, offsets) in zip(PATHS, results):
+        expected, expected_offsets = Path(d).flatten()
+        assert np.array_equal(coords, expected) and np.array_equal(offsets, expected_offsets)
+
+
+@pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="needs /dev/shm")
+def test_stopping_early_releases_shared_memory():
+    before = _blocks()
+    results = run_batch(PATHS, processes=2, chunksize=16, shared_memory=True)
+    next(results)
+    results.close()
+    assert _blocks() - before == set()
@@ -0,0 +1,56 @@
+import math
+
+import pytest
+
+from viiva.paths import boolean
+from viiva.paths.path import Path
+from viiva.shapes import Circle, Rect
+
+
+def _area(path):
+    return path.to_shapely(0.01).area
+
+
+# circles whose outline passes through a corner, and through the middle of
+# an edge, of the square: the crossings fall where the cubics approximating
+# the arcs meet
+CIRCLES = [(10, 10, 5), (5, 5, 5 * math.sqrt(2))]
+
+
+@pytest.mark.parametrize("cx, cy, r", CIRCLES)
+def test_exact_union_through_corners(cx, cy, r):
+    circle, square = Circle(cx, cy, r).as_path(), Rect(0, 0, 10, 10).as_path()
+    union = boolean.union([circle, square], mode="exact")
+    expected = boolean.union([circle, square], mode="flat", flatness=0.001)
+    assert sum(_area(path) for path in union) == pytest.approx(sum(_area(path) for path in expected), rel=5e-3)
+
+
+@pytest.mark.parametrize("cx, cy, r", CIRCLES)
+def test_exact_fracture_through_corners(cx, cy, r):
+    circle, square = Circle(cx, cy, r).as_path(), Rect(0, 0, 10, 10).as_path()
+    pieces = boolean.fracture([circle, square], mode="exact")
+    union = boolean.union([circle, square], mode="exact")
+    assert all(len(piece) for piece in pieces)
+    assert sum(_area(piece) for piece in pieces) == pytest.approx(sum(_area(path) for path in union), rel=5e-3)
+
+
+def test_bezier_division_through_corners():
+    circle = Path(Circle(10, 10, 5).d).to_beziers()
+    square = Path(Rect(0, 0, 10, 10).d).to_beziers()
+    inside, outside = sorted(_area(piece.to_path()) for piece in circle.division(square))
+    assert inside == pytest.approx(math.pi * 25 / 4, rel=1e-2)
+    assert outside == pytest.approx(math.pi * 25 * 3 / 4, rel=1e-2)
+
+
+def test_flat_division_keeps_every_path_area():
+    paths = [Rect(0, 0, 10, 10).as_path(), Circle(20, 5, 4).as_path(), Path("M0 0 L5 0"),
+             Rect(2, 2, 3, 3).as_path()]
+    others = [Circle(10, 5, 4).as_path(), Rect(4, 4, 1, 1).as_path()]
+    pieces = boolean.division(paths, others, mode="flat")
+    assert [len(p) for p in pieces] == [3, 1, 0, 2]
+    for path, parts in zip(paths[:2] + paths[3:], pieces[:2] + pieces[3:]):
+        assert sum(_area(part) for part in parts) == pytest.approx(path.to_shapely().area)
+    # the pieces inside the others come first
+    inside = sum(_area(part) for part in pieces[0][:2])
+    assert inside == pytest.approx(1 + boolean.intersection([paths[0], others[0]])[0].to_shapely().area)
+    assert _area(pieces[3][0]) == pytest.approx(1.0)
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+import shapely
+
+from viiva.paths.flatten import flatten
+from viiva.paths.path import Path
+
+CURVES = ("M0 0 C 30 -40 60 40 100 0 Q 130 -50 160 0 A 40 20 30 0 1 220 10 "
+          "A 5 5 0 1 0 230 10 L 240 40 M 0 100 C 0 150 50 150 50 100")
+
+
+@pytest.mark.parametrize("flatness", [0.01, 0.1, 1.0])
+def test_flatten_stays_within_flatness(flatness):
+    path = Path(CURVES)
+    coords, offsets = flatten(path, flatness)
+    assert offsets.tolist() == [0, offsets[1], len(coords)]
+    lines = shapely.MultiLineString([coords[a:b] for a, b in zip(offsets[:-1], offsets[1:])])
+    t = np.linspace(0, 1, 501)
+    samples = np.concatenate([np.array([segment.point(x) for x in t]) for segment in path])
+    distance = shapely.distance(lines, shapely.points(samples.real, samples.imag))
+    assert distance.max() <= flatness * (1 + 1e-9)
+
+
+def test_flatten_refines_with_flatness():
+    path = Path(CURVES)
+    counts = [len(flatten(path, flatness)[0]) for flatness in (1.0, 0.1, 0.01)]
+    assert counts[0] < counts[1] < counts[2]
+    # lines are never subdivided
+    coords, offsets = flatten(Path("M0 0 L 10 0 L 10 10"), 1e-6)
+    assert coords.tolist() == [[0, 0], [10, 0], [10, 10]]
+    assert offsets.tolist() == [0, 3]
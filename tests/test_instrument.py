@@ -0,0 +1,30 @@
+import copy
+
+from viiva import instrument
+from viiva.paths.path import Path
+
+
+class Node:
+    def __init__(self, children=()):
+        self.children = list(children)
+
+    def __deepcopy__(self, memo):
+        # copies its members through the module function, as copy hooks do
+        return Node([copy.deepcopy(child, memo) for child in self.children])
+
+
+def test_deepcopy_counts_outermost_calls():
+    tree = Node([Node([Node()]), Node()])
+    deepcopy = copy.deepcopy
+    with instrument.recording() as stats:
+        copy.deepcopy(tree)
+        copy.deepcopy([tree, Path("M0 0 L 10 10")])
+    assert stats["objects"]["deepcopy"] == 2
+    assert not instrument.is_enabled() and copy.deepcopy is deepcopy
+
+
+def test_recording_counts_operations():
+    with instrument.recording() as stats:
+        Path("M0 0 L 10 0 L 10 10").flatten(0.5)
+    assert stats["calls"]["Path.flatten"]["calls"] == 1
+    assert stats["objects"]["segments.Line"] >= 2
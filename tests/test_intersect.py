@@ -0,0 +1,20 @@
+from viiva.paths.path import Path
+
+SQUARE = Path("M0 0 L10 0 L10 10 L0 10 Z")
+
+
+def test_hits_on_segment_ends_are_reported_once():
+    # the vertical line meets the square where its segments join, at (5, 0) no
+    # more than at (5, 10), and its own joint (5, 0) lies on the square too
+    found = SQUARE.intersect(Path("M5 -5 L5 0 L5 15"))
+    points = sorted((seg.point(t) for (_, seg, t), _ in found), key=lambda z: z.imag)
+    assert points == [5 + 0j, 5 + 10j]
+
+
+def test_crossings_of_two_lines():
+    found = SQUARE.intersect(Path("M5 -5 L5 15 M-5 5 L15 5"))
+    assert sorted(T1 for (T1, _, _), _ in found) == [0.125, 0.375, 0.625, 0.875]
+
+
+def test_self_intersection_of_bowtie():
+    assert len(Path("M0 0 L10 10 L10 0 L0 10 Z").self_intersections()) == 1
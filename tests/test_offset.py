@@ -0,0 +1,39 @@
+import pytest
+import shapely
+
+from viiva.paths.path import Path
+
+SQUARE = "M0 0 L10 0 L10 10 L0 10 Z"
+TRIANGLE = "M0 0 L10 0 L5 8 Z"
+
+
+@pytest.mark.parametrize("join", ["miter", "round", "bevel"])
+@pytest.mark.parametrize("d", [SQUARE, TRIANGLE])
+def test_inward_offset_of_convex_polygon(d, join):
+    coords, offsets = Path(d).offset(-1, tolerance=0.01, join=join, as_coords=True)
+    ring = shapely.Polygon(coords)
+    expected = shapely.Polygon(Path(d).flatten()[0]).buffer(-1, join_style="mitre")
+    assert ring.is_valid
+    assert ring.area == pytest.approx(expected.area, rel=1e-9)
+    # no vertex is left on the source outline
+    assert shapely.distance(shapely.Polygon(Path(d).flatten()[0]).exterior, shapely.points(coords)).min() > 0.5
+
+
+@pytest.mark.parametrize("join, area", [("miter", 144.0), ("bevel", 142.0)])
+def test_outward_offset_joins(join, area):
+    coords, offsets = Path(SQUARE).offset(1, tolerance=0.01, join=join, as_coords=True)
+    ring = shapely.Polygon(coords)
+    assert ring.is_valid
+    assert ring.area == pytest.approx(area)
+
+
+def test_round_join_within_tolerance():
+    coords, offsets = Path(SQUARE).offset(1, tolerance=0.01, join="round", as_coords=True)
+    exact = 100 + 40 + 3.141592653589793
+    assert exact - 0.01 * 8 <= shapely.Polygon(coords).area <= exact
+
+
+def test_open_path_keeps_its_ends():
+    coords, offsets = Path("M0 0 L10 0 L10 10").offset(-1, tolerance=0.01, as_coords=True)
+    assert coords.tolist() == [[0.0, 1.0], [9.0, 1.0], [9.0, 10.0]]
+    assert offsets.tolist() == [0, 3]
@@ -0,0 +1,14 @@
+import numpy as np
+import pytest
+
+from viiva.shapes import Rect
+
+
+@pytest.mark.parametrize("rx, ry", [(8, None), (2, 9), (30, 30), (5, 5)])
+def test_rect_oversized_radii_match_path(rx, ry):
+    rect = Rect(0, 0, 10, 10, rx=rx, ry=ry)
+    path = rect.as_path()
+    assert rect.length() == pytest.approx(path.length(), rel=1e-6)
+    assert rect.area() == pytest.approx(path.to_shapely(0.001).area, rel=1e-3)
+    xy = np.random.default_rng(0).uniform(-1, 11, (2000, 2))
+    assert (rect.contains(xy) == path.contains(xy, flatness=0.001)).mean() > 0.99
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+import shapely
+
+from viiva.paths import simplify
+from viiva.paths.path import Path
+
+CURVES = "M0 0 C 30 -40 60 40 100 0 S 150 -30 180 20 Q 200 60 150 80 T 80 90"
+
+
+@pytest.mark.parametrize("method", simplify.METHODS)
+@pytest.mark.parametrize("tolerance", [0.01, 0.1, 1.0, 5.0])
+def test_simplify_drops_vertices_within_tolerance(method, tolerance):
+    coords, offsets = Path(CURVES).flatten(tolerance / 4)
+    kept, kept_offsets = simplify.simplify(coords, offsets, tolerance, method)
+    assert len(kept) < 0.6 * len(coords)
+    assert kept[0].tolist() == coords[0].tolist() and kept[-1].tolist() == coords[-1].tolist()
+    distance = shapely.LineString(coords).hausdorff_distance(shapely.LineString(kept))
+    assert distance <= tolerance + 1e-9
+
+
+@pytest.mark.parametrize("method", simplify.METHODS)
+def test_simplify_keeps_polylines_apart(method):
+    square = np.array([[0, 0], [5, 0.01], [10, 0], [10, 10], [0, 10], [0, 0]], dtype=float)
+    coords = np.concatenate((square, square + 20))
+    kept, offsets = simplify.simplify(coords, [0, 6, 12], 0.1, method)
+    assert offsets.tolist() == [0, 5, 10]
+    assert kept[:5].tolist() == square[[0, 2, 3, 4, 5]].tolist()
+
+
+def test_refit_follows_polyline():
+    polyline = Path(CURVES).to_polyline(0.01)
+    fitted = polyline.refit(0.1)
+    assert len(fitted) < len(polyline) / 10
+    a, b = polyline.flatten(0.01)[0], fitted.flatten(0.01)[0]
+    assert shapely.LineString(a).hausdorff_distance(shapely.LineString(b)) <= 0.1 + 0.01
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+import shapely
+
+from viiva.paths import winding
+from viiva.paths.path import Path
+
+# a square with a smaller one inside, traced the same way or the opposite way
+SAME = "M0 0 L 10 0 L 10 10 L 0 10 Z M3 3 L 7 3 L 7 7 L 3 7 Z"
+OPPOSITE = "M0 0 L 10 0 L 10 10 L 0 10 Z M3 3 L 3 7 L 7 7 L 7 3 Z"
+
+POINTS = [5 + 5j, 1 + 1j, 12 + 5j]
+
+
+@pytest.mark.parametrize("d, rule, expected", [
+    (SAME, "nonzero", [True, True, False]),
+    (SAME, "evenodd", [False, True, False]),
+    (OPPOSITE, "nonzero", [False, True, False]),
+    (OPPOSITE, "evenodd", [False, True, False]),
+])
+def test_fill_rules(d, rule, expected):
+    path = Path(d)
+    assert path.contains(POINTS, rule).tolist() == expected
+    assert path.to_beziers().contains(POINTS, rule).tolist() == expected
+
+
+def test_winding_numbers_count_turns():
+    coords, offsets = Path(SAME).flatten()
+    numbers = winding.winding_numbers(coords, offsets, POINTS)
+    assert np.abs(numbers).tolist() == [2, 1, 0]
+    coords, offsets = Path(OPPOSITE).flatten()
+    assert winding.winding_numbers(coords, offsets, POINTS).tolist()[0] == 0
+
+
+@pytest.mark.parametrize("bands", [1, 3, None])
+def test_contains_matches_shapely(bands):
+    path = Path("M0 0 C 30 -40 60 40 100 0 A 50 50 0 0 1 0 0 Z M40 10 L 60 10 L 50 30 Z")
+    rng = np.random.default_rng(1)
+    points = rng.uniform([-10, -60], [110, 20], (2000, 2))
+    inside = path.contains(points, "evenodd", bands=bands)
+    assert inside.shape == (2000,)
+    assert inside.tolist() == shapely.contains_xy(path.to_shapely(), points[:, 0], points[:, 1]).tolist()
+
+
+def test_contains_rejects_unknown_rule_and_open_beziers():
+    with pytest.raises(ValueError):
+        Path(SAME).contains(POINTS, "winding")
+    beziers = Path("M0 0 L 10 0 L 10 10").to_beziers()
+    beziers.closed = False
+    with pytest.raises(ValueError):
+        beziers.contains(POINTS)
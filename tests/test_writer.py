@@ -0,0 +1,55 @@
+import io
+
+import numpy as np
+import pytest
+import svgpathtools
+
+from viiva.paths.packed import PackedPath
+from viiva.paths.path import Path
+from viiva.paths.writer import format_d, write_d
+
+D = ("M10 10 L 50 10 L 50 40 H 80 V 60 C 90 80 110 80 120 60 S 150 40 160 60 "
+     "Q 170 80 180 60 T 200 60 A 20 10 30 0 1 240 70 Z M300 300 L 310.125 300.5 L 300 320 Z")
+
+
+def _points(path):
+    return np.array([[segment.start, segment.end] for segment in path])
+
+
+def test_default_output_matches_path_d():
+    path = Path(D)
+    assert format_d(path) == path.d()
+    open_path = Path("M0 0 L 1 1 Q 2 3 4 4 A 5 5 0 0 1 10 4")
+    assert format_d(open_path) == svgpathtools.Path(*open_path).d()
+
+
+@pytest.mark.parametrize("relative", [False, True, "auto"])
+@pytest.mark.parametrize("shorthand", [False, True])
+@pytest.mark.parametrize("minify", [False, True])
+@pytest.mark.parametrize("precision", [None, 3])
+def test_round_trip(precision, relative, shorthand, minify):
+    path = Path(D)
+    d = format_d(path, precision, relative, shorthand, minify)
+    back = Path(d)
+    assert len(back) == len(path)
+    assert [type(a).__name__ for a in back] == [type(a).__name__ for a in path]
+    tolerance = 1e-9 if precision is None else 10 ** -precision
+    assert np.abs(_points(back) - _points(path)).max() <= tolerance
+    assert format_d(PackedPath.from_path(path), precision, relative, shorthand, minify) == d
+
+
+def test_options_shorten():
+    path = Path(D)
+    full = format_d(path)
+    short = format_d(path, 2, "auto", True, True)
+    assert len(short) < 0.7 * len(full)
+    assert "H" in format_d(path, shorthand=True) and "S" in format_d(path, shorthand=True)
+
+
+def test_write_d_streams():
+    paths = [Path(D), Path("M0 0 L 1 1")] * 300
+    expected = [format_d(path, 2, minify=True) for path in paths]
+    assert write_d(paths, precision=2, minify=True) == expected
+    buffer = io.StringIO()
+    assert write_d(iter(paths), buffer, precision=2, minify=True) == len(paths)
+    assert buffer.getvalue() == "\n".join(expected) + "\n"
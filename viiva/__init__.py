@@ -1,6 +1,31 @@
-from .beziers import BezierPath
 from .paths import CubicBezier, Arc, Line, QuadraticBezier
 from .paths.path import Path
+from .paths.packed import PackedPath
+
+# heavier parts (beziers.py, shapely, multiprocessing) load on first use
+_LAZY = {
+    'BezierPath': '.beziers',
+    'iter_paths': '.paths.reader',
+    'to_shapely_array': '.paths.geometry',
+    'run_batch': '.batch',
+    'PathCollection': '.collection',
+    'write_paths': '.paths.archive',
+    'PathFile': '.paths.archive',
+    'format_d': '.paths.writer',
+    'write_d': '.paths.writer',
+}
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
 
 __all__ = [
     'CubicBezier',
@@ -8,5 +33,14 @@ __all__ = [
     'Line',
     'QuadraticBezier',
     'Path',
-    'BezierPath'
+    'PackedPath',
+    'BezierPath',
+    'iter_paths',
+    'to_shapely_array',
+    'run_batch',
+    'write_paths',
+    'PathFile',
+    'format_d',
+    'write_d',
+    'PathCollection'
 ]
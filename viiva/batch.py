@@ -0,0 +1,246 @@
+import os
+import secrets
+import itertools
+import multiprocessing
+from functools import partial
+
+import numpy as np
+
+STAGES = ('parse', 'flatten', 'offset', 'serialize')
+
+
+class BatchConfig:
+    """
+    Settings shipped to the workers of `run_batch`.
+    """
+    def __init__(self, stages, flatness=0.1, offset=None, tolerance=None, join='miter',
+                 shared_memory=False):
+        stages = tuple(stages)
+        if not stages or stages[0] != 'parse':
+            raise ValueError("The first stage must be 'parse'.")
+        if any(stage not in STAGES for stage in stages) or list(stages) != sorted(stages, key=STAGES.index):
+            raise ValueError("Stages must be in the order %s." % ", ".join(STAGES))
+        if 'flatten' in stages and 'offset' in stages:
+            raise ValueError("'offset' already yields a flattened polyline, use one of them.")
+        if 'offset' in stages and offset is None:
+            raise ValueError("The 'offset' stage needs an offset distance.")
+        self.stages = stages
+        self.flatness = flatness
+        self.offset = offset
+        self.tolerance = flatness if tolerance is None else tolerance
+        self.join = join
+        self.shared_memory = shared_memory
+        # the shared memory blocks of a run are named after it, so that the
+        # parent can find the ones it never received
+        self.prefix = 'viiva%s' % secrets.token_hex(4)
+
+    def block_name(self, start, index):
+        """
+        The name of the shared memory block of the index-th array of the chunk at `start`.
+        """
+        return '%s_%d_%d' % (self.prefix, start, index)
+
+    @property
+    def output(self):
+        if self.stages[-1] == 'serialize':
+            return 'd'
+        return 'packed' if self.stages[-1] == 'parse' else 'coords'
+
+
+# ------------------------------------------------------------------------------
+# worker side
+# ------------------------------------------------------------------------------
+
+def _process(item, config):
+    from .paths.path import Path
+    from .paths.flatten import lines_from_coords
+
+    path = Path(item)
+    if 'flatten' in config.stages:
+        geometry = path.flatten(config.flatness)
+    elif 'offset' in config.stages:
+        geometry = path.offset(config.offset, tolerance=config.tolerance, join=config.join, as_coords=True)
+    else:
+        geometry = None
+
+    if config.output == 'd':
+        if geometry is not None:
+            path = Path(*lines_from_coords(*geometry))
+        return path.d()
+    if config.output == 'packed':
+        return path.to_packed()
+    return geometry
+
+
+def _share(array, name):
+    from multiprocessing import shared_memory
+
+    block = shared_memory.SharedMemory(name=name, create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    block.close()
+    # the parent unlinks the block, so the worker must not track it
+    from multiprocessing import resource_tracker
+    resource_tracker.unregister(block._name, 'shared_memory')
+    return (name, array.shape, array.dtype.str)
+
+
+def _work(config, task):
+    """
+    Process one chunk and pack its results into a few flat arrays.
+    """
+    start, items = task
+    results = [_process(item, config) for item in items]
+    if config.output == 'd':
+        return start, results
+    if config.output == 'packed':
+        arrays = {
+            'counts': np.array([len(r) for r in results], dtype=np.intp),
+            'kinds': np.concatenate([r.kinds for r in results]),
+            'points': np.concatenate([r.points for r in results]),
+            'arcs': np.concatenate([r.arcs for r in results]),
+        }
+    else:
+        arrays = {
+            'coords': np.concatenate([c for c, _ in results]),
+            'vertices': np.array([len(c) for c, _ in results], dtype=np.intp),
+            'offsets': np.concatenate([o for _, o in results]),
+            'lengths': np.array([len(o) for _, o in results], dtype=np.intp),
+        }
+    if config.shared_memory:
+        arrays = {key: _share(value, config.block_name(start, index))
+                  for index, (key, value) in enumerate(arrays.items())}
+    return start, arrays
+
+
+# ------------------------------------------------------------------------------
+# parent side
+# ------------------------------------------------------------------------------
+
+def _attach(value):
+    if isinstance(value, np.ndarray):
+        return value
+    from multiprocessing import shared_memory
+
+    name, shape, dtype = value
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        return np.ndarray(shape, dtype=dtype, buffer=block.buf).copy()
+    finally:
+        block.close()
+        block.unlink()
+
+
+def _unpack(config, arrays):
+    """
+    Split the arrays of a chunk back into one result per item.
+    """
+    if config.output == 'd':
+        return arrays
+    from .paths.packed import PackedPath
+
+    arrays = {key: _attach(value) for key, value in arrays.items()}
+    if config.output == 'packed':
+        bounds = np.cumsum(np.append(0, arrays['counts']))
+        return [PackedPath(arrays['kinds'][lo:hi], arrays['points'][lo:hi], arrays['arcs'][lo:hi])
+                for lo, hi in zip(bounds[:-1], bounds[1:])]
+    vertices = np.cumsum(np.append(0, arrays['vertices']))
+    lengths = np.cumsum(np.append(0, arrays['lengths']))
+    return [(arrays['coords'][v0:v1], arrays['offsets'][o0:o1])
+            for v0, v1, o0, o1 in zip(vertices[:-1], vertices[1:], lengths[:-1], lengths[1:])]
+
+
+def _chunks(items, chunksize):
+    import xml.etree.ElementTree as ET
+
+    items = iter(items)
+    start = 0
+    while True:
+        chunk = list(itertools.islice(items, chunksize))
+        if not chunk:
+            return
+        # elements are shipped as markup
+        chunk = [ET.tostring(item, encoding='unicode') if hasattr(item, 'tag') else item
+                 for item in chunk]
+        yield start, chunk
+        start += len(chunk)
+
+
+def run_batch(items, stages=('parse', 'flatten'), flatness=0.1, offset=None, tolerance=None,
+              join='miter', processes=None, chunksize=256, ordered=True, shared_memory=False):
+    """
+    Run parse, flatten/offset and serialize stages over many paths in a process pool.
+
+    Items are sent to the workers in chunks and every chunk comes back as a
+    few flat numpy arrays (or strings), never as segment objects.
+
+    Args:
+        items: An iterable of d-strings, SVG element strings or ElementTree elements.
+        stages: the stages to run, in order: 'parse', then 'flatten' or 'offset',
+                then 'serialize'. Default is ('parse', 'flatten').
+        flatness (float): flatness of the 'flatten' stage. Default is 0.1.
+        offset (float): offset distance of the 'offset' stage.
+        tolerance (float): tolerance of the 'offset' stage. Default is the flatness.
+        join (str): join of the 'offset' stage. Default is "miter".
+        processes (int): number of worker processes, 0 to run in this process.
+                         Default is the number of CPUs.
+        chunksize (int): items per task. Default is 256.
+        ordered (bool): yield results in input order. Default is True.
+        shared_memory (bool): return chunk arrays through shared memory instead
+                              of pickling them. Default is False.
+
+    Yields:
+        The result of each item: a PackedPath after 'parse', `(coords, offsets)`
+        after 'flatten' or 'offset' (see viiva.paths.flatten.flatten), a d-string
+        after 'serialize'. With `ordered=False` yields `(index, result)` pairs
+        in completion order.
+    """
+    config = BatchConfig(stages, flatness, offset, tolerance, join, shared_memory)
+    work = partial(_work, config)
+    # chunks handed to the workers and not yet received back
+    pending = set()
+
+    def tasks():
+        for task in _chunks(items, chunksize):
+            pending.add(task[0])
+            yield task
+
+    if processes == 0:
+        done, pool = map(work, tasks()), None
+    else:
+        pool = multiprocessing.Pool(processes or os.cpu_count())
+        done = pool.imap(work, tasks()) if ordered else pool.imap_unordered(work, tasks())
+    try:
+        for start, arrays in done:
+            results = _unpack(config, arrays)
+            pending.discard(start)
+            if ordered:
+                yield from results
+            else:
+                yield from enumerate(results, start)
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        if config.shared_memory:
+            # stopped early or failed: drop the blocks of the chunks never received
+            _release(config, pending)
+
+
+def _release(config, starts):
+    from multiprocessing import shared_memory
+
+    for start in list(starts):
+        # every chunk ships four arrays
+        for index in range(4):
+            name = config.block_name(start, index)
+            try:
+                block = shared_memory.SharedMemory(name=name)
+            except FileNotFoundError:
+                continue
+            except ValueError:
+                # a worker stopped between creating the block and sizing it
+                import _posixshmem
+                _posixshmem.shm_unlink('/' + name)
+                continue
+            block.close()
+            block.unlink()
@@ -44,13 +44,29 @@ def ensure_subclass_instance(obj, cls):
         obj.__class__ = globals().get(obj.__class__.__name__, obj.__class__)
     return obj
 
+# methods of the beziers.py BezierPath that never modify the path
+PURE_METHODS = {
+    'asSegments', 'asNodelist', 'asSVGPath', 'asMatplot', 'plot', 'clone',
+    'bounds', 'pointAtTime', 'lengthAtTime', 'segpairs', 'findDiscontinuities',
+    'windingNumberOfPoint', 'pointIsInside', 'signed_area', 'direction',
+    'thicknessAtX', 'distanceToPath', 'offset', 'dash', 'flatten',
+    'getSelfIntersections', 'sample',
+}
+
+# Path methods that modify the path, delegated to a fresh conversion
+PATH_MUTATORS = {'insert', 'extend', 'pop', 'remove', 'clear'}
+
 def method_wrapper(method_name, cls):
     """Wrap a method to ensure the result is an instance of the subclass."""
     original_method = getattr(cls, method_name)
+    pure = method_name in PURE_METHODS
 
     @wraps(original_method)
     def wrapper(self, *args, **kwargs):
         result = original_method(self, *args, **kwargs)
+        # the method may have moved nodes in place
+        if not pure and isinstance(self, cls):
+            self.invalidate()
         # Ensure the result is an instance of the subclass
         if isinstance(result, list):
             return [ensure_subclass_instance(item, cls) for item in result]
@@ -79,9 +95,50 @@ def map_methods_to_snake_case(cls):
 
 @map_methods_to_snake_case
 class BezierPath(CBezierPath):
+    # viiva segments and Path built from asSegments(), see _segments()
+    _segments_cache = None
+    _path_cache = None
+
     def __init__(self, *args, **kwargs):
         return super().__init__(*args, **kwargs)
-        
+
+    def __setattr__(self, name, value):
+        # beziers.py replaces the representation whenever it rebuilds the path
+        if name == 'activeRepresentation':
+            self.invalidate()
+        super().__setattr__(name, value)
+
+    def __getstate__(self):
+        # caches are neither copied nor pickled
+        state = self.__dict__.copy()
+        state.pop('_segments_cache', None)
+        state.pop('_path_cache', None)
+        return state
+
+    def invalidate(self):
+        """
+        Drop the cached viiva segments and Path.
+
+        Wrapped beziers.py methods and representation changes do this
+        automatically; call it after editing nodes or segments in place.
+        """
+        self._segments_cache = None
+        self._path_cache = None
+
+    def _segments(self):
+        if self._segments_cache is None:
+            segments = self.asSegments()
+            self._segments_cache = [
+                globals()[s.__class__.__name__].fast(*[_p2i(p) for p in list(s)])
+                for s in segments
+            ]
+        return self._segments_cache
+
+    def _path(self):
+        if self._path_cache is None:
+            self._path_cache = Path(*self._segments())
+        return self._path_cache
+
     @classmethod
     def from_segments(_, segments): return super().fromSegments(segments)
     
@@ -99,32 +156,35 @@ class BezierPath(CBezierPath):
         return b
 
     def to_path(self):
-        segments = self.asSegments()
-        # print(segments)
-        for i, s in enumerate(segments):
-            n = "" + s.__class__.__name__
-            b = globals()[n](*[ _p2i(p) for p in list(s) ])
-            segments[i] = b
-        return Path(*segments)
+        return Path(*self._segments())
         
     
     def division(self, other):
-        # intersect + subtract
-        # total area is unchanged
-        raise NotImplementedError
+        # the parts inside and outside other, the total area is unchanged
+        from .paths import boolean
+
+        pieces, = boolean.division([self._path()], [other._path()], mode="exact")
+        return [path.to_beziers() for path in pieces]
 
     def fracture(self, other):
-        # intersect and subtract two-ways
-        # total area stays same
-        raise NotImplementedError
+        # the parts in either path and in both, the union is unchanged
+        from .paths import boolean
+
+        return [path.to_beziers() for path in boolean.fracture([self._path(), other._path()], mode="exact")]
+
+    def contains(self, points, rule="nonzero", flatness=0.1, bands=None):
+        # all points at once, see Path.contains, where pointIsInside takes one
+        if not self.closed:
+            raise ValueError("contains needs a closed path.")
+        return self._path().contains(points, rule, flatness, bands)
 
-    def dash(self):
-        # messes up in sampling
-        raise NotImplementedError
+    def dash(self, dasharray, offset=0.0, tolerance=0.1):
+        # beziers.py's own dash messes up in sampling, see Path.dash
+        return [path.to_beziers() for path in self._path().dash(dasharray, offset, tolerance)]
 
     def smoothed(self, *args, **kwargs):
-        _self = copy.deepcopy(self)
-        return _self.smooth(*args, **kwargs)
+        # clone() shares the segments, which smooth() replaces rather than changes
+        return self.clone().smooth(*args, **kwargs)
 
     def offset(self, o):
         return super().offset(_t2p(o))
@@ -136,21 +196,21 @@ class BezierPath(CBezierPath):
         return(d)
     
     def __getitem__(self, item):
-        i = self.asSegments()[item]
-        n = i.__class__.__name__
-        b = globals()[n](*[ _p2i(p) for p in list(i) ])
-        return b
+        return self._segments()[item]
 
     def __len__(self):
-        return len(self.asSegments())
+        return len(self._segments())
+
+    def __iter__(self):
+        return iter(self._segments())
     
     def __getattr__(self, name):
         # Check if the attribute or method exists in Path
         if hasattr(Path, name):
             # If it does, get the method from Path
             def method(*args, **kwargs):
-                # Convert the BezierPath to a Path and call the method
-                path_obj = self.to_path()
+                # Call the method on the cached Path conversion
+                path_obj = self.to_path() if name in PATH_MUTATORS else self._path()
                 return getattr(path_obj, name)(*args, **kwargs)
             return method
         else:
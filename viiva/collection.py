@@ -0,0 +1,159 @@
+from collections.abc import Sequence
+
+import numpy as np
+
+from .paths import to_complex
+from .paths.packed import PackedPath
+from .paths.geometry import to_shapely_array
+from .paths.transform import transform_paths
+
+
+class PathCollection(Sequence):
+    """
+    An immutable sequence of paths with a spatial index for window queries,
+    nearest-path queries and point hit-tests.
+
+    The index is an STR-tree over the exact bounding boxes of the paths, or of
+    their segments, computed from the curves without flattening them. Query
+    candidates are refined against the flattened geometry of the paths, which
+    is built for all paths at once the first time it is needed.
+
+    Args:
+        paths: An iterable of Path objects.
+        flatness (float): flatness of the geometry used for refinement. Default is 0.1.
+        segments (bool): index segment boxes instead of path boxes, which prunes
+                         better for long paths spanning large areas. Default is False.
+    """
+    def __init__(self, paths, flatness=0.1, segments=False):
+        import shapely
+
+        self.paths = list(paths)
+        self.flatness = flatness
+        self.segments = segments
+        self._geometries = None
+
+        packed, first = PackedPath.from_paths(self.paths)
+        boxes = packed.segment_bboxes()
+        counts = np.diff(first)
+        self._owners = np.repeat(np.arange(len(self.paths)), counts)
+        if not segments:
+            nonempty = counts > 0
+            starts = first[:-1][nonempty]
+            path_boxes = np.full((len(self.paths), 4), np.nan)
+            if len(starts):
+                path_boxes[nonempty, 0::2] = np.minimum.reduceat(boxes[:, 0::2], starts)
+                path_boxes[nonempty, 1::2] = np.maximum.reduceat(boxes[:, 1::2], starts)
+            boxes = path_boxes[nonempty]
+            self._owners = np.flatnonzero(nonempty)
+        self.boxes = boxes
+        self.tree = shapely.STRtree(shapely.box(boxes[:, 0], boxes[:, 2], boxes[:, 1], boxes[:, 3]))
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, index):
+        return self.paths[index]
+
+    def __repr__(self):
+        return "PathCollection(%d paths)" % len(self)
+
+    def transformed(self, matrix):
+        """
+        Apply an affine transform to all the paths in one vectorized pass, see
+        viiva.paths.transform.transform_paths.
+
+        Args:
+            matrix: a 3x3 matrix, the six values of an SVG matrix(), or an SVG transform string.
+
+        Returns:
+            PathCollection: a new collection of the transformed paths, with the same options.
+        """
+        return PathCollection(transform_paths(self.paths, matrix), self.flatness, self.segments)
+
+    @property
+    def geometries(self):
+        """
+        The flattened shapely geometry of every path (see viiva.paths.geometry.to_shapely_array).
+        """
+        if self._geometries is None:
+            self._geometries = to_shapely_array(self.paths, self.flatness)
+        return self._geometries
+
+    def _candidates(self, geometry, predicate=None, **kwargs):
+        return np.unique(self._owners[self.tree.query(geometry, predicate=predicate, **kwargs)])
+
+    def query(self, bbox, exact=True):
+        """
+        Find the paths touching a rectangle.
+
+        Args:
+            bbox (tuple): the window as (xmin, xmax, ymin, ymax), as returned by Path.bbox.
+            exact (bool): refine the box matches against the flattened paths. Default is True.
+
+        Returns:
+            numpy.ndarray: the sorted indices of the matching paths.
+        """
+        import shapely
+
+        xmin, xmax, ymin, ymax = bbox
+        window = shapely.box(xmin, ymin, xmax, ymax)
+        found = self._candidates(window, predicate="intersects")
+        if exact and len(found):
+            found = found[shapely.intersects(self.geometries[found], window)]
+        return found
+
+    def hit_test(self, point, tolerance=0.0):
+        """
+        Find the paths under a point.
+
+        Closed paths are hit anywhere inside their filled area (even-odd),
+        open paths within `tolerance` of their outline.
+
+        Args:
+            point: the point, as a complex number or an (x, y) pair.
+            tolerance (float): hit distance from the outline. Default is 0.
+
+        Returns:
+            numpy.ndarray: the sorted indices of the hit paths.
+        """
+        import shapely
+
+        point = complex(to_complex(point))
+        probe = shapely.points(point.real, point.imag)
+        found = self._candidates(probe, predicate="dwithin", distance=tolerance)
+        if len(found):
+            found = found[shapely.dwithin(self.geometries[found], probe, tolerance)]
+        return found
+
+    def nearest(self, point, max_distance=None):
+        """
+        Find the path closest to a point.
+
+        The distance to a box never exceeds the distance to the path inside it,
+        so once the nearest box gives an upper bound only the boxes within that
+        bound need an exact distance.
+
+        Args:
+            point: the point, as a complex number or an (x, y) pair.
+            max_distance (float): ignore paths farther than this. Default is None.
+
+        Returns:
+            tuple: the index of the nearest path and its distance, or None if
+            there is no path within max_distance.
+        """
+        import shapely
+
+        if not len(self.boxes):
+            return None
+        point = complex(to_complex(point))
+        probe = shapely.points(point.real, point.imag)
+        nearest = self.tree.query_nearest(probe, max_distance=max_distance, all_matches=True)
+        if not len(nearest):
+            return None
+        bound = shapely.distance(self.geometries[self._owners[nearest]], probe).min()
+        found = self._candidates(probe, predicate="dwithin", distance=bound)
+        distances = shapely.distance(self.geometries[found], probe)
+        best = np.argmin(distances)
+        if max_distance is not None and distances[best] > max_distance:
+            return None
+        return int(found[best]), float(distances[best])
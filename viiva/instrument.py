@@ -0,0 +1,244 @@
+"""
+Opt-in instrumentation of viiva operations.
+
+While enabled, the operations listed in OPERATIONS are wrapped to record
+call counts and cumulative (inclusive) time, and the constructors and
+functions in OBJECTS to count the segments and paths created and the deep
+copies performed (the outermost deepcopy calls, not the copies of their
+members). Wrappers are only installed by enable() and removed by disable(),
+so there is no cost at all while instrumentation is off.
+
+    from viiva import instrument
+
+    with instrument.recording() as stats:
+        path.to_beziers().smoothed()
+    print(instrument.report(stats))
+"""
+import importlib
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# timed operations, as "module:attribute" with dotted attributes for methods
+OPERATIONS = [
+    "viiva.paths.path:Path.parse_d",
+    "viiva.paths.path:Path.parse_d_many",
+    "viiva.paths.path:Path.parse_element",
+    "viiva.paths.path:Path.to_cubics",
+    "viiva.paths.path:Path.to_polyline",
+    "viiva.paths.path:Path.flatten",
+    "viiva.paths.path:Path.to_packed",
+    "viiva.paths.path:Path.to_beziers",
+    "viiva.paths.path:Path.to_shapely",
+    "viiva.paths.path:Path.smoothed",
+    "viiva.paths.path:Path.offset",
+    "viiva.paths.path:Path.kinks",
+    "viiva.paths.path:Path.intersect",
+    "viiva.paths.path:Path.self_intersections",
+    "viiva.paths.path:Path.arc_length_index",
+    "viiva.paths.path:Path.dash",
+    "viiva.paths.path:Path.simplify",
+    "viiva.paths.path:Path.refit",
+    "viiva.paths.path:Path.transformed",
+    "viiva.paths.path:Path.contains",
+    "viiva.paths.path:Path.length",
+    "viiva.paths.path:Path.bbox",
+    "viiva.paths.path:Path.d",
+    "viiva.paths.parser:parse_segments",
+    "viiva.paths.flatten:flatten",
+    "viiva.paths.offset:offset",
+    "viiva.paths.geometry:to_shapely_array",
+    "viiva.paths.boolean:union",
+    "viiva.paths.boolean:intersection",
+    "viiva.paths.boolean:difference",
+    "viiva.paths.boolean:division",
+    "viiva.paths.boolean:fracture",
+    "viiva.paths.transform:transform_paths",
+    "viiva.paths.winding:winding_numbers",
+    "viiva.beziers:BezierPath.from_path",
+    "viiva.beziers:BezierPath.to_path",
+    "viiva.beziers:BezierPath.smoothed",
+    "viiva.beziers:BezierPath.offset",
+    "viiva.beziers:BezierPath._segments",
+    # conversions behind attribute delegation and subclass swaps of wrapped methods
+    "viiva.beziers:BezierPath.__getattr__",
+    "viiva.beziers:ensure_subclass_instance",
+]
+
+# counted constructors and functions, with the name they are counted under;
+# "{class}" is replaced by the class of the constructed object
+OBJECTS = [
+    ("svgpathtools.path:Line.__init__", "segments.{class}"),
+    ("svgpathtools.path:QuadraticBezier.__init__", "segments.{class}"),
+    ("svgpathtools.path:CubicBezier.__init__", "segments.{class}"),
+    ("svgpathtools.path:Arc.__init__", "segments.{class}"),
+    ("svgpathtools.path:Path.__init__", "paths.{class}"),
+    ("copy:deepcopy", "deepcopy"),
+]
+
+# counted functions that recurse through their own wrapper, counted only at
+# the outermost call: deepcopy copies every member with deepcopy again
+OUTERMOST = {"copy:deepcopy"}
+
+_calls = {}
+_objects = {}
+_patched = []
+
+
+def _resolve(target):
+    module_name, _, attribute = target.partition(":")
+    owner = importlib.import_module(module_name)
+    *parents, name = attribute.split(".")
+    for parent in parents:
+        owner = getattr(owner, parent)
+    return owner, name
+
+
+def _timed(function, name):
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            entry = _calls.get(name)
+            if entry is None:
+                entry = _calls[name] = [0, 0.0]
+            entry[0] += 1
+            entry[1] += time.perf_counter() - start
+    return wrapper
+
+
+def _counted(function, name):
+    per_class = "{class}" in name
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        key = name.replace("{class}", type(args[0]).__name__) if per_class else name
+        _objects[key] = _objects.get(key, 0) + 1
+        return function(*args, **kwargs)
+    return wrapper
+
+
+def _outermost(function, name):
+    depth = [0]
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        if depth[0] == 0:
+            _objects[name] = _objects.get(name, 0) + 1
+        depth[0] += 1
+        try:
+            return function(*args, **kwargs)
+        finally:
+            depth[0] -= 1
+    return wrapper
+
+
+def _name(target):
+    # methods by class, module functions by module
+    module_name, _, attribute = target.partition(":")
+    return attribute if "." in attribute else module_name.rpartition(".")[2] + "." + attribute
+
+
+def _patch(target, wrap, name):
+    owner, attribute = _resolve(target)
+    raw = vars(owner)[attribute] if isinstance(owner, type) else getattr(owner, attribute)
+    if isinstance(raw, (classmethod, staticmethod)):
+        wrapped = type(raw)(wrap(raw.__func__, name))
+    else:
+        wrapped = wrap(raw, name)
+    setattr(owner, attribute, wrapped)
+    _patched.append((owner, attribute, raw))
+
+
+def is_enabled():
+    return bool(_patched)
+
+
+def enable():
+    """
+    Install the instrumentation wrappers. Counters keep their values, see reset().
+    """
+    if _patched:
+        return
+    for target in OPERATIONS:
+        _patch(target, _timed, _name(target))
+    for target, name in OBJECTS:
+        _patch(target, _outermost if target in OUTERMOST else _counted, name)
+
+
+def disable():
+    """
+    Remove the instrumentation wrappers, restoring the original functions.
+    """
+    while _patched:
+        owner, attribute, raw = _patched.pop()
+        setattr(owner, attribute, raw)
+
+
+def reset():
+    """
+    Zero all counters.
+    """
+    _calls.clear()
+    _objects.clear()
+
+
+def snapshot():
+    """
+    The current counters.
+
+    Returns:
+        dict: {"calls": {operation: {"calls": int, "seconds": float}},
+        "objects": {name: int}}. Seconds include the time of nested operations.
+    """
+    return {
+        "calls": {name: {"calls": calls, "seconds": seconds} for name, (calls, seconds) in _calls.items()},
+        "objects": dict(_objects),
+    }
+
+
+@contextmanager
+def recording(reset_counters=True):
+    """
+    Record the operations run inside a with block.
+
+    Args:
+        reset_counters (bool): start from zero. Default is True.
+
+    Yields:
+        dict: filled with the snapshot() of the block when it exits.
+    """
+    was_enabled = is_enabled()
+    if reset_counters:
+        reset()
+    enable()
+    stats = {}
+    try:
+        yield stats
+    finally:
+        stats.update(snapshot())
+        if not was_enabled:
+            disable()
+
+
+def report(stats=None):
+    """
+    Format a snapshot as a table, the slowest operations first.
+
+    Args:
+        stats (dict): a snapshot. Default is the current one.
+
+    Returns:
+        str: the table.
+    """
+    stats = snapshot() if stats is None else stats
+    lines = ["%-40s %10s %12s" % ("operation", "calls", "seconds")]
+    for name, entry in sorted(stats["calls"].items(), key=lambda item: -item[1]["seconds"]):
+        lines.append("%-40s %10d %12.6f" % (name, entry["calls"], entry["seconds"]))
+    lines.append("")
+    lines.append("%-40s %10s" % ("objects", "count"))
+    for name, count in sorted(stats["objects"].items()):
+        lines.append("%-40s %10d" % (name, count))
+    return "\n".join(lines)
@@ -1,10 +1,8 @@
 import sys
 import copy
 import svgpathtools
-from math import sqrt
-
-import xml.etree.ElementTree as ET
-import shapely.geometry as geom
+import cmath
+from math import sqrt, ceil, degrees, pi, acos
 
 # from . path import Path
 
@@ -43,36 +41,132 @@ def preprocess(args):
 
 # ------------------------------------------------------------------------
 
+# argument types that need no point conversion
+PLAIN_TYPES = frozenset((complex, float, int, bool))
+
 class TolerantPath:
     def __init__(self, *args, **kwargs):
-        # Preprocess args and kwargs to convert points to complex numbers
-        args   = preprocess(args)
-        kwargs = preprocess(kwargs)
+        # Preprocess args and kwargs to convert points to complex numbers,
+        # unless they are complex numbers (and numbers, and flags) already
+        if kwargs or not all(type(arg) in PLAIN_TYPES for arg in args):
+            args   = preprocess(args)
+            kwargs = preprocess(kwargs)
         # Call the next class in the MRO (Method Resolution Order)
         super().__init__(*args, **kwargs)
 
+    @classmethod
+    def fast(cls, *args):
+        """
+        Construct a segment from complex numbers (and the radius, rotation and
+        flags of an arc) without any conversion, as the parser, the flattener
+        and the other bulk producers of segments do.
+        """
+        segment = cls.__new__(cls)
+        super(TolerantPath, segment).__init__(*args)
+        return segment
+
     def to_shapely():
         return Path(self).to_shapely()
 
     def to_beziers():
         return Path(self).to_beziers()
 
-    def d(self):
-        if self.isclosed():
-            return Path(self).d() + " Z"
-        else:
-            return Path(self).d()
+    def d(self, **options):
+        """
+        The path data of the segment, see viiva.paths.writer.format_d.
+        """
+        from .writer import format_d
+
+        return format_d((self,), **options)
 
         
 # ------------------------------------------------------------------------
 
 class Arc(TolerantPath, svgpathtools.Arc):
-    def approximate_with_cubics(self):
-        path = Path(self)
-        path.approximate_arcs_with_cubics()
-        for i, p in enumerate(path):
-            p.__class__ = globals().get(p.__class__.__name__)
-        return path
+    def _parameterize(self):
+        # svgpathtools.Arc._parameterize on Python floats: the same steps
+        # and results without the cost of numpy scalar arithmetic
+        rx = self.radius.real
+        ry = self.radius.imag
+        rx_sqd = rx * rx
+        ry_sqd = ry * ry
+
+        # rot_matrix and phi come from numpy.exp and numpy.radians
+        rot_matrix = complex(self.rot_matrix)
+        zp1 = (1 / rot_matrix) * (self.start - self.end) / 2
+        x1p, y1p = zp1.real, zp1.imag
+        x1p_sqd = x1p * x1p
+        y1p_sqd = y1p * y1p
+
+        radius_check = (x1p_sqd / rx_sqd) + (y1p_sqd / ry_sqd)
+        if radius_check > 1:
+            if self.autoscale_radius:
+                rx *= sqrt(radius_check)
+                ry *= sqrt(radius_check)
+                self.radius = rx + 1j * ry
+                rx_sqd = rx * rx
+                ry_sqd = ry * ry
+            else:
+                raise ValueError("No such elliptic arc exists.")
+
+        tmp = rx_sqd * y1p_sqd + ry_sqd * x1p_sqd
+        radicand = (rx_sqd * ry_sqd - tmp) / tmp
+        # numpy.isclose(radicand, 0)
+        radical = 0 if abs(radicand) <= 1e-8 else sqrt(radicand)
+
+        if self.large_arc == self.sweep:
+            cp = -radical * (rx * y1p / ry - 1j * ry * x1p / rx)
+        else:
+            cp = radical * (rx * y1p / ry - 1j * ry * x1p / rx)
+
+        self.center = cmath.exp(1j * float(self.phi)) * cp + (self.start + self.end) / 2
+
+        u1x = min(max((x1p - cp.real) / rx, -1.0), 1.0)
+        u1y = min(max((y1p - cp.imag) / ry, -1.0), 1.0)
+        u2x = min(max((-x1p - cp.real) / rx, -1.0), 1.0)
+        u2y = min(max((-y1p - cp.imag) / ry, -1.0), 1.0)
+
+        if u1y > 0:
+            self.theta = degrees(acos(u1x))
+        elif u1y < 0:
+            self.theta = -degrees(acos(u1x))
+        else:
+            self.theta = 0 if u1x > 0 else 180
+
+        det_uv = u1x * u2y - u1y * u2x
+        dot = u1x * u2x + u1y * u2y
+        acosand = min(max(dot, -1.0), 1.0)
+        if det_uv > 0:
+            self.delta = degrees(acos(acosand))
+        elif det_uv < 0:
+            self.delta = -degrees(acos(acosand))
+        else:
+            self.delta = 0 if dot > 0 else 180
+
+        if not self.sweep and self.delta >= 0:
+            self.delta -= 360
+        elif self.large_arc and self.delta <= 0:
+            self.delta += 360
+
+    def approximate_with_cubics(self, error=0.1):
+        """
+        Approximate the arc with cubic Bezier curves, as svgpathtools'
+        approximate_arcs_with_cubics, without copying or changing the arc.
+
+        Args:
+            error (float): The maximum sweep of each curve, as a fraction of a full turn. Default is 0.1.
+
+        Returns:
+            Path: A new path of CubicBezier segments.
+        """
+        from .path import Path
+
+        count = max(1, int(ceil(abs(self.delta) / degrees(2 * pi * error))))
+        curves = list(svgpathtools.Arc.as_cubic_curves(self, count))
+        # the curves are new objects, so they can change class in place
+        for curve in curves:
+            curve.__class__ = CubicBezier
+        return Path(*curves)
 
 class Line(TolerantPath, svgpathtools.Line):
     def to_cubic(self, t=1/3):
@@ -103,42 +197,24 @@ class Line(TolerantPath, svgpathtools.Line):
         control2 = start + (1 - t) * (end - start)
 
         # Create the CubicBezier curve with the calculated control points
-        cubic_bezier = CubicBezier(start, control1, control2, end)
+        cubic_bezier = CubicBezier.fast(start, control1, control2, end)
         return cubic_bezier
     
 class CubicBezier(TolerantPath, svgpathtools.CubicBezier):
     def to_polyline(self, flatness=0.01):
         """
-        Recursively flatten a Bézier curve into a polyline with a given flatness.
+        Flatten a Bézier curve into a polyline with a given flatness.
 
         Args:
-            bezier: An svgpathtools CubicBezier or QuadraticBezier object.
             flatness: The maximum allowable deviation between the Bézier curve and the polyline.
 
         Returns:
             Path: A path representing the polyline.
         """
+        from .flatten import flatten, lines_from_coords
+        from .path import Path
 
-        def subdivide(bez, depth=0, max_recursion=10):
-            """Recursively subdivide the Bézier curve until flatness criterion is met."""
-            p0, p1, p2, p3 = bez.start, bez.control1, bez.control2, bez.end
-            max_dist = max(
-                (abs((p2.real - p0.real) * (p0.imag - p1.imag) - (p2.imag - p0.imag) * (p0.real - p1.real)) / sqrt((p2.real - p0.real)**2 + (p2.imag - p0.imag)**2)),
-                (abs((p3.real - p1.real) * (p1.imag - p2.imag) - (p3.imag - p1.imag) * (p1.real - p2.real)) / sqrt((p3.real - p1.real)**2 + (p3.imag - p1.imag)**2))
-            )
-
-            if max_dist > flatness and depth < max_recursion:  # Limit depth to avoid infinite recursion
-                one, two = bez.split(0.5)
-                return subdivide(one, depth + 1)[:-1] + subdivide(two, depth + 1)
-            else:
-                return [p0, p3]
-
-        points = subdivide(self)
-
-        polyline_path = svgpathtools.Path()
-        for i in range(len(points) - 1):
-            polyline_path.append(Line(points[i], points[i + 1]))
-        return polyline_path
+        return Path(*lines_from_coords(*flatten([self], flatness)))
 
 class QuadraticBezier(TolerantPath, svgpathtools.QuadraticBezier):
     def to_cubic(self):
@@ -153,5 +229,5 @@ class QuadraticBezier(TolerantPath, svgpathtools.QuadraticBezier):
         C3 = P2
 
         # Return a new instance of svgpathtools.CubicBezier
-        return CubicBezier(C0, C1, C2, C3)    
+        return CubicBezier.fast(C0, C1, C2, C3)    
 
@@ -0,0 +1,220 @@
+"""
+A binary container for large collections of paths.
+
+Layout (little endian, every section aligned to 8 bytes):
+
+    header    64 bytes, see HEADER
+    records   one per segment: the segment kind and its four points as
+              (x, y) pairs, with the layout of PackedPath.points
+    tail      per-path segment offsets (int64, n_paths + 1), per-path arc
+              offsets (int64, n_paths + 1), per-path flags (uint8, bit 0 is
+              "closed with Z"), the parameters of the arc segments
+              (n_arcs x ARC_FIELDS) and a JSON document with the metadata
+
+Segment records are streamed to the file as paths come in and the tail and
+header are written at the end, so a collection is written in one pass
+without holding it in memory. Files are opened with numpy.memmap and only
+the records of the paths that are accessed are read.
+"""
+import json
+import struct
+
+import numpy as np
+
+from .packed import PackedPath, ARC, ARC_FIELDS
+
+MAGIC = b"VIIVAPTH"
+VERSION = 1
+
+# magic, version, float size, paths, segments, arcs, tail offset, metadata length
+HEADER = struct.Struct("<8sII QQQ QQ 8x")
+
+# paths packed together when writing
+_CHUNK = 1024
+
+
+def _records(float_size):
+    real = np.dtype("<f%d" % float_size)
+    kind = np.dtype("<u%d" % float_size)
+    return np.dtype([("kind", kind), ("points", real, (4, 2))])
+
+
+def _pad(f):
+    f.write(b"\0" * (-f.tell() % 8))
+
+
+def write_paths(file, paths, dtype="float64", metadata=None, attributes=None):
+    """
+    Write paths to a binary file in one pass.
+
+    Args:
+        file: a file name or a binary file object open for writing (and seeking).
+        paths: An iterable of Path or PackedPath objects, consumed once.
+        dtype (str): "float64" or "float32" for the points. Arc parameters
+                     are always float64. Default is "float64".
+        metadata (dict): JSON-serializable data about the collection. Default is None.
+        attributes (list): JSON-serializable data for each path, e.g. the
+                           attributes of its SVG element. Default is None.
+
+    Returns:
+        int: the number of paths written.
+    """
+    float_size = np.dtype(dtype).itemsize
+    if float_size not in (4, 8):
+        raise ValueError("dtype must be float32 or float64.")
+    records_dtype = _records(float_size)
+
+    if isinstance(file, str):
+        with open(file, "wb") as f:
+            return write_paths(f, paths, dtype, metadata, attributes)
+
+    start = file.tell()
+    file.write(b"\0" * HEADER.size)
+    path_first, arc_first, flags, arcs = [0], [0], [], []
+
+    def flush(chunk):
+        packed = [p if isinstance(p, PackedPath) else PackedPath.from_path(p) for p in chunk]
+        kinds = np.concatenate([p.kinds for p in packed])
+        points = np.concatenate([p.points for p in packed])
+        records = np.empty(len(kinds), dtype=records_dtype)
+        records["kind"] = kinds
+        records["points"] = np.stack((points.real, points.imag), axis=-1)
+        file.write(records.tobytes())
+        for p, path in zip(packed, chunk):
+            is_arc = p.kinds == ARC
+            arcs.append(p.arcs[is_arc])
+            path_first.append(path_first[-1] + len(p))
+            arc_first.append(arc_first[-1] + int(is_arc.sum()))
+            flags.append(1 if getattr(path, "_closed", False) else 0)
+
+    chunk = []
+    for path in paths:
+        chunk.append(path)
+        if len(chunk) == _CHUNK:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+
+    n_paths = len(flags)
+    if attributes is not None:
+        attributes = list(attributes)
+        if len(attributes) != n_paths:
+            raise ValueError("Got %d attributes for %d paths." % (len(attributes), n_paths))
+
+    _pad(file)
+    tail = file.tell() - start
+    file.write(np.asarray(path_first, dtype="<i8").tobytes())
+    file.write(np.asarray(arc_first, dtype="<i8").tobytes())
+    file.write(np.asarray(flags, dtype=np.uint8).tobytes())
+    _pad(file)
+    arcs = np.concatenate(arcs) if arcs else np.zeros((0, ARC_FIELDS))
+    file.write(arcs.astype("<f8").tobytes())
+    meta = json.dumps({"metadata": metadata, "attributes": attributes}).encode()
+    file.write(meta)
+    end = file.tell()
+
+    file.seek(start)
+    file.write(HEADER.pack(MAGIC, VERSION, float_size, n_paths, path_first[-1], len(arcs), tail, len(meta)))
+    file.seek(end)
+    return n_paths
+
+
+class PathFile:
+    """
+    A memory-mapped file written by write_paths.
+
+    Indexing returns Path objects and `packed(i)` PackedPath objects, reading
+    only the records of that path. `metadata` and `attributes` are decoded on
+    first access.
+
+    Args:
+        file: the file name.
+    """
+    def __init__(self, file):
+        self.file = file
+        self._map = np.memmap(file, dtype=np.uint8, mode="r")
+        if len(self._map) < HEADER.size:
+            raise ValueError("%s is not a viiva path file." % file)
+        magic, version, float_size, n_paths, n_segments, n_arcs, tail, meta_length = \
+            HEADER.unpack(self._map[:HEADER.size].tobytes())
+        if magic != MAGIC:
+            raise ValueError("%s is not a viiva path file." % file)
+        if version != VERSION:
+            raise ValueError("Unsupported viiva path file version %d." % version)
+
+        self.records = self._view(HEADER.size, _records(float_size), n_segments)
+        self.path_first = self._view(tail, "<i8", n_paths + 1)
+        self.arc_first = self._view(tail + 8 * (n_paths + 1), "<i8", n_paths + 1)
+        offset = tail + 16 * (n_paths + 1)
+        self.flags = self._view(offset, np.uint8, n_paths)
+        offset += n_paths + (-n_paths % 8)
+        self.arcs = self._view(offset, "<f8", n_arcs * ARC_FIELDS).reshape(n_arcs, ARC_FIELDS)
+        offset += 8 * n_arcs * ARC_FIELDS
+        self._meta_bytes = self._map[offset:offset + meta_length]
+        self._meta = None
+
+    def _view(self, offset, dtype, count):
+        dtype = np.dtype(dtype)
+        return self._map[offset:offset + dtype.itemsize * count].view(dtype)
+
+    def __len__(self):
+        return len(self.flags)
+
+    def __repr__(self):
+        return "PathFile(%r, %d paths)" % (self.file, len(self))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self.path(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.path(i)
+
+    def _decode(self, lo, hi, arc_lo):
+        records = self.records[lo:hi]
+        xy = records["points"].astype(float)
+        kinds = records["kind"].astype(np.uint8)
+        arcs = np.zeros((hi - lo, ARC_FIELDS))
+        is_arc = kinds == ARC
+        arcs[is_arc] = self.arcs[arc_lo:arc_lo + int(is_arc.sum())]
+        return PackedPath(kinds, xy[..., 0] + 1j * xy[..., 1], arcs)
+
+    def packed(self, index=None):
+        """
+        The segments of a path, or of all paths, as a PackedPath.
+
+        Args:
+            index (int): the path, or None for all of them.
+
+        Returns:
+            PackedPath: the segments. For all paths, see also `path_first`.
+        """
+        if index is None:
+            return self._decode(0, len(self.records), 0)
+        index = range(len(self))[index]
+        return self._decode(self.path_first[index], self.path_first[index + 1], self.arc_first[index])
+
+    def path(self, index):
+        """
+        The path at `index`, with viiva segments.
+        """
+        index = range(len(self))[index]
+        path = self.packed(index).to_path()
+        path._closed = bool(self.flags[index] & 1)
+        return path
+
+    def _metadata(self):
+        if self._meta is None:
+            self._meta = json.loads(self._meta_bytes.tobytes().decode())
+        return self._meta
+
+    @property
+    def metadata(self):
+        return self._metadata()["metadata"]
+
+    @property
+    def attributes(self):
+        return self._metadata()["attributes"]
@@ -0,0 +1,577 @@
+"""
+Boolean operations on many paths at once.
+
+Every operation takes whole collections of paths and returns viiva Path
+objects, one per resulting polygon with its holes as further subpaths.
+Paths are filled with the even-odd rule, and as in to_shapely_array only
+paths whose subpaths are all closed have an area; the others are left out.
+Two backends are available:
+
+    "flat"   the paths are flattened (see to_shapely_array) and combined
+             with shapely's vectorized set operations; the result is made
+             of lines. Fast on thousands of shapes.
+    "exact"  the approach of beziers.py's clip, for any number of paths:
+             segments are split where they intersect, flattened and clipped
+             with pyclipper in a single pass, and the original curves are
+             recovered from the flattened edges of the result. Only the
+             edges that pyclipper creates itself stay lines.
+"""
+import copy
+
+import numpy as np
+import svgpathtools
+
+from . import Line, TolerantPath
+from .path import Path
+from .packed import PackedPath, LINE, ARC, DELTA
+from .flatten import segment_pieces, subpath_starts, lines_from_coords
+from .geometry import to_shapely_array
+from .measure import crop_segment, _arc
+from .intersect import SegmentTree, bezier_intersections
+
+MODES = ("flat", "exact")
+
+# pyclipper grid, as a fraction of the flatness
+_GRID = 1e-3
+
+# intersections closer than this to the ends of a segment do not split it
+_SPLIT_EPSILON = 1e-9
+
+# Newton steps refining the intersections of curves
+_NEWTON_STEPS = 4
+
+
+def _check_mode(mode):
+    if mode not in MODES:
+        raise ValueError("mode must be one of %s." % ", ".join(MODES))
+
+
+def _paths(paths):
+    return [path if isinstance(path, Path) else Path(*path) for path in paths]
+
+
+# ------------------------------------------------------------------------
+# flat backend
+# ------------------------------------------------------------------------
+
+def _from_shapely(geometry):
+    """
+    The polygons of a shapely geometry (or an array of them) as closed Paths.
+    """
+    import shapely
+
+    polygons = shapely.get_parts(np.atleast_1d(np.asarray(geometry, dtype=object)))
+    polygons = polygons[shapely.get_type_id(polygons) == shapely.GeometryType.POLYGON]
+    polygons = polygons[~shapely.is_empty(polygons)]
+    result = []
+    for polygon in polygons:
+        rings = [polygon.exterior, *polygon.interiors]
+        coords = np.concatenate([np.asarray(ring.coords) for ring in rings])
+        offsets = np.concatenate(([0], np.cumsum([len(ring.coords) for ring in rings])))
+        path = Path(*lines_from_coords(coords, offsets))
+        path._closed = True
+        result.append(path)
+    return result
+
+
+def _geometries(paths, flatness):
+    import shapely
+
+    geometries = to_shapely_array(paths, flatness)
+    # only closed paths have an area, the others become lines
+    geometries = geometries[geometries != None]  # noqa: E711, an object array
+    polygonal = np.isin(shapely.get_type_id(geometries),
+                        (shapely.GeometryType.POLYGON, shapely.GeometryType.MULTIPOLYGON))
+    geometries = geometries[polygonal]
+    # self-intersecting rings are repaired rather than rejected
+    return shapely.make_valid(geometries) if len(geometries) else geometries
+
+
+def _flat_union(paths, flatness):
+    import shapely
+
+    return shapely.union_all(_geometries(paths, flatness))
+
+
+def _flat_division(paths, others, flatness):
+    """
+    The flat division in one overlay: the outlines of all the paths and of
+    the union of the others are noded and polygonized together, and every
+    face goes to the paths containing it, inside or outside the others.
+    """
+    import shapely
+
+    result = [[] for _ in paths]
+    geometries = to_shapely_array(paths, flatness)
+    polygonal = np.flatnonzero([geometry is not None and geometry.geom_type in ("Polygon", "MultiPolygon")
+                                for geometry in geometries])
+    if not len(polygonal):
+        return result
+    # the polygons of every path, repaired, with the path they belong to
+    parts, owner = shapely.get_parts(shapely.make_valid(geometries[polygonal]), return_index=True)
+    keep = shapely.get_type_id(parts) == shapely.GeometryType.POLYGON
+    parts, owner = parts[keep], polygonal[owner[keep]]
+    cutter = _flat_union(others, flatness)
+
+    outlines = shapely.boundary(parts)
+    if not shapely.is_empty(cutter):
+        outlines = np.append(outlines, shapely.boundary(cutter))
+    faces = shapely.get_parts(shapely.polygonize(shapely.get_parts(shapely.union_all(outlines))))
+    faces = faces[~shapely.is_empty(faces)]
+    if not len(faces):
+        return result
+    probes = shapely.point_on_surface(faces)
+    face, part = shapely.STRtree(parts).query(probes, predicate="within")
+    inside = shapely.contains_xy(cutter, shapely.get_x(probes), shapely.get_y(probes))
+
+    # merge the faces of every path inside the others, then outside them
+    path = owner[part]
+    order = np.lexsort((~inside[face], path))
+    path, face = path[order], face[order]
+    groups = np.flatnonzero(np.diff(path) | np.diff(inside[face])) + 1
+    for run in np.split(np.arange(len(face)), groups):
+        if len(run):
+            result[path[run[0]]] += _from_shapely(shapely.coverage_union_all(faces[face[run]]))
+    return result
+
+
+# ------------------------------------------------------------------------
+# exact backend
+# ------------------------------------------------------------------------
+
+def _reversed(segment):
+    result = segment.reversed()
+    if isinstance(segment, TolerantPath):
+        result.__class__ = type(segment)
+    return result
+
+
+def _with_start(segment, start):
+    if segment.start == start:
+        return segment
+    if isinstance(segment, svgpathtools.Arc):
+        return _arc(segment)(start, segment.radius, segment.rotation, segment.large_arc,
+                             segment.sweep, segment.end)
+    moved = copy.copy(segment)
+    moved.start = start
+    return moved
+
+
+def _cubics(packed, rows):
+    """
+    Cubic Beziers close to the given segments: their own control points, or
+    for arcs one cubic per quarter turn at most, whose parameters follow the
+    arc's closely enough to start Newton iterations from.
+
+    Returns:
+        tuple: (m, 4) control points, the row of every cubic, its index
+        within its segment and the number of cubics of its segment.
+    """
+    delta = np.where(packed.kinds[rows] == ARC, np.abs(packed.arcs[rows, DELTA]), 0)
+    parts = np.clip(np.ceil(delta / 90), 1, 4).astype(np.intp)
+    row = np.repeat(np.arange(len(rows)), parts)
+    k = np.arange(len(row)) - np.repeat(np.cumsum(parts) - parts, parts)
+    controls = packed.controls[rows[row]].copy()
+    arc = np.flatnonzero(packed.kinds[rows[row]] == ARC)
+    if len(arc):
+        arcs = packed.take(rows[row[arc]])
+        h = 1 / parts[row[arc]]
+        t = np.column_stack((k[arc] * h, (k[arc] + 1) * h))
+        p, d = arcs.point(t), arcs.derivative(t)
+        # the tangent length of the usual cubic approximation of a circular arc
+        angle = np.radians(arcs.arcs[:, DELTA]) * h
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scale = np.where(angle != 0, 4 / 3 * np.tan(angle / 4) / angle, 1 / 3) * h
+        controls[arc] = np.column_stack((p[:, 0], p[:, 0] + d[:, 0] * scale,
+                                         p[:, 1] - d[:, 1] * scale, p[:, 1]))
+    return controls, row, k, parts[row]
+
+
+def _splits(segments):
+    """
+    The parameters where every segment meets another one.
+    """
+    splits = [[] for _ in segments]
+    if not segments:
+        return splits
+    tree = SegmentTree(segments)
+    packed = tree.packed
+    pairs = tree.pairs(tree)
+    pairs = pairs[pairs[:, 0] < pairs[:, 1]]
+    # segments that share an end, such as neighbours in a subpath, are
+    # often tangent there, which subdivision resolves only at great cost,
+    # and meeting at an end needs no split
+    ends = packed.points[:, [0, 3]]
+    shared = (ends[pairs[:, 0], :, None] == ends[pairs[:, 1], None, :]).any(axis=(1, 2))
+    pairs = pairs[~shared]
+    lines = (packed.kinds[pairs[:, 0]] == LINE) & (packed.kinds[pairs[:, 1]] == LINE)
+    for i, j in pairs[lines].tolist():
+        for ti, tj in segments[i].intersect(segments[j]):
+            splits[i].append(ti)
+            splits[j].append(tj)
+
+    # curves meet where their cubics do, refined on the curves themselves
+    pairs = pairs[~lines]
+    if not len(pairs):
+        return splits
+    first, second = _cubics(packed, pairs[:, 0]), _cubics(packed, pairs[:, 1])
+    # every cubic of the first segment of a pair against every one of the second
+    n1, n2 = np.bincount(first[1], minlength=len(pairs)), np.bincount(second[1], minlength=len(pairs))
+    combined = n1 * n2
+    of = np.repeat(np.arange(len(pairs)), combined)
+    local = np.arange(len(of)) - np.repeat(np.cumsum(combined) - combined, combined)
+    a = (np.cumsum(n1) - n1)[of] + local // n2[of]
+    b = (np.cumsum(n2) - n2)[of] + local % n2[of]
+    hit, t, u = bezier_intersections(first[0][a], second[0][b])
+    pair = first[1][a[hit]]
+    t = (first[2][a[hit]] + t) / first[3][a[hit]]
+    u = (second[2][b[hit]] + u) / second[3][b[hit]]
+    one, other = packed.take(pairs[pair, 0]), packed.take(pairs[pair, 1])
+    for _ in range(_NEWTON_STEPS):
+        # solve A'(t) dt - B'(u) du = B(u) - A(t)
+        p, q = one.derivative(t[:, None])[:, 0], -other.derivative(u[:, None])[:, 0]
+        f = other.point(u[:, None])[:, 0] - one.point(t[:, None])[:, 0]
+        det = p.real * q.imag - p.imag * q.real
+        ok = np.abs(det) > 1e-12 * np.abs(p) * np.abs(q)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t = np.where(ok, np.clip(t + (f.real * q.imag - f.imag * q.real) / det, 0, 1), t)
+            u = np.where(ok, np.clip(u + (p.real * f.imag - p.imag * f.real) / det, 0, 1), u)
+    # the cubics of an arc meet where the arc does not, off its curve
+    gap = np.abs(one.point(t[:, None])[:, 0] - other.point(u[:, None])[:, 0])
+    meet = gap <= 1e-9 * (np.abs(one.points).max(axis=1) + 1)
+    for i, j, ti, tj in zip(pairs[pair[meet], 0].tolist(), pairs[pair[meet], 1].tolist(),
+                            t[meet].tolist(), u[meet].tolist()):
+        splits[i].append(ti)
+        splits[j].append(tj)
+    return splits
+
+
+class _Pieces:
+    """
+    The segments of some groups of paths split at all their intersections,
+    flattened on the pyclipper grid, with a table from flattened edges back
+    to the pieces they belong to.
+    """
+    def __init__(self, groups, flatness):
+        self.scale = 1 / (flatness * _GRID)
+        self.group = []     # the group of every path
+        self.closed = []    # whether all its subpaths are closed, so that it has an area
+        segments, owners, first_of_subpath = [], [], []
+        for group, paths in enumerate(groups):
+            for path in paths:
+                packed = PackedPath.from_path(path)
+                starts = subpath_starts(packed) if len(path) else np.zeros(0, dtype=bool)
+                first = np.flatnonzero(starts)
+                last = np.append(first[1:], len(path)) - 1
+                self.closed.append(bool(len(path)) and bool((packed.points[first, 0] == packed.points[last, 3]).all()))
+                for segment, start in zip(path, starts.tolist()):
+                    first_of_subpath.append(start)
+                    segments.append(segment)
+                    owners.append(len(self.group))
+                self.group.append(group)
+
+        # split every segment where it meets another one
+        splits = _splits(segments)
+        pieces, piece_owner, piece_subpath = [], [], []
+        subpath = -1
+        for index, segment in enumerate(segments):
+            subpath += first_of_subpath[index]
+            # a crossing at the joint of two cubics approximating an arc
+            # is found on both of them, keep one parameter of every cluster
+            bounds = [0.0]
+            for t in sorted(splits[index]):
+                if t - bounds[-1] > _SPLIT_EPSILON and t < 1 - _SPLIT_EPSILON:
+                    bounds.append(t)
+            bounds.append(1.0)
+            for t0, t1 in zip(bounds[:-1], bounds[1:]):
+                if t1 - t0 <= _SPLIT_EPSILON:
+                    continue
+                pieces.append(crop_segment(segment, t0, t1))
+                piece_owner.append(owners[index])
+                piece_subpath.append(subpath)
+        self.pieces = pieces
+        self.owner = np.asarray(piece_owner, dtype=np.intp)
+        self.subpath = np.asarray(piece_subpath, dtype=np.intp)
+
+        # flatten every piece on its own, ends included
+        packed = PackedPath.from_path(pieces)
+        counts = segment_pieces(packed, flatness) if len(packed) else np.zeros(0, dtype=np.intp)
+        piece = np.repeat(np.arange(len(pieces)), counts + 1)
+        first = np.cumsum(counts + 1) - (counts + 1)
+        k = np.arange(len(piece)) - first[piece]
+        points = packed.take(piece).point((k / counts[piece])[:, None])[:, 0] if len(piece) else np.zeros(0, complex)
+        points[k == 0] = packed.points[piece[k == 0], 0]
+        points[k == counts[piece]] = packed.points[piece[k == counts[piece]], 3]
+        grid = np.round(np.column_stack((points.real, points.imag)) * self.scale).astype(np.int64)
+        self.counts, self.first, self.grid = counts, first, grid
+
+        # flattened edge -> (piece, edge, direction)
+        lut = {}
+        a, b = grid[:-1].tolist(), grid[1:].tolist()
+        for index in np.flatnonzero(piece[:-1] == piece[1:]).tolist():
+            (ax, ay), (bx, by) = a[index], b[index]
+            p = int(piece[index])
+            edge = index - int(first[p])
+            lut[(ax, ay, bx, by)] = (p, edge, 1)
+            lut[(bx, by, ax, ay)] = (p, edge, -1)
+        self.lut = lut
+
+    def rings(self, group):
+        """
+        The rings of the paths of a group as pyclipper paths, oriented so
+        that the nonzero rule fills the union of the paths, each of them
+        filled even-odd.
+        """
+        import pyclipper
+
+        rings = []
+        for path in np.flatnonzero((np.asarray(self.group) == group) & self.closed):
+            pieces = np.flatnonzero(self.owner == path)
+            if not len(pieces):
+                continue
+            clipper = pyclipper.Pyclipper()
+            clipper.PreserveCollinear = True
+            boundaries = np.flatnonzero(np.diff(self.subpath[pieces])) + 1
+            for run in np.split(pieces, boundaries):
+                vertices = np.concatenate([self.grid[self.first[p]:self.first[p] + self.counts[p]] for p in run])
+                try:
+                    clipper.AddPath(vertices.tolist(), pyclipper.PT_SUBJECT, True)
+                except pyclipper.ClipperException:
+                    # degenerate, with no area
+                    continue
+            rings += clipper.Execute(pyclipper.CT_UNION, pyclipper.PFT_EVENODD, pyclipper.PFT_EVENODD)
+        return rings
+
+    def curves(self, ring):
+        """
+        The segments of a pyclipper output ring, with the original curves
+        wherever its edges are flattened edges of a piece.
+        """
+        n = len(ring)
+        edges = [self.lut.get((*ring[i], *ring[(i + 1) % n])) for i in range(n)]
+
+        def continues(previous, edge):
+            return (previous is not None and edge is not None and previous[0] == edge[0]
+                    and previous[2] == edge[2] and edge[1] == previous[1] + edge[2])
+
+        # start at an edge that does not continue the one before it
+        start = next((i for i in range(n) if not continues(edges[i - 1], edges[i])), 0)
+        segments = []
+        i = 0
+        while i < n:
+            edge = edges[(start + i) % n]
+            if edge is None:
+                a, b = ring[(start + i) % n], ring[(start + i + 1) % n]
+                segments.append(Line.fast(complex(*a) / self.scale, complex(*b) / self.scale))
+                i += 1
+                continue
+            last = edge
+            i += 1
+            while i < n and continues(last, edges[(start + i) % n]):
+                last = edges[(start + i) % n]
+                i += 1
+            piece, count = edge[0], self.counts[edge[0]]
+            if edge[2] == 1:
+                segments.append(crop_segment(self.pieces[piece], edge[1] / count, (last[1] + 1) / count))
+            else:
+                segments.append(_reversed(crop_segment(self.pieces[piece], last[1] / count, (edge[1] + 1) / count)))
+
+        # join the ends, which come from different pieces or from the grid
+        tolerance = 4 / self.scale
+        joined = []
+        for index, segment in enumerate(segments):
+            previous = (joined[-1] if joined else segments[-1]).end
+            if abs(segment.start - previous) <= tolerance:
+                segment = _with_start(segment, previous)
+            else:
+                joined.append(Line.fast(previous, segment.start))
+            joined.append(segment)
+        if joined and joined[0].start != joined[-1].end:
+            joined[0] = _with_start(joined[0], joined[-1].end)
+        return joined
+
+
+def _polygons(node):
+    # outer contours with their holes, from a pyclipper PolyTree
+    for child in node.Childs:
+        yield [child.Contour] + [hole.Contour for hole in child.Childs]
+        for hole in child.Childs:
+            yield from _polygons(hole)
+
+
+def _exact(operation, subject, clip, flatness):
+    import pyclipper
+
+    pieces = _Pieces([subject, clip], flatness)
+    clipper = pyclipper.Pyclipper()
+    clipper.PreserveCollinear = True
+    subject_rings, clip_rings = pieces.rings(0), pieces.rings(1)
+    if subject_rings:
+        clipper.AddPaths(subject_rings, pyclipper.PT_SUBJECT, True)
+    if clip_rings:
+        clipper.AddPaths(clip_rings, pyclipper.PT_CLIP, True)
+    if not subject_rings and not clip_rings:
+        return []
+    tree = clipper.Execute2(getattr(pyclipper, "CT_" + operation.upper()),
+                            pyclipper.PFT_NONZERO, pyclipper.PFT_NONZERO)
+    result = []
+    for contours in _polygons(tree):
+        segments = []
+        for contour in contours:
+            segments += pieces.curves(contour)
+        path = Path(*segments)
+        path._closed = True
+        result.append(path)
+    return result
+
+
+def _exact_fracture(paths, flatness):
+    import shapely
+
+    # the faces of the flattened pieces, on the same grid as the clipper
+    pieces = _Pieces([paths], flatness)
+    closed = np.flatnonzero(np.asarray(pieces.closed)[pieces.owner]) if len(pieces.pieces) else []
+    if not len(closed):
+        return []
+    vertices = np.concatenate([np.arange(pieces.first[p], pieces.first[p] + pieces.counts[p] + 1) for p in closed])
+    lines = shapely.linestrings(pieces.grid[vertices], indices=np.repeat(closed, pieces.counts[closed] + 1))
+    faces = shapely.get_parts(shapely.polygonize(shapely.get_parts(shapely.node(shapely.union_all(lines)))))
+    if not len(faces):
+        return []
+
+    # the faces inside some path, even-odd: inside an odd number of its rings
+    points = shapely.point_on_surface(faces)
+    x, y = shapely.get_x(points), shapely.get_y(points)
+    parity = np.zeros((len(paths), len(faces)), dtype=bool)
+    boundaries = np.flatnonzero(np.diff(pieces.subpath[closed])) + 1
+    for run in np.split(closed, boundaries):
+        vertices = np.concatenate([pieces.grid[pieces.first[p]:pieces.first[p] + pieces.counts[p] + 1] for p in run])
+        if len(vertices) < 4:
+            continue
+        ring = shapely.polygons(vertices)
+        parity[pieces.owner[run[0]]] ^= shapely.contains_xy(ring, x, y)
+
+    result = []
+    for face in faces[parity.any(axis=0)]:
+        segments = []
+        for ring in [face.exterior, *face.interiors]:
+            # polygonize closes rings with their first vertex
+            segments += pieces.curves(np.asarray(ring.coords, dtype=np.int64)[:-1].tolist())
+        path = Path(*segments)
+        path._closed = True
+        result.append(path)
+    return result
+
+
+# ------------------------------------------------------------------------
+# operations
+# ------------------------------------------------------------------------
+
+def union(paths, mode="flat", flatness=0.1):
+    """
+    The union of any number of paths.
+
+    Args:
+        paths: an iterable of Path objects (or sequences of segments).
+        mode (str): "flat" or "exact", see the module documentation. Default is "flat".
+        flatness (float): the maximum deviation of the flattened paths. Default is 0.1.
+
+    Returns:
+        list: one closed Path per polygon of the union, holes included.
+    """
+    _check_mode(mode)
+    paths = _paths(paths)
+    if mode == "flat":
+        return _from_shapely(_flat_union(paths, flatness))
+    return _exact("union", paths, [], flatness)
+
+
+def intersection(paths, mode="flat", flatness=0.1):
+    """
+    The area common to all the paths, see union.
+    """
+    _check_mode(mode)
+    paths = _paths(paths)
+    if not paths:
+        return []
+    if mode == "flat":
+        import shapely
+
+        geometries = _geometries(paths, flatness)
+        if len(geometries) < len(paths):
+            return []
+        return _from_shapely(shapely.intersection_all(geometries))
+    result = paths[:1]
+    for path in paths[1:]:
+        result = _exact("intersection", result, [path], flatness)
+        if not result:
+            break
+    return result
+
+
+def difference(paths, others, mode="flat", flatness=0.1):
+    """
+    The area of the paths outside all the others, see union.
+    """
+    _check_mode(mode)
+    paths, others = _paths(paths), _paths(others)
+    if mode == "flat":
+        import shapely
+
+        return _from_shapely(shapely.difference(_flat_union(paths, flatness), _flat_union(others, flatness)))
+    return _exact("difference", paths, others, flatness)
+
+
+def division(paths, others, mode="flat", flatness=0.1):
+    """
+    Cut every path along the outlines of the others: the parts inside them
+    and the parts outside them, so that the total area is unchanged.
+
+    Args:
+        paths: the paths to divide.
+        others: the paths to cut them with.
+        mode (str): "flat" or "exact", see the module documentation. Default is "flat".
+        flatness (float): the maximum deviation of the flattened paths. Default is 0.1.
+
+    Returns:
+        list: for every path, one list of closed Paths, the pieces inside
+        the others first.
+    """
+    _check_mode(mode)
+    paths, others = _paths(paths), _paths(others)
+    if mode == "flat":
+        return _flat_division(paths, others, flatness)
+    return [_exact("intersection", [path], others, flatness) + _exact("difference", [path], others, flatness)
+            for path in paths]
+
+
+def fracture(paths, mode="flat", flatness=0.1):
+    """
+    Split overlapping paths into the regions their outlines delimit: every
+    region is covered by the same set of paths, and together they make up
+    the union.
+
+    Args:
+        paths: an iterable of Path objects (or sequences of segments).
+        mode (str): "flat" or "exact", see the module documentation. Default is "flat".
+        flatness (float): the maximum deviation of the flattened paths. Default is 0.1.
+
+    Returns:
+        list: one closed Path per region.
+    """
+    _check_mode(mode)
+    paths = _paths(paths)
+    if mode == "flat":
+        import shapely
+
+        geometries = _geometries(paths, flatness)
+        if not len(geometries):
+            return []
+        # the faces of the noded outlines that lie inside some path
+        faces = shapely.get_parts(shapely.polygonize(
+            shapely.get_parts(shapely.node(shapely.union_all(shapely.boundary(geometries))))))
+        tree = shapely.STRtree(geometries)
+        inside = np.unique(tree.query(shapely.point_on_surface(faces), predicate="within")[0])
+        return _from_shapely(faces[inside])
+
+    return _exact_fracture(paths, flatness)
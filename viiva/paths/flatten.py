@@ -0,0 +1,133 @@
+import numpy as np
+
+from .packed import PackedPath, QUADRATIC, CUBIC, ARC, RX, RY, DELTA
+
+# upper bound of pieces per segment, as the former 10-level recursion
+MAX_PIECES = 1024
+
+
+def segment_pieces(packed, flatness=0.1):
+    """
+    Number of straight pieces each segment needs to stay within `flatness`.
+
+    Beziers use Wang's bound on the uniform subdivision of a polynomial
+    curve, arcs the sagitta of the circle of their larger radius; no
+    subdivision is ever performed.
+
+    Args:
+        packed (PackedPath): the segments.
+        flatness (float): maximum allowed deviation between curve and polyline.
+
+    Returns:
+        numpy.ndarray: an int array with at least one piece per segment.
+    """
+    if flatness <= 0:
+        raise ValueError("flatness must be positive.")
+    p = packed.points
+    n = np.ones(len(packed))
+
+    cubic = packed.kinds == CUBIC
+    if cubic.any():
+        c = p[cubic]
+        m = np.maximum(np.abs(c[:, 0] - 2 * c[:, 1] + c[:, 2]),
+                       np.abs(c[:, 1] - 2 * c[:, 2] + c[:, 3]))
+        n[cubic] = np.sqrt(0.75 * m / flatness)
+
+    quad = packed.kinds == QUADRATIC
+    if quad.any():
+        q = p[quad]
+        n[quad] = np.sqrt(0.25 * np.abs(q[:, 0] - 2 * q[:, 1] + q[:, 3]) / flatness)
+
+    arc = packed.kinds == ARC
+    if arc.any():
+        a = packed.arcs[arc]
+        r = np.maximum(a[:, RX], a[:, RY])
+        step = 2 * np.arccos(np.clip(1 - flatness / r, -1, 1))
+        n[arc] = np.abs(np.radians(a[:, DELTA])) / step
+
+    return np.clip(np.ceil(n), 1, MAX_PIECES).astype(np.intp)
+
+
+def subpath_starts(packed, starts=None):
+    """
+    Segments that begin a continuous subpath.
+
+    Args:
+        packed (PackedPath): the segments.
+        starts: indices of segments that begin a subpath regardless of continuity.
+
+    Returns:
+        numpy.ndarray: a boolean mask over the segments.
+    """
+    p = packed.points
+    breaks = np.ones(len(packed), dtype=bool)
+    breaks[1:] = p[1:, 0] != p[:-1, 3]
+    if starts is not None:
+        breaks[starts] = True
+    return breaks
+
+
+def flatten(path, flatness=0.1, starts=None):
+    """
+    Flatten a path into polyline coordinates.
+
+    All segments are processed together: the number of pieces of each
+    segment is computed up front with `segment_pieces` and every vertex is
+    evaluated in a single vectorized pass.
+
+    Args:
+        path: A Path, an iterable of segments or a PackedPath.
+        flatness (float): maximum allowed deviation between curve and polyline.
+        starts: indices of segments that begin a subpath regardless of continuity,
+                used to flatten several paths packed together.
+
+    Returns:
+        tuple: an (N, 2) float array of vertices and an int array of offsets
+        such that `coords[offsets[i]:offsets[i + 1]]` is the i-th continuous
+        subpath (the last offset is N).
+    """
+    packed = path if isinstance(path, PackedPath) else PackedPath.from_path(path)
+    if len(packed) == 0:
+        return np.empty((0, 2)), np.zeros(1, dtype=np.intp)
+
+    p = packed.points
+    pieces = segment_pieces(packed, flatness)
+    breaks = subpath_starts(packed, starts)
+
+    counts = pieces + breaks
+    first = np.cumsum(counts) - counts
+    total = int(counts.sum())
+    seg = np.repeat(np.arange(len(packed)), counts)
+    k = np.arange(total) - first[seg] + (~breaks)[seg]
+    t = k / pieces[seg]
+
+    pts = packed.take(seg).point(t[:, None])[:, 0]
+    # pin the segment ends, arcs do not hit them exactly
+    pts[k == 0] = p[seg[k == 0], 0]
+    end = k == pieces[seg]
+    pts[end] = p[seg[end], 3]
+
+    offsets = np.append(first[breaks], total)
+    return np.column_stack((pts.real, pts.imag)), offsets
+
+
+def lines_from_coords(coords, offsets=None):
+    """
+    Materialize Line segments from flattened coordinates.
+
+    Args:
+        coords: an (N, 2) array of vertices, as returned by `flatten`.
+        offsets: subpath offsets, as returned by `flatten`. Default is a single subpath.
+
+    Returns:
+        list: Line segments joining consecutive vertices of every subpath.
+    """
+    from . import Line
+
+    z = (np.asarray(coords)[:, 0] + 1j * np.asarray(coords)[:, 1]).tolist()
+    if offsets is None:
+        offsets = [0, len(z)]
+    lines = []
+    for lo, hi in zip(offsets[:-1], offsets[1:]):
+        lines += map(Line.fast, z[lo:hi - 1], z[lo + 1:hi])
+    return lines
@@ -0,0 +1,117 @@
+import numpy as np
+
+from .packed import PackedPath
+from . import flatten as _flatten
+
+
+def _flattened(paths, flatness):
+    """
+    Flatten all paths in one pass, returning the coordinates of all of them,
+    the offsets of every subpath into them and the path each subpath belongs to.
+    """
+    packed, first = PackedPath.from_paths(paths)
+    nonempty = first[:-1][np.diff(first) > 0]
+    coords, offsets = _flatten.flatten(packed, flatness, starts=nonempty)
+    breaks = np.flatnonzero(_flatten.subpath_starts(packed, nonempty))
+    owners = np.searchsorted(first, breaks, side='right') - 1
+    return coords, offsets, owners
+
+
+def _dense(ids):
+    """
+    Renumber sorted group ids to 0, 1, 2... as shapely's indices require.
+    """
+    return np.unique(ids, return_inverse=True)[1]
+
+
+def _nesting(rings, coords):
+    """
+    Even-odd nesting of the rings of one path: for every ring the index of
+    the ring it is a hole of, or -1 for shells.
+    """
+    import shapely
+
+    polygons = shapely.polygons(rings)
+    inside = shapely.contains_xy(polygons[:, None], coords[None, :, 0], coords[None, :, 1])
+    np.fill_diagonal(inside, False)
+    depth = inside.sum(axis=0)
+    area = shapely.area(polygons)
+    parent = np.full(len(rings), -1)
+    for j in np.flatnonzero(depth % 2):
+        # the smallest ring around a hole is the shell it belongs to
+        around = np.flatnonzero(inside[:, j] & (depth % 2 == 0))
+        if len(around):
+            parent[j] = around[np.argmin(area[around])]
+    return parent
+
+
+def to_shapely_array(paths, flatness=0.1):
+    """
+    Convert many paths to shapely geometries at once.
+
+    Every path is flattened and all coordinates go through the vectorized
+    shapely constructors in a handful of calls. A path whose subpaths are all
+    closed becomes a Polygon, with the subpaths nested inside others (even-odd)
+    as holes, or a MultiPolygon when it has several outer rings. Other paths
+    become a LineString, or a MultiLineString with several subpaths.
+
+    Args:
+        paths: An iterable of Path objects.
+        flatness (float): The maximum allowable deviation between the polylines and the paths.
+
+    Returns:
+        numpy.ndarray: an object array of shapely geometries, None for empty paths.
+    """
+    import shapely
+
+    paths = list(paths)
+    result = np.full(len(paths), None, dtype=object)
+    coords, offsets, owners = _flattened(paths, flatness)
+    if not len(owners):
+        return result
+
+    lo, hi = offsets[:-1], offsets[1:]
+    closed = (hi - lo >= 4) & np.all(coords[lo] == coords[hi - 1], axis=1)
+    polygonal = np.ones(len(paths), dtype=bool)
+    polygonal[owners[~closed]] = False
+    counts = np.bincount(owners, minlength=len(paths))
+    vertex_ids = np.repeat(np.arange(len(owners)), hi - lo)
+
+    # ---- linear paths
+    linear = ~polygonal[owners]
+    if linear.any():
+        sub = np.flatnonzero(linear)
+        pick = linear[vertex_ids]
+        lines = shapely.linestrings(coords[pick], indices=_dense(vertex_ids[pick]))
+        single = counts[owners[sub]] == 1
+        result[owners[sub[single]]] = lines[single]
+        if not single.all():
+            multi = owners[sub[~single]]
+            result[np.unique(multi)] = shapely.multilinestrings(lines[~single], indices=_dense(multi))
+
+    # ---- polygonal paths
+    ring_sub = np.flatnonzero(~linear)
+    if len(ring_sub):
+        pick = (~linear)[vertex_ids]
+        rings = shapely.linearrings(coords[pick], indices=_dense(vertex_ids[pick]))
+        ring_owner = owners[ring_sub]
+        parent = np.full(len(ring_sub), -1)
+        for path_id in np.flatnonzero(polygonal & (counts > 1)):
+            mine = np.flatnonzero(ring_owner == path_id)
+            nested = _nesting(rings[mine], coords[lo[ring_sub[mine]]])
+            parent[mine] = np.where(nested >= 0, mine[nested], -1)
+
+        # every ring goes to the polygon of its shell, the shell first
+        shell = np.where(parent < 0, np.arange(len(ring_sub)), parent)
+        order = np.lexsort((parent >= 0, shell))
+        polygons = shapely.polygons(rings[order], indices=_dense(shell[order]))
+        polygon_owner = ring_owner[np.unique(shell)]
+
+        per_path = np.bincount(polygon_owner, minlength=len(paths))
+        single = per_path[polygon_owner] == 1
+        result[polygon_owner[single]] = polygons[single]
+        if not single.all():
+            multi = polygon_owner[~single]
+            result[np.unique(multi)] = shapely.multipolygons(polygons[~single], indices=_dense(multi))
+
+    return result
@@ -0,0 +1,244 @@
+import numpy as np
+
+from .packed import PackedPath, LINE, ARC
+
+# subdivision stops once both control polygons fit in a box this small,
+# a few Newton iterations then polish the parameters
+_EPSILON = 1e-9
+_MAX_DEPTH = 64
+_MAX_CELLS = 1 << 12
+_NEWTON_STEPS = 4
+
+
+class SegmentTree:
+    """
+    A bounding volume hierarchy over the segments of a path: an STR-tree of
+    the exact segment bounding boxes, built once and reused across queries.
+
+    Args:
+        path: A Path or a PackedPath.
+        pad (float): grow every box by this much, so that segments that only
+                     touch still overlap. Default is 1e-9.
+    """
+    def __init__(self, path, pad=1e-9):
+        import shapely
+
+        self.packed = path if isinstance(path, PackedPath) else PackedPath.from_path(path)
+        boxes = self.packed.segment_bboxes()
+        boxes = boxes + np.array([-pad, pad, -pad, pad])
+        self.boxes = boxes
+        self.geometries = shapely.box(boxes[:, 0], boxes[:, 2], boxes[:, 1], boxes[:, 3])
+        self.tree = shapely.STRtree(self.geometries)
+
+        lengths = self.packed.segment_lengths()
+        total = lengths.sum()
+        fractions = lengths / total if total else lengths
+        self._starts = np.cumsum(fractions) - fractions
+        self._fractions = fractions
+
+    def __len__(self):
+        return len(self.packed)
+
+    def T(self, index, t):
+        """
+        The path parameter of the parameter t of the segment at `index`, as svgpathtools.Path.t2T.
+        """
+        return float(self._starts[index] + self._fractions[index] * t)
+
+    def pairs(self, other):
+        """
+        Segment pairs whose boxes overlap.
+
+        Returns:
+            numpy.ndarray: a (k, 2) int array of (segment of self, segment of other)
+            rows sorted by the first, then the second column.
+        """
+        if not len(self) or not len(other):
+            return np.empty((0, 2), dtype=np.intp)
+        # the trees are queried by envelope, which for boxes is the box itself
+        found = other.tree.query(self.geometries).T
+        return found[np.lexsort((found[:, 1], found[:, 0]))]
+
+
+def _halves(c):
+    """
+    Split (k, 4) cubic control points at t = 0.5 (de Casteljau).
+    """
+    p01 = (c[:, 0] + c[:, 1]) / 2
+    p12 = (c[:, 1] + c[:, 2]) / 2
+    p23 = (c[:, 2] + c[:, 3]) / 2
+    p012 = (p01 + p12) / 2
+    p123 = (p12 + p23) / 2
+    mid = (p012 + p123) / 2
+    return (np.stack((c[:, 0], p01, p012, mid), axis=1),
+            np.stack((mid, p123, p23, c[:, 3]), axis=1))
+
+
+def _bezier(c, t):
+    u = 1 - t
+    return u**3 * c[:, 0] + 3 * u**2 * t * c[:, 1] + 3 * u * t**2 * c[:, 2] + t**3 * c[:, 3]
+
+
+def _bezier_derivative(c, t):
+    u = 1 - t
+    return 3 * (u**2 * (c[:, 1] - c[:, 0]) + 2 * u * t * (c[:, 2] - c[:, 1]) + t**2 * (c[:, 3] - c[:, 2]))
+
+
+def bezier_intersections(P, Q):
+    """
+    Intersections of many pairs of cubic Beziers at once.
+
+    All pairs are subdivided in lockstep, dropping the halves whose control
+    point boxes do not overlap (a curve lies within the hull of its control
+    points, so no root finding is needed), and the surviving parameters are
+    polished with Newton iterations.
+
+    Args:
+        P, Q: (k, 4) complex arrays of control points of the pairs.
+
+    Returns:
+        tuple: int array of pair indices and float arrays t, s such that
+        P[pair] at t meets Q[pair] at s, sorted by pair and t.
+    """
+    pair = np.arange(len(P))
+    p, q = P, Q
+    t0 = np.zeros(len(P))
+    s0 = np.zeros(len(P))
+    width = 1.0
+    found = []
+    for _ in range(_MAX_DEPTH):
+        pr, pi, qr, qi = p.real, p.imag, q.real, q.imag
+        overlap = ((pr.min(1) <= qr.max(1) + _EPSILON) & (qr.min(1) <= pr.max(1) + _EPSILON)
+                   & (pi.min(1) <= qi.max(1) + _EPSILON) & (qi.min(1) <= pi.max(1) + _EPSILON))
+        small = (np.maximum(np.ptp(pr, 1), np.ptp(pi, 1)) < _EPSILON) & \
+                (np.maximum(np.ptp(qr, 1), np.ptp(qi, 1)) < _EPSILON)
+        done = overlap & small
+        found.append((pair[done], t0[done] + width / 2, s0[done] + width / 2))
+        rest = overlap & ~small
+        # coincident curves keep overlapping everywhere: stop subdividing them
+        crowded = rest & (np.bincount(pair[rest], minlength=len(P)) > _MAX_CELLS)[pair]
+        found.append((pair[crowded], t0[crowded] + width / 2, s0[crowded] + width / 2))
+        rest &= ~crowded
+        pair, p, q, t0, s0 = pair[rest], p[rest], q[rest], t0[rest], s0[rest]
+        if not len(pair):
+            break
+        width /= 2
+        pl, pr_ = _halves(p)
+        ql, qr_ = _halves(q)
+        pair = np.tile(pair, 4)
+        p = np.concatenate((pl, pl, pr_, pr_))
+        q = np.concatenate((ql, qr_, ql, qr_))
+        t0 = np.concatenate((t0, t0, t0 + width, t0 + width))
+        s0 = np.concatenate((s0, s0 + width, s0, s0 + width))
+
+    pair, t, s = (np.concatenate(column) for column in zip(*found))
+    P, Q = P[pair], Q[pair]
+    for _ in range(_NEWTON_STEPS):
+        # solve P'(t) dt - Q'(s) ds = Q(s) - P(t)
+        a, b, f = _bezier_derivative(P, t), -_bezier_derivative(Q, s), _bezier(Q, s) - _bezier(P, t)
+        det = a.real * b.imag - a.imag * b.real
+        ok = np.abs(det) > 1e-12 * np.abs(a) * np.abs(b)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            dt = (f.real * b.imag - f.imag * b.real) / det
+            ds = (a.real * f.imag - a.imag * f.real) / det
+        t = np.where(ok, np.clip(t + dt, 0, 1), t)
+        s = np.where(ok, np.clip(s + ds, 0, 1), s)
+
+    # drop near misses and the copies of an intersection found in neighbouring cells
+    scale = np.maximum(np.abs(P).max(1), np.abs(Q).max(1)) + 1
+    hit = np.abs(_bezier(P, t) - _bezier(Q, s)) <= _EPSILON * scale
+    pair, t, s = pair[hit], t[hit], s[hit]
+    order = np.lexsort((t, pair))
+    pair, t, s = pair[order], t[order], s[order]
+    fresh = np.ones(len(pair), dtype=bool)
+    fresh[1:] = (pair[1:] != pair[:-1]) | (np.abs(np.diff(t)) > 1e-7) | (np.abs(np.diff(s)) > 1e-7)
+    return pair[fresh], t[fresh], s[fresh]
+
+
+def _solved(tree1, tree2, pairs, path1, path2, tol):
+    """
+    Segment parameters of the intersections of the segment pairs, as
+    (i, j, t1, t2) tuples in pair order. Pairs of Bezier curves go through
+    bezier_intersections together, lines with lines and arcs through the
+    svgpathtools solvers.
+    """
+    kinds1 = tree1.packed.kinds[pairs[:, 0]]
+    kinds2 = tree2.packed.kinds[pairs[:, 1]]
+    bezier = (kinds1 != ARC) & (kinds2 != ARC) & ~((kinds1 == LINE) & (kinds2 == LINE))
+
+    rows = []
+    if bezier.any():
+        chosen = pairs[bezier]
+        k, t, s = bezier_intersections(tree1.packed.controls[chosen[:, 0]],
+                                       tree2.packed.controls[chosen[:, 1]])
+        rows += zip(chosen[k, 0].tolist(), chosen[k, 1].tolist(), t.tolist(), s.tolist())
+    for i, j in pairs[~bezier].tolist():
+        rows += ((i, j, t1, t2) for t1, t2 in path1[i].intersect(path2[j], tol=tol))
+    rows.sort(key=lambda row: row[:3])
+    return rows
+
+
+def _deduplicated(found, tol):
+    """
+    Drop intersections at the same point as the one before them in path
+    order, which happen where a segment ends and the next one starts.
+    """
+    if len(found) < 2:
+        return found
+    points = np.array([seg.point(t) for (_, seg, t), _ in found], dtype=complex)
+    order = np.lexsort(([T2 for _, (T2, _, _) in found], [T1 for (T1, _, _), _ in found]))
+    keep = np.ones(len(found), dtype=bool)
+    keep[order[1:]] = np.abs(np.diff(points[order])) >= tol
+    return [found[i] for i in np.flatnonzero(keep)]
+
+
+def intersect(path1, path2, tree1, tree2, justonemode=False, tol=1e-12):
+    """
+    Intersections of two paths, testing only segments whose boxes overlap.
+
+    Args:
+        path1, path2: Path objects.
+        tree1, tree2 (SegmentTree): their segment trees.
+        justonemode (bool): return only the first intersection found. Default is False.
+        tol (float): tolerance of the segment solver and of duplicate removal.
+
+    Returns:
+        list: intersections as ((T1, seg1, t1), (T2, seg2, t2)), see
+        svgpathtools.Path.intersect. A single one or an empty list with justonemode.
+    """
+    found = [((tree1.T(i, t1), path1[i], t1), (tree2.T(j, t2), path2[j], t2))
+             for i, j, t1, t2 in _solved(tree1, tree2, tree1.pairs(tree2), path1, path2, tol)]
+    if justonemode:
+        return found[0] if found else []
+    return _deduplicated(found, tol)
+
+
+def self_intersections(path, tree, tol=1e-12):
+    """
+    Points where a path crosses itself, as intersections between two of its segments.
+
+    The shared endpoint of consecutive segments, and of the last and first
+    segment of a closed path, is not an intersection. Loops within a single
+    segment are not reported.
+
+    Args:
+        path: A Path.
+        tree (SegmentTree): its segment tree.
+        tol (float): tolerance of the segment solver and of endpoint tests.
+
+    Returns:
+        list: intersections as ((T1, seg1, t1), (T2, seg2, t2)) with T1 < T2.
+    """
+    n = len(path)
+    closed = n > 1 and path[-1].end == path[0].start
+    pairs = tree.pairs(tree)
+    found = []
+    for i, j, t1, t2 in _solved(tree, tree, pairs[pairs[:, 0] < pairs[:, 1]], path, path, tol):
+        seg1, seg2 = path[i], path[j]
+        point = seg1.point(t1)
+        if j == i + 1 and seg1.end == seg2.start and abs(point - seg1.end) < tol:
+            continue
+        if closed and i == 0 and j == n - 1 and abs(point - seg1.start) < tol:
+            continue
+        found.append(((tree.T(i, t1), seg1, t1), (tree.T(j, t2), seg2, t2)))
+    return _deduplicated(found, tol)
@@ -0,0 +1,307 @@
+"""
+Arc-length parameterization of paths.
+
+An ArcLengthIndex splits every segment into the pieces that flattening at
+the given tolerance would use (see flatten.segment_pieces), and at the
+minima of the speed of curves, integrates the length of each piece once and
+keeps the cumulative lengths. A distance is
+then located with a binary search over the table and a couple of Newton
+steps inside its piece, so queries cost O(log n) however long the path is,
+and are vectorized over arrays of distances.
+"""
+import numpy as np
+import svgpathtools
+
+from . import TolerantPath
+from .packed import PackedPath, LINE, QUADRATIC, CUBIC
+from .flatten import segment_pieces, subpath_starts
+
+# Gauss-Legendre nodes and weights on [0, 1] for the length of a piece
+_GL_NODES, _GL_WEIGHTS = np.polynomial.legendre.leggauss(8)
+_GL_NODES = (_GL_NODES + 1) / 2
+_GL_WEIGHTS = _GL_WEIGHTS / 2
+
+# Newton steps refining the parameter of a distance inside its piece
+_NEWTON_STEPS = 2
+
+# samples per curve, and Newton steps, locating the minima of its speed
+_SPEED_SAMPLES = 16
+_MINIMUM_STEPS = 4
+
+
+class ArcLengthIndex:
+    """
+    Cumulative arc-length table of a path.
+
+    Args:
+        path: a Path, a sequence of segments or a PackedPath.
+        tolerance (float): flatness of the pieces the table is made of; the
+                           located parameters are refined well beyond it. Default is 0.1.
+
+    Attributes:
+        cumulative (numpy.ndarray): the distance at the start of every piece, and the total length.
+        segment (numpy.ndarray): the segment of every piece.
+        t0, t1 (numpy.ndarray): the parameter range of every piece on its segment.
+    """
+    def __init__(self, path, tolerance=0.1):
+        if tolerance <= 0:
+            raise ValueError("tolerance must be positive.")
+        if isinstance(path, PackedPath):
+            self.packed = path
+            self._segments = None
+        else:
+            self._segments = list(path)
+            self.packed = PackedPath.from_path(self._segments)
+        packed = self.packed
+
+        pieces = segment_pieces(packed, tolerance) if len(packed) else np.zeros(0, dtype=np.intp)
+        # the knots of every segment: the uniform pieces, and where the speed
+        # has a minimum, as the length integrand has a kink at a cusp
+        segment = np.repeat(np.arange(len(packed)), pieces + 1)
+        first = np.cumsum(pieces + 1) - (pieces + 1)
+        knots = (np.arange(len(segment)) - first[segment]) / pieces[segment]
+        slow, at = _speed_minima(packed)
+        segment = np.concatenate((segment, slow))
+        knots = np.concatenate((knots, at))
+        order = np.lexsort((knots, segment))
+        segment, knots = segment[order], knots[order]
+
+        piece = (segment[1:] == segment[:-1]) & (knots[1:] > knots[:-1])
+        self.segment = segment[:-1][piece]
+        self.t0 = knots[:-1][piece]
+        self.t1 = knots[1:][piece]
+
+        lengths = self._partial(self.segment, self.t0, self.t1)
+        self.cumulative = np.concatenate(([0.0], np.cumsum(lengths)))
+        self.lengths = lengths
+
+        # distance at the start of every continuous subpath, and the total
+        starts = np.flatnonzero(subpath_starts(packed)) if len(packed) else np.zeros(0, dtype=np.intp)
+        self.subpaths = np.append(self.cumulative[np.searchsorted(self.segment, starts)], self.length)
+
+    def __len__(self):
+        return len(self.segment)
+
+    def __repr__(self):
+        return "ArcLengthIndex(%d segments, %d pieces, length %g)" % (len(self.packed), len(self), self.length)
+
+    @property
+    def length(self):
+        return float(self.cumulative[-1])
+
+    @property
+    def segments(self):
+        if self._segments is None:
+            self._segments = self.packed.segments()
+        return self._segments
+
+    def _partial(self, segment, t0, t):
+        """
+        Lengths of the given segments between parameters t0 and t.
+        """
+        if len(segment) == 0:
+            return np.zeros(0)
+        span = t - t0
+        nodes = t0[:, None] + span[:, None] * _GL_NODES
+        lengths = np.abs(self.packed.take(segment).derivative(nodes)) @ _GL_WEIGHTS * span
+        line = self.packed.kinds[segment] == LINE
+        p = self.packed.points[segment[line]]
+        lengths[line] = np.abs(p[:, 3] - p[:, 0]) * span[line]
+        return lengths
+
+    def locate(self, distance, side="right"):
+        """
+        The segments and parameters at the given distances from the start.
+
+        Args:
+            distance: a distance or an array of distances, clipped to [0, length].
+            side (str): at a distance where a segment ends and the next
+                        begins, "right" gives the start of the next segment
+                        and "left" the end of the previous one. Default is "right".
+
+        Returns:
+            tuple: arrays of segment indices and parameters, shaped as `distance`.
+        """
+        if len(self) == 0:
+            raise ValueError("This path contains no segments!")
+        d = np.clip(np.asarray(distance, dtype=float), 0, self.length)
+        shape = d.shape
+        d = d.ravel()
+        i = np.clip(np.searchsorted(self.cumulative, d, side=side) - 1, 0, len(self) - 1)
+        segment, t0, t1 = self.segment[i], self.t0[i], self.t1[i]
+        target = d - self.cumulative[i]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t = t0 + np.where(self.lengths[i] > 0, target / self.lengths[i], 0) * (t1 - t0)
+            for _ in range(_NEWTON_STEPS):
+                speed = np.abs(self.packed.take(segment).derivative(t[:, None])[:, 0])
+                step = (self._partial(segment, t0, t) - target) / speed
+                t = np.clip(np.where(speed > 0, t - step, t), t0, t1)
+        return segment.reshape(shape), t.reshape(shape)
+
+    def _evaluate(self, distance, method):
+        segment, t = self.locate(distance)
+        flat_segment, flat_t = segment.ravel(), t.ravel()
+        values = getattr(self.packed.take(flat_segment), method)(flat_t[:, None])[:, 0]
+        values = values.reshape(t.shape)
+        return complex(values) if values.ndim == 0 else values
+
+    def point(self, distance):
+        """
+        The points at the given distances from the start of the path.
+
+        Returns:
+            complex or numpy.ndarray: points, shaped as `distance`.
+        """
+        return self._evaluate(distance, "point")
+
+    def tangent(self, distance):
+        """
+        The unit tangents at the given distances from the start of the path.
+
+        Returns:
+            complex or numpy.ndarray: unit tangents, shaped as `distance`.
+        """
+        return self._evaluate(distance, "unit_tangent")
+
+    def normal(self, distance):
+        """
+        The right hand unit normals at the given distances, as Path.normal.
+        """
+        return -1j * self.tangent(distance)
+
+    def distances(self, count=None, spacing=None):
+        """
+        Evenly spaced distances along the path, from its start to its end.
+
+        Args:
+            count (int): the number of distances.
+            spacing (float): the distance between them, the last one may be closer.
+
+        Returns:
+            numpy.ndarray: the distances.
+        """
+        if (count is None) == (spacing is None):
+            raise ValueError("Give either count or spacing.")
+        if count is not None:
+            return np.linspace(0, self.length, count)
+        if spacing <= 0:
+            raise ValueError("spacing must be positive.")
+        d = np.arange(0, self.length, spacing)
+        return d if len(d) and np.isclose(d[-1], self.length) else np.append(d, self.length)
+
+    def resample(self, count=None, spacing=None):
+        """
+        Points evenly spaced along the path, see distances().
+
+        Returns:
+            numpy.ndarray: complex points.
+        """
+        return self.point(self.distances(count, spacing))
+
+    def dashes(self, dasharray, offset=0.0):
+        """
+        The distance ranges of the dashes of a dash pattern, as SVG
+        stroke-dasharray and stroke-dashoffset: a pattern with an odd number
+        of values is repeated twice, and it restarts on every subpath.
+
+        Args:
+            dasharray: lengths of the dashes and of the gaps between them.
+            offset (float): distance into the pattern at the start of every subpath. Default is 0.
+
+        Returns:
+            numpy.ndarray: a (k, 2) array of (start, end) distances.
+        """
+        pattern = np.asarray(dasharray, dtype=float).ravel()
+        if len(pattern) == 0 or (pattern < 0).any():
+            raise ValueError("dasharray must be non-empty and non-negative.")
+        if len(pattern) % 2:
+            pattern = np.concatenate((pattern, pattern))
+        period = pattern.sum()
+        bounds = np.column_stack((self.subpaths[:-1], self.subpaths[1:]))
+        if period == 0:
+            return bounds
+
+        starts = np.concatenate(([0.0], np.cumsum(pattern)[:-1]))[0::2]
+        lengths = pattern[0::2]
+        phase = offset % period
+        ranges = []
+        for a, b in bounds:
+            periods = np.arange(int(np.ceil((b - a + phase) / period)) + 1)
+            s = (a - phase + periods[:, None] * period + starts).ravel()
+            e = s + np.tile(lengths, len(periods))
+            s, e = np.maximum(s, a), np.minimum(e, b)
+            keep = e > s
+            ranges.append(np.column_stack((s[keep], e[keep])))
+        return np.concatenate(ranges) if ranges else np.zeros((0, 2))
+
+    def cut(self, start, end):
+        """
+        The segments of the path between two distances.
+
+        Args:
+            start, end (float): distances from the start of the path, with start < end.
+
+        Returns:
+            list: segments, cropped where the range ends within them.
+        """
+        (a,), (ta,) = self.locate([start], "right")
+        (b,), (tb,) = self.locate([end], "left")
+        segments = self.segments
+        if a == b:
+            return [crop_segment(segments[a], ta, tb)]
+        return [crop_segment(segments[a], ta, 1.0)] + segments[a + 1:b] + [crop_segment(segments[b], 0.0, tb)]
+
+
+def _speed_minima(packed):
+    """
+    Parameters of the interior local minima of the speed of the Bezier
+    segments, as (segment indices, parameters).
+    """
+    curves = np.flatnonzero((packed.kinds == QUADRATIC) | (packed.kinds == CUBIC))
+    if len(curves) == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0)
+    curve = packed.take(curves)
+    t = (np.arange(_SPEED_SAMPLES) + 0.5) / _SPEED_SAMPLES
+    speed = np.abs(curve.derivative(t))
+    row, j = np.nonzero((speed[:, 1:-1] < speed[:, :-2]) & (speed[:, 1:-1] <= speed[:, 2:]))
+    if len(row) == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0)
+    curve = curve.take(row)
+    t = t[j + 1]
+    # Newton on the derivative of the squared speed, Re(B'' conj(B'))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for _ in range(_MINIMUM_STEPS):
+            d1, d2, d3 = (curve.derivative(t[:, None], n)[:, 0] for n in (1, 2, 3))
+            step = (d2 * d1.conjugate()).real / (np.abs(d2) ** 2 + (d3 * d1.conjugate()).real)
+            t = np.where(np.isfinite(step), t - step, t)
+    keep = (t > 0) & (t < 1)
+    return curves[row[keep]], t[keep]
+
+
+def _arc(arc):
+    # the constructor of an arc's class, plain svgpathtools arcs have no fast()
+    return getattr(type(arc), "fast", type(arc))
+
+
+def crop_segment(segment, t0, t1):
+    """
+    The part of a segment between parameters t0 and t1, of the same class,
+    with the ends at t = 0 and t = 1 kept exact.
+    """
+    if t0 <= 0 and t1 >= 1:
+        return segment
+    cropped = segment.cropped(t0, t1)
+    # svgpathtools crops into its own classes, which viiva only extends
+    if isinstance(segment, TolerantPath):
+        cropped.__class__ = type(segment)
+    # keep the ends shared with the neighbouring segments exact
+    if isinstance(segment, svgpathtools.Arc):
+        if t0 <= 0 or t1 >= 1:
+            cropped = _arc(cropped)(segment.start if t0 <= 0 else cropped.start, cropped.radius,
+                                         cropped.rotation, cropped.large_arc, cropped.sweep,
+                                         segment.end if t1 >= 1 else cropped.end)
+    elif t0 <= 0:
+        cropped.start = segment.start
+    elif t1 >= 1:
+        cropped.end = segment.end
+    return cropped
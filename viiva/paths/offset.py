@@ -0,0 +1,228 @@
+import numpy as np
+
+from .packed import PackedPath, LINE
+
+JOINS = ("miter", "round", "bevel")
+
+# curvature probes per segment used to choose the sample density
+_PROBES = np.linspace(0, 1, 17)
+
+# edges on either side of an inner join first searched for the crossing of the offsets
+_WINDOW = 16
+
+# edge pairs crossed without first pruning them by bounding boxes
+_PAIRS = 4096
+
+
+def sample_counts(packed, distance, tolerance, steps=1000):
+    """
+    Number of pieces each segment needs so that its offset curve stays
+    within `tolerance` of the polyline.
+
+    The chord error of a piece of length h is about k * h^2 / 8 for a curve
+    of curvature k; offsetting by d scales lengths by (1 + d * k) and divides
+    curvature by it, so the error of the offset piece is k * (1 + |d| * k) * h^2 / 8.
+
+    Args:
+        packed (PackedPath): the segments.
+        distance (float): offset distance.
+        tolerance (float): maximum allowed deviation.
+        steps (int): upper bound of pieces per segment. Default is 1000.
+
+    Returns:
+        numpy.ndarray: an int array with at least one piece per segment.
+    """
+    if tolerance <= 0:
+        raise ValueError("tolerance must be positive.")
+    d1 = packed.derivative(_PROBES)
+    d2 = packed.derivative(_PROBES, 2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        k = np.abs((np.conj(d1) * d2).imag) / np.abs(d1) ** 3
+    k = np.nan_to_num(k, nan=0.0, posinf=0.0).max(axis=1)
+    n = packed.segment_lengths() * np.sqrt(k * (1 + abs(distance) * k) / (8 * tolerance))
+    n[packed.kinds == LINE] = 1
+    return np.clip(np.ceil(n), 1, steps).astype(np.intp)
+
+
+def _join(joint, a, b, t0, t1, distance, join, miter_limit, tolerance):
+    """
+    Vertices to insert between the offset end `a` of a segment and the offset
+    start `b` of the next one, which meet at `joint` with unit tangents t0, t1,
+    on the outer side of the turn.
+    """
+    if join == "bevel":
+        return []
+    n0, n1 = -1j * t0, -1j * t1
+    if join == "miter":
+        miter = (n0 + n1) / (1 + (np.conj(n0) * n1).real)
+        return [joint + distance * miter] if abs(miter) <= miter_limit else []
+    # round: arc around the joint from a to b, the short way
+    radius = abs(distance)
+    start, sweep = np.angle(a - joint), np.angle((b - joint) / (a - joint))
+    step = 2 * np.arccos(1 - tolerance / radius) if tolerance < radius else np.pi / 2
+    count = int(np.ceil(abs(sweep) / step))
+    return list(joint + radius * np.exp(1j * (start + sweep * np.arange(1, count) / count)))
+
+
+def _crossing(a, b):
+    """
+    Where the polyline `a` meets the polyline `b` closest to the end of a and
+    the start of b, as (edge of a, edge of b, point), or None if they do not.
+    The edges near the joint are tried first, in windows growing fourfold.
+    """
+    if len(a) < 2 or len(b) < 2:
+        return None
+    # mostly the last edge of a crosses the first edge of b
+    p, r = complex(a[-2]), complex(a[-1] - a[-2])
+    q, s = complex(b[0]), complex(b[1] - b[0])
+    denom = (r.conjugate() * s).imag
+    if denom != 0:
+        t = ((q - p).conjugate() * s).imag / denom
+        u = ((q - p).conjugate() * r).imag / denom
+        if 0 <= t <= 1 and 0 <= u <= 1:
+            return len(a) - 2, 0, p + t * r
+    window = _WINDOW
+    while True:
+        skip = max(len(a) - 1 - window, 0)
+        crossing = _window_crossing(a[skip:], b[:window + 1])
+        if crossing is not None:
+            return crossing[0] + skip, crossing[1], crossing[2]
+        if skip == 0 and window + 1 >= len(b):
+            return None
+        window *= 4
+
+
+def _window_crossing(a, b):
+    ea, eb = np.arange(len(a) - 1), np.arange(len(b) - 1)
+    if len(a) * len(b) > _PAIRS:
+        # only the edges within the bounding box of the other polyline can meet it
+        ea = np.flatnonzero(_overlapping(a[:-1], a[1:], b))
+        eb = np.flatnonzero(_overlapping(b[:-1], b[1:], a))
+    if not len(ea) or not len(eb):
+        return None
+    p, r = a[ea][:, None], (a[ea + 1] - a[ea])[:, None]
+    q, s = b[eb][None, :], (b[eb + 1] - b[eb])[None, :]
+    denom = (np.conj(r) * s).imag
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = (np.conj(q - p) * s).imag / denom
+        u = (np.conj(q - p) * r).imag / denom
+    hit = (denom != 0) & (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)
+    if not hit.any():
+        return None
+    i, j = np.nonzero(hit)
+    # the least of both polylines cut away
+    best = np.argmin((len(a) - 1 - ea[i] - t[i, j]) + eb[j] + u[i, j])
+    i, j = i[best], j[best]
+    return int(ea[i]), int(eb[j]), complex(p[i, 0] + t[i, j] * r[i, 0])
+
+
+def _overlapping(start, end, other):
+    # edges from start to end whose bounding boxes touch the one of `other`
+    return ((np.maximum(start.real, end.real) >= other.real.min()) &
+            (np.minimum(start.real, end.real) <= other.real.max()) &
+            (np.maximum(start.imag, end.imag) >= other.imag.min()) &
+            (np.minimum(start.imag, end.imag) <= other.imag.max()))
+
+
+def offset(path, distance, tolerance=None, steps=1000, join="miter", miter_limit=4.0):
+    """
+    Offset a path by `distance` along its normals (see Path.offset).
+
+    Without a tolerance every segment is sampled at `steps` uniform parameters
+    and the samples are connected in one polyline, as Path.offset always did.
+    With a tolerance the sample density of each segment follows its length
+    and curvature, every continuous subpath gives its own polyline and the
+    gaps opened on the outer side of kinks are closed with `join`.
+
+    Points and normals are evaluated for all samples at once on a PackedPath.
+
+    Args:
+        path: A Path or a PackedPath.
+        distance (float): offset distance, positive to the right hand side.
+        tolerance (float): maximum deviation from the true offset curve, or None.
+        steps (int): samples per segment, an upper bound with a tolerance. Default is 1000.
+        join (str): "miter", "round" or "bevel". Default is "miter".
+        miter_limit (float): longest miter, relative to the distance, before
+                             falling back to a bevel. Default is 4.
+
+    Returns:
+        tuple: an (N, 2) float array of vertices and the offsets of its
+        polylines, as viiva.paths.flatten.flatten.
+    """
+    if join not in JOINS:
+        raise ValueError("join must be one of %s." % ", ".join(JOINS))
+    packed = path if isinstance(path, PackedPath) else PackedPath.from_path(path)
+    # zero-length segments have no normal and contribute nothing
+    p = packed.points
+    packed = packed.take(~((p[:, 0] == p[:, 3]) & (packed.kinds == LINE)))
+    p = packed.points
+    if len(packed) == 0:
+        return np.empty((0, 2)), np.zeros(1, dtype=np.intp)
+
+    legacy = tolerance is None
+    counts = np.full(len(packed), steps) if legacy else sample_counts(packed, distance, tolerance, steps)
+    # the legacy sampling stops short of t = 1
+    samples = counts if legacy else counts + 1
+    first = np.cumsum(samples) - samples
+    seg = np.repeat(np.arange(len(packed)), samples)
+    t = (np.arange(len(seg)) - first[seg]) / counts[seg]
+    rows = packed.take(seg)
+    q = rows.point(t[:, None])[:, 0] + distance * rows.normal(t[:, None])[:, 0]
+
+    if legacy:
+        if p[-1, 3] == p[0, 0]:
+            q = np.append(q, q[:1])
+        return np.column_stack((q.real, q.imag)), np.array([0, len(q)])
+
+    t0 = packed.unit_tangent(0.0)
+    t1 = packed.unit_tangent(1.0)
+    kinks = packed.kinks()
+
+    def kink(i, j, runs, k, l):
+        # join the offset end of segment i, the last vertex of runs[k], to the
+        # offset start of segment j, the first vertex of runs[l]
+        if (np.conj(t1[i]) * t0[j]).imag * distance > 0:
+            runs[k] = np.append(runs[k], _join(p[j, 0], runs[k][-1], runs[l][0], t1[i], t0[j],
+                                               distance, join, miter_limit, tolerance))
+            return
+        # the inner side of the turn: both offsets stop where they cross
+        crossing = _crossing(runs[k], runs[l])
+        if crossing is not None:
+            ka, kb, point = crossing
+            # both keep the crossing, so that later kinks still find their edges
+            runs[k] = np.append(runs[k][:ka + 1], point)
+            runs[l] = np.append(point, runs[l][kb + 1:])
+
+    # continuous subpaths are runs of segments lo..hi
+    breaks = np.flatnonzero(p[1:, 0] != p[:-1, 3]) + 1
+    lines = []
+    for lo, hi in zip(np.append(0, breaks), np.append(breaks, len(packed)) - 1):
+        # the offset of the subpath, cut at its kinks
+        runs, ends = [q[first[lo]:first[lo] + samples[lo]]], [(lo, lo)]
+        for i in range(lo + 1, hi + 1):
+            chunk = q[first[i]:first[i] + samples[i]]
+            if kinks[i]:
+                runs.append(chunk)
+                ends.append((i, i))
+            else:
+                runs[-1] = np.concatenate((runs[-1], chunk[1:]))
+                ends[-1] = (ends[-1][0], i)
+        closed = p[hi, 3] == p[lo, 0]
+        if closed and len(runs) > 1 and abs((np.conj(t1[hi]) * t0[lo]).real - 1) <= 1e-8:
+            # smooth where the subpath closes: the last run goes on into the first
+            runs[0] = np.concatenate((runs.pop()[:-1], runs[0]))
+            ends[0] = (ends.pop()[0], ends[0][1])
+        for k in range(len(runs) - 1):
+            kink(ends[k][1], ends[k + 1][0], runs, k, k + 1)
+        if closed:
+            if len(runs) > 1 or abs((np.conj(t1[hi]) * t0[lo]).real - 1) > 1e-8:
+                kink(ends[-1][1], ends[0][0], runs, len(runs) - 1, 0)
+            else:
+                runs[-1] = runs[-1][:-1]
+            runs.append(runs[0][:1])
+        line = np.concatenate([np.asarray(run, dtype=complex) for run in runs])
+        lines.append(line[np.append(True, line[1:] != line[:-1])])
+
+    coords = np.concatenate(lines)
+    offsets = np.cumsum([0] + [len(line) for line in lines])
+    return np.column_stack((coords.real, coords.imag)), offsets
@@ -0,0 +1,429 @@
+import numpy as np
+import svgpathtools
+
+from . import Line, QuadraticBezier, CubicBezier, Arc
+
+# ------------------------------------------------------------------------
+# segment kinds and layout of the packed arrays
+# ------------------------------------------------------------------------
+
+LINE, QUADRATIC, CUBIC, ARC = 0, 1, 2, 3
+
+# columns of PackedPath.arcs (zero on rows that are not arcs)
+RX, RY, ROTATION, LARGE_ARC, SWEEP, CX, CY, THETA, DELTA = range(9)
+ARC_FIELDS = 9
+
+# Gauss-Legendre nodes and weights on [0, 1] used by the length quadrature
+_GL_NODES, _GL_WEIGHTS = np.polynomial.legendre.leggauss(16)
+_GL_NODES = (_GL_NODES + 1) / 2
+_GL_WEIGHTS = _GL_WEIGHTS / 2
+
+# number of segments evaluated at once by the length quadrature
+_CHUNK = 16384
+
+# parameters are pulled this far inside a segment where its tangent vanishes
+_NUDGE = 1e-6
+
+
+def _unit(z):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return z / np.abs(z)
+
+
+class PackedPath:
+    """
+    Struct-of-arrays representation of a Path.
+
+    Every segment is a row: `kinds` holds the segment type (LINE, QUADRATIC,
+    CUBIC or ARC), `points` is an (n, 4) complex array whose first and last
+    columns are always start and end, and `arcs` is an (n, ARC_FIELDS) float
+    array with the arc parameters (radii, rotation, flags, center, theta and
+    delta in degrees, as in svgpathtools).
+
+    Quadratic beziers keep their control point in both middle columns, lines
+    keep start and end there, arcs leave them at zero.
+    """
+
+    def __init__(self, kinds, points, arcs=None):
+        self.kinds = np.asarray(kinds, dtype=np.uint8)
+        self.points = np.asarray(points, dtype=complex).reshape(-1, 4)
+        if arcs is None:
+            arcs = np.zeros((len(self.kinds), ARC_FIELDS))
+        self.arcs = np.asarray(arcs, dtype=float).reshape(-1, ARC_FIELDS)
+        self._controls = None
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __repr__(self):
+        return "PackedPath(%d segments)" % len(self)
+
+    @classmethod
+    def from_path(classe, path):
+        """
+        Pack a Path (or any iterable of segments) into arrays.
+
+        Args:
+            path: A Path or an iterable of Line, QuadraticBezier, CubicBezier and Arc segments.
+
+        Returns:
+            PackedPath: the packed representation of the segments.
+        """
+        segments = list(path)
+        n = len(segments)
+        kinds = np.empty(n, dtype=np.uint8)
+        points = np.zeros((n, 4), dtype=complex)
+        arcs = np.zeros((n, ARC_FIELDS))
+        for i, s in enumerate(segments):
+            if isinstance(s, svgpathtools.CubicBezier):
+                kinds[i] = CUBIC
+                points[i] = (s.start, s.control1, s.control2, s.end)
+            elif isinstance(s, svgpathtools.Line):
+                kinds[i] = LINE
+                points[i] = (s.start, s.start, s.end, s.end)
+            elif isinstance(s, svgpathtools.QuadraticBezier):
+                kinds[i] = QUADRATIC
+                points[i] = (s.start, s.control, s.control, s.end)
+            elif isinstance(s, svgpathtools.Arc):
+                kinds[i] = ARC
+                points[i, 0] = s.start
+                points[i, 3] = s.end
+                arcs[i] = (s.radius.real, s.radius.imag, s.rotation,
+                           s.large_arc, s.sweep, s.center.real, s.center.imag,
+                           s.theta, s.delta)
+            else:
+                raise TypeError("Cannot pack segment of type %s" % type(s).__name__)
+        return classe(kinds, points, arcs)
+
+    @classmethod
+    def from_paths(classe, paths):
+        """
+        Pack many paths into one PackedPath.
+
+        Args:
+            paths: An iterable of Path objects.
+
+        Returns:
+            tuple: the PackedPath and an int array of offsets such that the
+            segments of the i-th path are rows `first[i]:first[i + 1]`.
+        """
+        paths = [list(path) for path in paths]
+        first = np.cumsum([0] + [len(path) for path in paths])
+        return classe.from_path(s for path in paths for s in path), first
+
+    def take(self, index):
+        """
+        Select segments by index or boolean mask.
+
+        Returns:
+            PackedPath: a new PackedPath with the selected rows.
+        """
+        packed = PackedPath(self.kinds[index], self.points[index], self.arcs[index])
+        if self._controls is not None:
+            packed._controls = self._controls[index]
+        return packed
+
+    def segments(self):
+        """
+        Rebuild the viiva segment objects.
+
+        Returns:
+            list: Line, QuadraticBezier, CubicBezier and Arc objects, one per row.
+        """
+        segments = []
+        for kind, p, a in zip(self.kinds.tolist(), self.points.tolist(), self.arcs.tolist()):
+            if kind == CUBIC:
+                segments.append(CubicBezier.fast(*p))
+            elif kind == LINE:
+                segments.append(Line.fast(p[0], p[3]))
+            elif kind == QUADRATIC:
+                segments.append(QuadraticBezier.fast(p[0], p[1], p[3]))
+            else:
+                segments.append(Arc.fast(p[0], complex(a[RX], a[RY]), a[ROTATION],
+                                         bool(a[LARGE_ARC]), bool(a[SWEEP]), p[3]))
+        return segments
+
+    def to_path(self):
+        """
+        Convert back to a Path.
+
+        Returns:
+            Path: a new Path made of viiva segments.
+        """
+        from .path import Path
+        return Path(*self.segments())
+
+    # --------------------------------------------------------------------
+    # evaluation
+    # --------------------------------------------------------------------
+
+    @property
+    def controls(self):
+        """
+        Cubic control points of every non-arc segment, shape (n, 4).
+
+        Lines and quadratic beziers are degree-elevated, which leaves their
+        shape and parameterization unchanged, so that all of them can be
+        evaluated with the cubic formulas. Rows of arcs are meaningless.
+        """
+        if self._controls is None:
+            p = self.points
+            c = p.copy()
+            line = self.kinds == LINE
+            c[line, 1] = p[line, 0] + (p[line, 3] - p[line, 0]) / 3
+            c[line, 2] = p[line, 0] + 2 * (p[line, 3] - p[line, 0]) / 3
+            quad = self.kinds == QUADRATIC
+            c[quad, 1] = p[quad, 0] + 2 / 3 * (p[quad, 1] - p[quad, 0])
+            c[quad, 2] = p[quad, 3] + 2 / 3 * (p[quad, 1] - p[quad, 3])
+            self._controls = c
+        return self._controls
+
+    def _arc_terms(self, t, rows):
+        a = self.arcs[rows]
+        angle = np.radians(a[:, THETA, None] + t * a[:, DELTA, None])
+        phi = np.radians(a[:, ROTATION, None])
+        return a, angle, np.cos(phi), np.sin(phi)
+
+    @staticmethod
+    def _broadcast(t, n):
+        t = np.asarray(t, dtype=float)
+        if t.ndim == 0:
+            return np.broadcast_to(t, (n, 1)), lambda r: r[:, 0]
+        if t.ndim == 1:
+            return t[None, :], lambda r: r
+        return t, lambda r: r
+
+    def point(self, t):
+        """
+        Evaluate all segments at parameter(s) t.
+
+        Args:
+            t: A scalar, a 1-D array evaluated on every segment, or an (n, m)
+               array with one row of parameters per segment.
+
+        Returns:
+            numpy.ndarray: complex points of shape (n,) for a scalar t, (n, m) otherwise.
+        """
+        t, shape = self._broadcast(t, len(self))
+        c = self.controls
+        s = 1 - t
+        out = (c[:, 0, None] * s**3 + 3 * c[:, 1, None] * s**2 * t
+               + 3 * c[:, 2, None] * s * t**2 + c[:, 3, None] * t**3)
+        arc = np.flatnonzero(self.kinds == ARC)
+        if len(arc):
+            ta = t[arc] if t.shape[0] == len(self) else t
+            a, angle, cosphi, sinphi = self._arc_terms(ta, arc)
+            rx, ry = a[:, RX, None], a[:, RY, None]
+            x = rx * cosphi * np.cos(angle) - ry * sinphi * np.sin(angle) + a[:, CX, None]
+            y = rx * sinphi * np.cos(angle) + ry * cosphi * np.sin(angle) + a[:, CY, None]
+            out[arc] = x + 1j * y
+        return shape(out)
+
+    def derivative(self, t, n=1):
+        """
+        Evaluate the nth derivative of all segments at parameter(s) t.
+
+        Args:
+            t: parameters, broadcast as in `point`.
+            n (int): order of the derivative, a positive integer.
+
+        Returns:
+            numpy.ndarray: complex derivatives, shaped as in `point`.
+        """
+        if n < 1:
+            raise ValueError("n should be a positive integer.")
+        t, shape = self._broadcast(t, len(self))
+        c = self.controls
+        s = 1 - t
+        if n == 1:
+            out = 3 * ((c[:, 1, None] - c[:, 0, None]) * s**2
+                       + 2 * (c[:, 2, None] - c[:, 1, None]) * s * t
+                       + (c[:, 3, None] - c[:, 2, None]) * t**2)
+        elif n == 2:
+            out = 6 * ((c[:, 2, None] - 2 * c[:, 1, None] + c[:, 0, None]) * s
+                       + (c[:, 3, None] - 2 * c[:, 2, None] + c[:, 1, None]) * t)
+        elif n == 3:
+            out = np.broadcast_to(6 * (c[:, 3, None] - 3 * c[:, 2, None] + 3 * c[:, 1, None] - c[:, 0, None]),
+                                  np.broadcast_shapes((len(self), 1), t.shape)).copy()
+        else:
+            out = np.zeros(np.broadcast_shapes((len(self), 1), t.shape), dtype=complex)
+        arc = np.flatnonzero(self.kinds == ARC)
+        if len(arc):
+            ta = t[arc] if t.shape[0] == len(self) else t
+            a, angle, cosphi, sinphi = self._arc_terms(ta, arc)
+            rx, ry = a[:, RX, None], a[:, RY, None]
+            k = np.radians(a[:, DELTA, None]) ** n
+            # the nth derivative of (cos, sin) is a rotation by n quarter turns
+            ca, sa = np.cos(angle + n * np.pi / 2), np.sin(angle + n * np.pi / 2)
+            x = rx * cosphi * ca - ry * sinphi * sa
+            y = rx * sinphi * ca + ry * cosphi * sa
+            out = out.astype(complex)
+            out[arc] = k * (x + 1j * y)
+        return shape(out)
+
+    def unit_tangent(self, t):
+        """
+        Unit tangent of all segments at parameter(s) t, shaped as in `point`.
+
+        Where the derivative vanishes (coincident control points) the one-sided
+        limit is used, as svgpathtools does; zero-length segments give nan.
+        """
+        t, shape = self._broadcast(t, len(self))
+        u = _unit(self.derivative(t))
+        bad = ~np.isfinite(u)
+        if bad.any():
+            rows = np.nonzero(bad)[0]
+            nudged = np.clip(np.broadcast_to(t, u.shape)[bad], _NUDGE, 1 - _NUDGE)
+            u[bad] = _unit(self.take(rows).derivative(nudged[:, None])[:, 0])
+        return shape(u)
+
+    def normal(self, t):
+        """
+        Right hand rule unit normal of all segments at parameter(s) t,
+        shaped as in `point` (same convention as svgpathtools).
+        """
+        return -1j * self.unit_tangent(t)
+
+    def kinks(self, tol=1e-8):
+        """
+        Non-differentiable joints.
+
+        Returns:
+            numpy.ndarray: a boolean array, true at i when segment i does not
+            continue the tangent of segment i - 1 (segment 0 is compared with
+            the last one).
+        """
+        u = self.unit_tangent(1.0)
+        v = self.unit_tangent(0.0)
+        dot = (np.conj(np.roll(u, 1)) * v).real
+        return ~np.isfinite(dot) | (np.abs(dot - 1) > tol)
+
+    # --------------------------------------------------------------------
+    # bounding boxes
+    # --------------------------------------------------------------------
+
+    def segment_bboxes(self):
+        """
+        Bounding boxes of all segments.
+
+        Returns:
+            numpy.ndarray: an (n, 4) array of (xmin, xmax, ymin, ymax) rows.
+        """
+        n = len(self)
+        c = self.controls
+        # extrema of the cubic lie at the ends or at the roots of its derivative,
+        # a quadratic a*t^2 + b*t + k in each coordinate
+        ts = [np.zeros(n), np.ones(n)]
+        for part in (np.real, np.imag):
+            p0, p1, p2, p3 = (part(c[:, i]) for i in range(4))
+            a = -p0 + 3 * p1 - 3 * p2 + p3
+            b = 2 * (p0 - 2 * p1 + p2)
+            k = p1 - p0
+            with np.errstate(invalid='ignore', divide='ignore'):
+                disc = np.sqrt(np.maximum(b * b - 4 * a * k, 0))
+                quadratic = np.abs(a) > 1e-12
+                r1 = np.where(quadratic, (-b + disc) / (2 * a), -k / b)
+                r2 = np.where(quadratic, (-b - disc) / (2 * a), -k / b)
+            ts += [r1, r2]
+        ts = np.stack(ts, axis=1)
+        ts = np.where((ts >= 0) & (ts <= 1), ts, 0)
+        boxes = self._boxes(self.point(ts))
+
+        arc = np.flatnonzero(self.kinds == ARC)
+        if len(arc):
+            a = self.arcs[arc]
+            phi = np.radians(a[:, ROTATION])
+            rx, ry = a[:, RX], a[:, RY]
+            # angles where x or y of the ellipse are extremal, modulo pi
+            ax = np.arctan2(-ry * np.sin(phi), rx * np.cos(phi))
+            ay = np.arctan2(ry * np.cos(phi), rx * np.sin(phi))
+            k = np.arange(-4, 5) * np.pi
+            cand = np.concatenate([ax[:, None] + k, ay[:, None] + k], axis=1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                ta = (np.degrees(cand) - a[:, THETA, None]) / a[:, DELTA, None]
+            ta = np.where((ta >= 0) & (ta <= 1), ta, 0)
+            ta = np.concatenate([ta, np.ones((len(arc), 1))], axis=1)
+            boxes[arc] = self._boxes(self.take(arc).point(ta))
+        return boxes
+
+    @staticmethod
+    def _boxes(pts):
+        return np.stack([pts.real.min(axis=1), pts.real.max(axis=1),
+                         pts.imag.min(axis=1), pts.imag.max(axis=1)], axis=1)
+
+    def bbox(self):
+        """
+        Bounding box of the whole path in the form (xmin, xmax, ymin, ymax).
+        """
+        if len(self) == 0:
+            raise ValueError("This path contains no segments!")
+        b = self.segment_bboxes()
+        return b[:, 0].min(), b[:, 1].max(), b[:, 2].min(), b[:, 3].max()
+
+    # --------------------------------------------------------------------
+    # lengths
+    # --------------------------------------------------------------------
+
+    def segment_lengths(self, pieces=4):
+        """
+        Arc lengths of all segments.
+
+        Lines, quadratic beziers and circular arcs are exact, cubic beziers
+        and elliptical arcs are integrated with a composite 16-point
+        Gauss-Legendre rule.
+
+        Args:
+            pieces (int): number of sub-intervals of the quadrature. Default is 4.
+
+        Returns:
+            numpy.ndarray: the length of every segment.
+        """
+        n = len(self)
+        lengths = np.empty(n)
+        t = ((np.arange(pieces)[:, None] + _GL_NODES[None, :]) / pieces).ravel()
+        w = np.tile(_GL_WEIGHTS, pieces) / pieces
+        for lo in range(0, n, _CHUNK):
+            chunk = self.take(slice(lo, lo + _CHUNK))
+            lengths[lo:lo + _CHUNK] = np.abs(chunk.derivative(t)) @ w
+
+        line = self.kinds == LINE
+        lengths[line] = np.abs(self.points[line, 3] - self.points[line, 0])
+        quad = np.flatnonzero(self.kinds == QUADRATIC)
+        if len(quad):
+            exact, value = _quadratic_lengths(self.points[quad])
+            lengths[quad[exact]] = value[exact]
+        circle = (self.kinds == ARC) & (self.arcs[:, RX] == self.arcs[:, RY])
+        lengths[circle] = self.arcs[circle, RX] * np.abs(np.radians(self.arcs[circle, DELTA]))
+        return lengths
+
+    def length(self, pieces=4):
+        """
+        Total arc length of the path.
+        """
+        return float(self.segment_lengths(pieces).sum())
+
+
+def _quadratic_lengths(points):
+    """
+    Closed form arc length of quadratic beziers given as rows of `points`.
+
+    Returns a mask of the rows where the formula is well conditioned (not
+    nearly straight) and the lengths.
+    """
+    p0, p1, p2 = points[:, 0], points[:, 1], points[:, 3]
+    a = p0 - 2 * p1 + p2
+    b = 2 * (p1 - p0)
+    A = 4 * (a.real**2 + a.imag**2)
+    B = 4 * (a.real * b.real + a.imag * b.imag)
+    C = b.real**2 + b.imag**2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sabc = 2 * np.sqrt(A + B + C)
+        a2 = np.sqrt(A)
+        a32 = 2 * A * a2
+        c2 = 2 * np.sqrt(C)
+        ba = B / a2
+        value = (a32 * sabc + a2 * B * (sabc - c2)
+                 + (4 * C * A - B * B) * np.log((2 * a2 + ba + sabc) / (ba + c2))) / (4 * a32)
+    exact = np.isfinite(value) & (A > 1e-12 * np.maximum(C, 1))
+    return exact, value
+
@@ -0,0 +1,176 @@
+import re
+
+from . import Line, QuadraticBezier, CubicBezier, Arc
+
+# a command letter or a number; a number ends where the next one can't continue it,
+# so "1.5.5" reads as 1.5 and .5, and "1-2" as 1 and -2
+TOKEN_RE = re.compile(r"[MmZzLlHhVvCcSsQqTtAa]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+COMMANDS = frozenset("MmZzLlHhVvCcSsQqTtAa")
+
+
+# the parser only produces complex numbers, so segments skip point conversion
+_line = Line.fast
+_quadratic = QuadraticBezier.fast
+_cubic = CubicBezier.fast
+_arc = Arc.fast
+
+
+def tokenize(d):
+    """
+    Split SVG path data into command letters and number strings.
+    """
+    return TOKEN_RE.findall(d)
+
+
+def parse_segments(d, current_pos=0j):
+    """
+    Parse SVG path data into viiva segments.
+
+    Handles absolute and relative commands, implicit repetitions, the S/T
+    shorthands and arc flags written without separators ("a1 1 0 011 1").
+    Arcs with a zero radius become lines and arcs ending where they start are
+    dropped, as the SVG specification requires.
+
+    Args:
+        d (str): The SVG path data string to be parsed.
+        current_pos (complex): position a leading relative moveto is relative to. Default is 0j.
+
+    Returns:
+        tuple: the list of segments and whether the path data was closed with Z.
+
+    Raises:
+        ValueError: on numbers without a command or truncated commands.
+    """
+    tokens = TOKEN_RE.findall(d)
+    n = len(tokens)
+    segments = []
+    append = segments.append
+    i = 0
+    command = None
+    previous = None
+    start_pos = current_pos
+    closed = False
+
+    try:
+        while i < n:
+            token = tokens[i]
+            if token in COMMANDS:
+                command = token
+                i += 1
+            elif command is None:
+                raise ValueError("Unallowed implicit command in %r at token %d" % (d, i))
+
+            upper = command.upper()
+            relative = command != upper
+            base = current_pos if relative else 0j
+
+            if upper == "Z":
+                if current_pos != start_pos:
+                    append(_line(current_pos, start_pos))
+                closed = True
+                current_pos = start_pos
+                command = None
+                previous = "Z"
+                continue
+
+            if upper == "M":
+                current_pos = start_pos = base + complex(float(tokens[i]), float(tokens[i + 1]))
+                i += 2
+                # implicit repetitions of a moveto are linetos
+                command = "l" if relative else "L"
+            elif upper == "L":
+                end = base + complex(float(tokens[i]), float(tokens[i + 1]))
+                i += 2
+                append(_line(current_pos, end))
+                current_pos = end
+            elif upper == "H":
+                end = complex(float(tokens[i]) + base.real, current_pos.imag)
+                i += 1
+                append(_line(current_pos, end))
+                current_pos = end
+            elif upper == "V":
+                end = complex(current_pos.real, float(tokens[i]) + base.imag)
+                i += 1
+                append(_line(current_pos, end))
+                current_pos = end
+            elif upper == "C":
+                c1 = base + complex(float(tokens[i]), float(tokens[i + 1]))
+                c2 = base + complex(float(tokens[i + 2]), float(tokens[i + 3]))
+                end = base + complex(float(tokens[i + 4]), float(tokens[i + 5]))
+                i += 6
+                append(_cubic(current_pos, c1, c2, end))
+                current_pos = end
+            elif upper == "S":
+                if previous in ("C", "S"):
+                    c1 = 2 * current_pos - segments[-1].control2
+                else:
+                    c1 = current_pos
+                c2 = base + complex(float(tokens[i]), float(tokens[i + 1]))
+                end = base + complex(float(tokens[i + 2]), float(tokens[i + 3]))
+                i += 4
+                append(_cubic(current_pos, c1, c2, end))
+                current_pos = end
+            elif upper == "Q":
+                c = base + complex(float(tokens[i]), float(tokens[i + 1]))
+                end = base + complex(float(tokens[i + 2]), float(tokens[i + 3]))
+                i += 4
+                append(_quadratic(current_pos, c, end))
+                current_pos = end
+            elif upper == "T":
+                if previous in ("Q", "T"):
+                    c = 2 * current_pos - segments[-1].control
+                else:
+                    c = current_pos
+                end = base + complex(float(tokens[i]), float(tokens[i + 1]))
+                i += 2
+                append(_quadratic(current_pos, c, end))
+                current_pos = end
+            else:
+                radius = complex(float(tokens[i]), float(tokens[i + 1]))
+                rotation = float(tokens[i + 2])
+                i += 3
+                flags = []
+                while len(flags) < 2:
+                    token = tokens[i]
+                    if token[0] not in "01":
+                        raise ValueError("Invalid arc flag %r in %r" % (token, d))
+                    flags.append(token[0] == "1")
+                    if len(token) > 1:
+                        tokens[i] = token[1:]
+                    else:
+                        i += 1
+                end = base + complex(float(tokens[i]), float(tokens[i + 1]))
+                i += 2
+                if end != current_pos:
+                    if radius.real == 0 or radius.imag == 0:
+                        append(_line(current_pos, end))
+                    else:
+                        append(_arc(current_pos, radius, rotation, flags[0], flags[1], end))
+                current_pos = end
+            previous = upper
+    except IndexError:
+        raise ValueError("Invalid path string: command %r is truncated in %r" % (command, d))
+
+    return segments, closed
+
+
+def parse_many(ds):
+    """
+    Parse a sequence of SVG path data strings.
+
+    Args:
+        ds: An iterable of path data strings.
+
+    Returns:
+        list: one Path per string.
+    """
+    from .path import Path
+
+    paths = []
+    for d in ds:
+        segments, closed = parse_segments(d)
+        path = Path(*segments)
+        path._closed = closed
+        paths.append(path)
+    return paths
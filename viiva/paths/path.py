@@ -1,12 +1,23 @@
 import sys
 import re
 import xml.etree.ElementTree as ET
+from functools import wraps
+
+import numpy as np
 
 from ..paths import *
-from .. import beziers
+from .packed import PackedPath
+from . import flatten as _flatten
+from . import parser as _parser
+from . import offset as _offset
+from . import geometry as _geometry
+from . import intersect as _intersect
+from . import writer as _writer
+from . import measure as _measure
+from . import simplify as _simplify
+from . import transform as _transform
+from . import winding as _winding
 
-D_PATTERN   = re.compile(r'^\s*[MLHVCSQTAZmlhvcsqtaz][0-9.,\s-]')
-XML_PATTERN = re.compile(r'^\s*<[a-z]+\s', re.IGNORECASE)
 NS_PATTERN  = re.compile(r'^.*}(.*)$')
 
 
@@ -16,22 +27,56 @@ def remove_namespace(s):
         return match.group(1)  # Return the part after the }
     return s  # Return the original string if no match is found
 
+def memoized(method):
+    """
+    Cache the result of a Path method while the path memoizes (see Path.memoize).
+
+    Results are keyed by method name and arguments; calls with unhashable
+    arguments are never cached.
+    """
+    name = method.__name__
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = self._cache
+        if cache is None:
+            return method(self, *args, **kwargs)
+        key = (name, args, tuple(sorted(kwargs.items())))
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+        except TypeError:
+            return method(self, *args, **kwargs)
+        result = cache[key] = method(self, *args, **kwargs)
+        return result
+    return wrapper
+
 class Path(svgpathtools.Path):
+    # derived geometry cache, None unless memoize() was called
+    _cache = None
+
     def __init__(self, *args, **kwargs):
         if len(args) == 0:
             super().__init__()
         elif hasattr(args[0], 'attrib') and hasattr(args[0], 'tag'):
             parsed_path = self.__class__.parse_element(args[0])
             super().__init__(*parsed_path)
-        elif XML_PATTERN.match(args[0]):
-            parsed_path = self.__class__.parse_element(args[0])
-            super().__init__(*parsed_path)
-        elif D_PATTERN.match(args[0]):
-            parsed_path = self.__class__.parse_d(args[0])
-            super().__init__(*parsed_path)
-        else:
-            print("is something else", *args, file=sys.stderr)
+        elif not isinstance(args[0], str):
             super().__init__(*args, **kwargs)
+        else:
+            # the first significant character tells path data from markup
+            first = args[0].lstrip()[:1]
+            if first == '<':
+                parsed_path = self.__class__.parse_element(args[0])
+                super().__init__(*parsed_path)
+            elif first and first in _parser.COMMANDS:
+                segments, closed = _parser.parse_segments(args[0])
+                super().__init__(*segments)
+                self._closed = closed
+            else:
+                print("is something else", *args, file=sys.stderr)
+                super().__init__(*args, **kwargs)
 
     @classmethod
     def parse_d(classe, d):
@@ -42,24 +87,35 @@ class Path(svgpathtools.Path):
             d (str): The SVG path data string to be parsed.
 
         Returns:
-            Path: An object representing the parsed path with segments whose classes 
-            have been updated to be globally recognized.
+            Path: An object representing the parsed path, made of viiva segments.
         """
-        parsed_path = svgpathtools.parse_path(d)
-        for i, segment in enumerate(parsed_path):
-            segment.__class__ = globals().get(segment.__class__.__name__)
-            parsed_path[i] = segment
-        parsed_path.__class__ = globals().get(parsed_path.__class__.__name__)
-        return parsed_path
-    
+        segments, closed = _parser.parse_segments(d)
+        path = Path(*segments)
+        path._closed = closed
+        return path
+
+    @classmethod
+    def parse_d_many(classe, ds):
+        """
+        Parse many SVG path data strings in one call.
+
+        Args:
+            ds: An iterable of SVG path data strings.
+
+        Returns:
+            list: one Path per string.
+        """
+        return _parser.parse_many(ds)
+
     @classmethod
-    def parse_element(classe, element):
+    def parse_element(classe, element, transforms=True):
         """
         Parse an SVG element string into a path object.
 
         Args:
             element (str): The SVG element string to be parsed. This should be an XML string 
                            representing an SVG element such as a circle or path.
+            transforms (bool): apply the `transform` attribute of the element. Default is True.
 
         Returns:
             Path: An object representing the path created from the parsed SVG element.
@@ -75,29 +131,126 @@ class Path(svgpathtools.Path):
             attrib = root.attrib
             t = getattr(svgpathtools.svg_to_paths, "ellipse2pathd")
             attrib["rx"] = attrib["ry"] = attrib["r"]
-            return Path(t(attrib))
+            path = Path(t(attrib))
         elif tag == "path":
-            return classe.parse_d(root.attrib["d"])
+            path = classe.parse_d(root.attrib.get("d", ""))
+        elif tag == "line":
+            path = Path(svgpathtools.svg_to_paths.line2pathd(root))
         else:
             t = getattr(svgpathtools.svg_to_paths, tag + "2pathd")
-            return Path(t(root.attrib))
+            path = Path(t(root.attrib))
+        if transforms and root.get("transform"):
+            path = path.transformed(root.get("transform"))
+        return path
+
+    def memoize(self, enabled=True):
+        """
+        Turn caching of derived geometry on or off.
+
+        While enabled, to_cubics, to_polyline (per flatness), flatten, to_packed,
+        segment_tree, arc_length_index, to_beziers, to_shapely, length and bbox compute their result once. The
+        cache is dropped whenever the segment list changes (append, insert,
+        item assignment and deletion, start/end assignment); segments changed
+        in place require an explicit invalidate(). Cached results are shared
+        between calls and should be treated as read-only.
+
+        Args:
+            enabled (bool): whether to cache. Default is True.
+
+        Returns:
+            Path: the path itself, to allow chaining.
+        """
+        if not enabled:
+            self._cache = None
+        elif self._cache is None:
+            self._cache = {}
+        return self
+
+    def invalidate(self):
+        """
+        Drop cached derived geometry, see memoize().
+        """
+        if self._cache:
+            self._cache.clear()
+
+    def __getstate__(self):
+        # caches are neither copied nor pickled
+        state = self.__dict__.copy()
+        state.pop('_cache', None)
+        return state
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self.invalidate()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self.invalidate()
+
+    def insert(self, index, value):
+        super().insert(index, value)
+        self.invalidate()
+
+    @property
+    def start(self):
+        return svgpathtools.Path.start.fget(self)
+
+    @start.setter
+    def start(self, pt):
+        # segments can be shared with derived paths, so replace the segment
+        # instead of moving its start in place
+        if len(self):
+            self._segments[0] = copy.copy(self._segments[0])
+        svgpathtools.Path.start.fset(self, pt)
+        self.invalidate()
+
+    @property
+    def end(self):
+        return svgpathtools.Path.end.fget(self)
+
+    @end.setter
+    def end(self, pt):
+        if len(self):
+            self._segments[-1] = copy.copy(self._segments[-1])
+        svgpathtools.Path.end.fset(self, pt)
+        self.invalidate()
+
+    @memoized
+    def length(self, *args, **kwargs):
+        return super().length(*args, **kwargs)
+
+    @memoized
+    def bbox(self):
+        return super().bbox()
 
     def kinks(self, tol=1e-8):
-        return svgpathtools.kinks(self, tol)
+        """
+        Indices of the segments that start on a non-differentiable joint,
+        as svgpathtools.kinks, computed on all joints at once.
+        """
+        if len(self) == 0:
+            return []
+        kinks = self.to_packed().kinks(tol)
+        if self.start != self.end:
+            kinks[0] = False
+        return np.flatnonzero(kinks).tolist()
 
     def smoothed(self, maxjointsize=3, tightness=1.99, ignore_unfixable_kinks=False):
-        path = self.to_cubics()
-        path = svgpathtools.smoothed_path(path, maxjointsize, tightness, ignore_unfixable_kinks)
-        for i, segment in enumerate(path):
-            segment.__class__ = globals().get(segment.__class__.__name__)
-            path[i] = segment
-        path.__class__ = globals().get(path.__class__.__name__)
-        return path
+        path = svgpathtools.smoothed_path(self.to_cubics(), maxjointsize, tightness, ignore_unfixable_kinks)
+        segments = list(path)
+        for segment in segments:
+            # joints are new svgpathtools curves, everything else is shared
+            if not isinstance(segment, TolerantPath):
+                segment.__class__ = globals().get(segment.__class__.__name__)
+        return Path(*segments)
 
-            
+    @memoized
     def to_cubics(self, error=0.1):
         """
         Convert all path segments in the current object to cubic Bezier curves.
+
+        The path is left untouched: cubic segments are shared with the result
+        and only lines, quadratics and arcs are converted.
  
         Args:
             error (float, optional): The maximum error tolerance for approximating arcs with cubic Bezier curves.
@@ -105,19 +258,60 @@ class Path(svgpathtools.Path):
                                      Default is 0.1.
 
         Returns:
-            The modified copy of the current object with all segments converted to cubic Bezier curves.
+            Path: A new path with all segments converted to cubic Bezier curves.
         """
-
-        _self = copy.deepcopy(self)
-        _self.approximate_arcs_with_cubics(error=error)
-        for i, a in enumerate(_self):
-            if isinstance(a, Line):
-                _self[i] = a.to_cubic()
+        segments = []
+        for segment in self:
+            if isinstance(segment, CubicBezier):
+                segments.append(segment)
+            elif isinstance(segment, svgpathtools.CubicBezier):
+                segments.append(CubicBezier(*segment.bpoints()))
+            elif isinstance(segment, svgpathtools.Arc):
+                segments.extend(Arc.approximate_with_cubics(segment, error))
+            elif isinstance(segment, svgpathtools.QuadraticBezier):
+                segments.append(QuadraticBezier.to_cubic(segment))
             else:
-                a.__class__ = globals().get(a.__class__.__name__)
-                _self[i] = a
-        return _self
+                segments.append(Line.to_cubic(segment))
+        path = Path(*segments)
+        path._closed = self._closed
+        return path
+
+    @memoized
+    def flatten(self, flatness=0.1):
+        """
+        Flatten the path into polyline coordinates without creating segments.
+
+        Args:
+            flatness (float): The maximum allowable deviation between the polyline and the original path.
+
+        Returns:
+            tuple: an (N, 2) float array of vertices and the offsets of its
+            continuous subpaths, see viiva.paths.flatten.flatten.
+        """
+        return _flatten.flatten(self, flatness)
 
+    def contains(self, points, rule="nonzero", flatness=0.1, bands=None):
+        """
+        Whether points lie inside the filled area of the path, tested all at
+        once against its flattened outline, see viiva.paths.winding. Every
+        subpath is closed, as filling does; points on the outline may fall
+        either way.
+
+        Args:
+            points: complex numbers, or an (..., 2) array of coordinates.
+            rule (str): the fill rule, "nonzero" or "evenodd". Default is "nonzero".
+            flatness (float): flatness of the curves. Default is 0.1.
+            bands (int, optional): number of bands the edges are bucketed into, see winding_numbers.
+
+        Returns:
+            numpy.ndarray: a boolean array, shaped as the points.
+        """
+        if rule not in _winding.RULES:
+            raise ValueError("rule must be one of %s, got %r" % (", ".join(_winding.RULES), rule))
+        coords, offsets = self.flatten(flatness)
+        return _winding.filled(_winding.winding_numbers(coords, offsets, points, bands), rule)
+
+    @memoized
     def to_polyline(self, flatness=0.1):
         """
         Convert an svgpathtools Path to a polyline Path using Inkscape-like flattening with specified flatness.
@@ -132,76 +326,237 @@ class Path(svgpathtools.Path):
 
         if all(isinstance(segment, Line) for segment in self):
             return self
-        
-        path = self.to_cubics()
-        polyline_path = Path()
 
-        for segment in path:
-            if isinstance(segment, CubicBezier):
-                lines = segment.to_polyline(flatness)
-                for line in lines:
-                    polyline_path.append(line)
-            elif isinstance(segment, Line):
-                polyline_path.append(Line(segment.start, segment.end))
-            elif isinstance(segment, Arc):
-                arc_points = segment.approximate_with_cubics()
-                for bez in arc_points:
-                    points = bez.to_polyline(flatness)
-                    for i in range(len(points) - 1):
-                        polyline_path.append(Line(points[i], points[i + 1]))
-        return polyline_path
+        return Path(*_flatten.lines_from_coords(*self.flatten(flatness)))
+
+    def simplify(self, tolerance=0.1, method="rdp", flatness=None):
+        """
+        Approximate the path with as few lines as a tolerance allows, see
+        viiva.paths.simplify.simplify. Curves are flattened first.
+
+        Args:
+            tolerance (float): the maximum distance of a dropped vertex from the result. Default is 0.1.
+            method (str): "rdp" or "visvalingam". Default is "rdp".
+            flatness (float, optional): flatness of the curves. Default is a quarter of the tolerance.
+
+        Returns:
+            Path: a new path made of Line segments.
+        """
+        coords, offsets = self.flatten(tolerance / 4 if flatness is None else flatness)
+        path = Path(*_flatten.lines_from_coords(*_simplify.simplify(coords, offsets, tolerance, method)))
+        path._closed = self._closed
+        return path
 
+    def refit(self, tolerance=0.1, flatness=None):
+        """
+        Approximate the path with few cubic Bezier curves, such as the dense
+        polylines of to_polyline and offset, see viiva.paths.simplify.refit.
+
+        Args:
+            tolerance (float): the maximum deviation from the flattened path. Default is 0.1.
+            flatness (float, optional): flatness of the curves. Default is a quarter of the tolerance.
+
+        Returns:
+            Path: a new path made of CubicBezier segments, and Line segments where straight.
+        """
+        coords, offsets = self.flatten(tolerance / 4 if flatness is None else flatness)
+        path = Path(*_simplify.refit(coords, offsets, tolerance))
+        path._closed = self._closed
+        return path
+
+    def transformed(self, matrix):
+        """
+        Apply an affine transform to the path, in one vectorized pass over its
+        control points, see viiva.paths.transform.transform_packed.
+
+        Args:
+            matrix: a 3x3 matrix, the six values (a, b, c, d, e, f) of an SVG
+                    matrix(), or an SVG transform string such as "rotate(30) scale(2)".
+
+        Returns:
+            Path: the transformed path.
+        """
+        return _transform.transform_paths([self], matrix)[0]
+
+    @memoized
+    def to_packed(self):
+        """
+        Convert the path to a PackedPath, a struct-of-arrays representation
+        with vectorized point, derivative, normal, bbox and length.
+
+        Returns:
+            PackedPath: the packed path.
+        """
+        return PackedPath.from_path(self)
+
+    @memoized
+    def segment_tree(self):
+        """
+        The bounding volume hierarchy of the segments of the path, used by
+        intersect and self_intersections. Memoized paths build it only once.
+
+        Returns:
+            SegmentTree: the tree of segment bounding boxes.
+        """
+        return _intersect.SegmentTree(self.to_packed())
+
+    def intersect(self, other_curve, justonemode=False, tol=1e-12):
+        """
+        Find the intersections of the path with another path or segment, as
+        svgpathtools.Path.intersect, solving only the segment pairs whose
+        bounding boxes overlap.
+
+        Args:
+            other_curve: the path or path segment to intersect.
+            justonemode (bool): return only the first intersection found. Default is False.
+            tol (float): tolerance of the solver and of duplicate removal. Default is 1e-12.
+
+        Returns:
+            list: intersections as ((T1, seg1, t1), (T2, seg2, t2)).
+        """
+        other = other_curve if isinstance(other_curve, Path) else Path(other_curve)
+        return _intersect.intersect(self, other, self.segment_tree(), other.segment_tree(),
+                                    justonemode=justonemode, tol=tol)
+
+    def self_intersections(self, tol=1e-12):
+        """
+        Find the points where the path crosses itself.
+
+        Args:
+            tol (float): tolerance of the solver and of endpoint tests. Default is 1e-12.
+
+        Returns:
+            list: intersections as ((T1, seg1, t1), (T2, seg2, t2)) with T1 < T2.
+        """
+        return _intersect.self_intersections(self, self.segment_tree(), tol=tol)
+
+    @memoized
+    def arc_length_index(self, tolerance=0.1):
+        """
+        The cumulative arc-length table of the path, which answers the
+        *_at_length, resample and dash queries. Memoized paths build it
+        only once per tolerance.
+
+        Returns:
+            ArcLengthIndex: the table.
+        """
+        return _measure.ArcLengthIndex(self, tolerance)
+
+    def point_at_length(self, distance, tolerance=0.1):
+        """
+        The points at the given distances along the path.
+
+        Args:
+            distance: a distance or an array of distances.
+            tolerance (float): see arc_length_index. Default is 0.1.
+
+        Returns:
+            complex or numpy.ndarray: points, shaped as `distance`.
+        """
+        return self.arc_length_index(tolerance).point(distance)
+
+    def tangent_at_length(self, distance, tolerance=0.1):
+        """
+        The unit tangents at the given distances along the path, see point_at_length.
+        """
+        return self.arc_length_index(tolerance).tangent(distance)
+
+    def resample(self, count=None, spacing=None, tolerance=0.1):
+        """
+        Points evenly spaced along the path, from its start to its end.
+
+        Args:
+            count (int): the number of points.
+            spacing (float): the distance between points, the last one may be closer.
+            tolerance (float): see arc_length_index. Default is 0.1.
+
+        Returns:
+            numpy.ndarray: complex points.
+        """
+        return self.arc_length_index(tolerance).resample(count, spacing)
+
+    def dash(self, dasharray, offset=0.0, tolerance=0.1):
+        """
+        Split the path into dashes, as SVG stroke-dasharray and stroke-dashoffset.
+
+        Args:
+            dasharray: lengths of the dashes and of the gaps between them.
+            offset (float): distance into the pattern at the start of every subpath. Default is 0.
+            tolerance (float): see arc_length_index. Default is 0.1.
+
+        Returns:
+            list: one Path per dash.
+        """
+        index = self.arc_length_index(tolerance)
+        return [Path(*index.cut(start, end)) for start, end in index.dashes(dasharray, offset)]
+
+    @memoized
     def to_beziers(self):
-        return beziers.BezierPath.from_path(self.to_cubics())
+        # beziers.py is only imported when needed
+        from ..beziers import BezierPath
+
+        return BezierPath.from_path(self.to_cubics())
         
-    def to_shapely(self):
+    @memoized
+    def to_shapely(self, flatness=0.1):
         """
-        Convert an svgpathtools.Path object composed of Line segments
-        into a corresponding Shapely geometry object.
+        Convert the path into a corresponding Shapely geometry object.
+
+        A path made only of closed subpaths becomes a Polygon, whose holes are
+        the subpaths nested inside others, or a MultiPolygon; any other path
+        a LineString or a MultiLineString. See viiva.paths.geometry.to_shapely_array
+        for converting many paths at once.
 
         Args:
-            path (svgpathtools.Path): The input path consisting of Line segments.
+            flatness (float): The maximum allowable deviation between the polyline and the original path.
 
         Returns:
-            shapely.geometry.LineString or shapely.geometry.Polygon: The corresponding Shapely object.
+            shapely.geometry.base.BaseGeometry: The corresponding Shapely object.
         """
-        path = self.to_polyline()
+        shape = _geometry.to_shapely_array([self], flatness)[0]
+        if shape is None:
+            raise ValueError("Path does not contain any segments.")
+        return shape
 
-        # Extract the coordinates from the Line segments
-        coords = [(line.start.real, line.start.imag) for line in path if isinstance(line, Line)]
-        coords.append((path[-1].end.real, path[-1].end.imag))
-        if not coords:
-            raise ValueError("Path does not contain any Line segments.")
-
-        # Close the path if the first and last coordinates are the same
-        if coords[0] == coords[-1]:
-            return geom.Polygon(coords)
-        else:
-            return geom.LineString(coords)
+    def d(self, precision=None, relative=False, shorthand=False, minify=False, **kwargs):
+        """
+        The path data of the path, with " Z" closing subpaths that end where they start.
 
-    def d(self):
-        if self.isclosed():
-            return super().d() + " Z"
-        else:
-            return super().d()
+        The options are those of viiva.paths.writer.format_d; by default the
+        output is that of svgpathtools. svgpathtools' own options (useSandT,
+        use_closed_attrib, rel) are passed on to its Path.d().
+        """
+        if kwargs:
+            d = super().d(**kwargs)
+            return d + " Z" if self.iscontinuous() and self.isclosed() and not d.endswith("Z") else d
+        return _writer.format_d(self, precision, relative, shorthand, minify)
         
     
-    def offset(self, offset_distance, steps=1000):
+    def offset(self, offset_distance, steps=1000, tolerance=None, join="miter",
+               miter_limit=4.0, as_coords=False):
         """Takes in a Path object, `path`, and a distance,
         `offset_distance`, and outputs an piecewise-linear approximation 
-        of the 'parallel' offset curve."""
-        nls = []
-        for seg in self:
-            ct = 1
-            for k in range(steps):
-                t = k / steps
-                offset_vector = offset_distance * seg.normal(t)
-                nl = Line(seg.point(t), seg.point(t) + offset_vector)
-                nls.append(nl)
-        connect_the_dots = [Line(nls[k].end, nls[k+1].end) for k in range(len(nls)-1)]
-        if self.isclosed():
-            connect_the_dots.append(Line(nls[-1].end, nls[0].end))
-        offset_path = Path()
-        for c in connect_the_dots:
-            offset_path.append(c)
-        return offset_path
+        of the 'parallel' offset curve.
+
+        By default every segment is sampled at `steps` uniform parameters. With a
+        `tolerance` the sampling adapts to the length and curvature of each
+        segment, and kinks get a "miter", "round" or "bevel" `join` (miters
+        longer than `miter_limit` times the distance become bevels).
+
+        Args:
+            offset_distance (float): distance along the right hand normal.
+            steps (int): samples per segment, an upper bound with a tolerance. Default is 1000.
+            tolerance (float, optional): maximum deviation from the true offset curve.
+            join (str): join at kinks in adaptive mode. Default is "miter".
+            miter_limit (float): miter limit in adaptive mode. Default is 4.
+            as_coords (bool): return coordinates and polyline offsets instead of
+                              a Path, see viiva.paths.offset.offset. Default is False.
+
+        Returns:
+            Path: the offset polyline, made of Line segments.
+        """
+        coords, offsets = _offset.offset(self, offset_distance, tolerance=tolerance, steps=steps,
+                                         join=join, miter_limit=miter_limit)
+        if as_coords:
+            return coords, offsets
+        return Path(*_flatten.lines_from_coords(coords, offsets))
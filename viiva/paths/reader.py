@@ -0,0 +1,58 @@
+import xml.etree.ElementTree as ET
+
+from .path import Path, remove_namespace
+from .transform import IDENTITY, parse_transform
+
+# elements converted to paths, as in Path.parse_element
+SHAPE_TAGS = {"path", "circle", "ellipse", "rect", "line", "polyline", "polygon"}
+
+# containers whose content is not rendered where it is defined
+SKIP_TAGS = {"defs", "symbol", "clipPath", "mask", "pattern", "marker", "metadata"}
+
+
+def iter_paths(source, transforms=True, attributes=False):
+    """
+    Stream the shapes of an SVG document as Path objects.
+
+    The document is read with `xml.etree.ElementTree.iterparse` and every
+    element is cleared and detached from its parent once processed, so memory
+    stays flat regardless of the size of the file.
+
+    Args:
+        source: A file name or a file object containing an SVG document.
+        transforms (bool): apply the `transform` attributes of the shape and of
+                           its enclosing groups. Default is True.
+        attributes (bool): yield `(path, attrib)` pairs instead of paths, where
+                           `attrib` is a copy of the element attributes. Default is False.
+
+    Yields:
+        Path: one path per shape element, in document order. Empty shapes are skipped.
+    """
+    stack = []
+    skipping = 0
+    for event, element in ET.iterparse(source, events=("start", "end")):
+        tag = remove_namespace(element.tag)
+        if event == "start":
+            matrix = stack[-1][1] if stack else IDENTITY
+            if transforms and element.get("transform"):
+                matrix = matrix @ parse_transform(element.get("transform"))
+            stack.append((element, matrix))
+            if tag in SKIP_TAGS:
+                skipping += 1
+            continue
+
+        _, matrix = stack.pop()
+        if tag in SKIP_TAGS:
+            skipping -= 1
+        elif tag in SHAPE_TAGS and not skipping:
+            attrib = dict(element.attrib) if attributes else None
+            path = Path.parse_element(element, transforms=False)
+            if len(path):
+                if matrix is not IDENTITY:
+                    path = path.transformed(matrix)
+                yield (path, attrib) if attributes else path
+
+        element.clear()
+        if stack:
+            stack[-1][0].remove(element)
+
@@ -0,0 +1,332 @@
+"""
+Simplification of polylines and least-squares refitting of curves.
+
+Both work on the flattened form returned by flatten and offset, an (N, 2)
+array of vertices with the offsets of its polylines, and process all the
+polylines together: every round of the algorithms handles every open
+interval of every polyline in a handful of array operations, so the number
+of rounds grows with the depth of the subdivision, not with the number of
+vertices.
+"""
+import numpy as np
+
+METHODS = ("rdp", "visvalingam")
+
+# a vertex where the polyline turns by more than this many degrees is a
+# corner, where refitted curves do not join smoothly
+_CORNER_ANGLE = 60.0
+
+# least-squares fits of every piece, each after reparameterizing its points
+_FIT_ROUNDS = 3
+
+# subdivision rounds, beyond which pieces are left as they are
+_MAX_DEPTH = 64
+
+
+def _complex(coords):
+    coords = np.asarray(coords, dtype=float)
+    return coords[:, 0] + 1j * coords[:, 1]
+
+
+def _ranges(lo, hi):
+    """
+    The indices lo[k] <= i < hi[k] of all the ranges, and the range of each.
+    """
+    counts = np.maximum(hi - lo, 0)
+    owner = np.repeat(np.arange(len(lo)), counts)
+    index = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts) + lo[owner]
+    return index, owner
+
+
+def _segment_distance(p, a, b):
+    """
+    Distances of the points p from the segments a-b.
+    """
+    ab = b - a
+    length = (ab * ab.conjugate()).real
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = np.clip(((p - a) * ab.conjugate()).real / length, 0, 1)
+    t = np.where(length > 0, t, 0)
+    return np.abs(p - a - t * ab)
+
+
+def _farthest(values, owner, count):
+    """
+    The largest value of every group and the index of its first occurrence.
+    """
+    best = np.full(count, -np.inf)
+    np.maximum.at(best, owner, values)
+    where = np.flatnonzero(values == best[owner])
+    _, first = np.unique(owner[where], return_index=True)
+    index = np.zeros(count, dtype=np.intp)
+    index[owner[where[first]]] = where[first]
+    return best, index
+
+
+def _compressed(z, keep, offsets):
+    offsets = np.asarray(offsets)
+    kept = np.concatenate(([0], np.cumsum(keep)))
+    return np.column_stack((z.real, z.imag))[keep], kept[offsets]
+
+
+def _rdp(z, offsets, tolerance):
+    keep = np.zeros(len(z), dtype=bool)
+    lo, hi = offsets[:-1], offsets[1:] - 1
+    keep[lo[hi >= lo]] = keep[hi[hi >= lo]] = True
+    for _ in range(len(z)):
+        active = hi - lo >= 2
+        lo, hi = lo[active], hi[active]
+        if not len(lo):
+            break
+        index, owner = _ranges(lo + 1, hi)
+        distance = _segment_distance(z[index], z[lo[owner]], z[hi[owner]])
+        worst, at = _farthest(distance, owner, len(lo))
+        split = worst > tolerance
+        middle = index[at[split]]
+        keep[middle] = True
+        lo, hi = np.concatenate((lo[split], middle)), np.concatenate((middle, hi[split]))
+    return keep
+
+
+def _visvalingam(z, offsets, tolerance):
+    # a vertex goes when the original vertices between its neighbours stay
+    # within tolerance of the edge joining them; the ones deviating least
+    # among their neighbours go in the same round, and a hash of the index
+    # breaks ties between equal deviations, so long straight runs shrink
+    # geometrically
+    index = np.arange(len(z))
+    line = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    salt = (index.astype(np.uint64) * np.uint64(2654435761)) % np.uint64(1 << 32)
+    for _ in range(len(z)):
+        deviation = np.full(len(index), np.inf)
+        inner = np.zeros(len(index), dtype=bool)
+        inner[1:-1] = (line[1:-1] == line[:-2]) & (line[1:-1] == line[2:])
+        i = np.flatnonzero(inner)
+        lo, hi = index[i - 1], index[i + 1]
+        spanned, owner = _ranges(lo + 1, hi)
+        distance = _segment_distance(z[spanned], z[lo[owner]], z[hi[owner]])
+        deviation[i] = _farthest(distance, owner, len(i))[0]
+        key = np.lexsort((salt[index], deviation))
+        rank = np.empty(len(index), dtype=np.intp)
+        rank[key] = np.arange(len(index))
+        lower = np.ones(len(index), dtype=bool)
+        lower[1:] &= rank[1:] < rank[:-1]
+        lower[:-1] &= rank[:-1] < rank[1:]
+        drop = inner & lower & (deviation <= tolerance)
+        if not drop.any():
+            break
+        index, line = index[~drop], line[~drop]
+    keep = np.zeros(len(z), dtype=bool)
+    keep[index] = True
+    return keep
+
+
+def simplify(coords, offsets=None, tolerance=0.1, method="rdp"):
+    """
+    Drop the vertices of polylines that contribute less than a tolerance.
+
+    Args:
+        coords: an (N, 2) array of vertices, as returned by flatten.
+        offsets: the offsets of the polylines. Default is a single polyline.
+        tolerance (float): the maximum distance of a dropped vertex from the
+                           result. "rdp" (Ramer-Douglas-Peucker) keeps the
+                           farthest vertices first, "visvalingam" drops the
+                           ones deviating least first. Default is 0.1.
+        method (str): "rdp" or "visvalingam". Default is "rdp".
+
+    Returns:
+        tuple: the remaining vertices and the offsets of their polylines.
+        The ends of every polyline are always kept.
+    """
+    if method not in METHODS:
+        raise ValueError("method must be one of %s." % ", ".join(METHODS))
+    if tolerance < 0:
+        raise ValueError("tolerance must not be negative.")
+    z = _complex(coords)
+    offsets = np.asarray([0, len(z)] if offsets is None else offsets, dtype=np.intp)
+    keep = (_rdp if method == "rdp" else _visvalingam)(z, offsets, tolerance)
+    return _compressed(z, keep, offsets)
+
+
+def _unit(z):
+    length = np.abs(z)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(length > 0, z / length, 0)
+
+
+def _bernstein(u):
+    s = 1 - u
+    return s ** 3, 3 * s ** 2 * u, 3 * s * u ** 2, u ** 3
+
+
+def _fit(z, index, owner, count, start, end, t0, t1, u):
+    """
+    Least-squares cubics through the points of every piece, with the end
+    points and tangent directions given, as in Schneider's algorithm.
+    """
+    p0, p3 = z[start], z[end]
+    b0, b1, b2, b3 = _bernstein(u)
+    a1, a2 = t0[owner] * b1, t1[owner] * b2
+    rest = z[index] - p0[owner] * (b0 + b1) - p3[owner] * (b2 + b3)
+
+    def total(values):
+        return np.bincount(owner, values, minlength=count)
+
+    c00 = total((a1 * a1.conjugate()).real)
+    c01 = total((a1 * a2.conjugate()).real)
+    c11 = total((a2 * a2.conjugate()).real)
+    x0 = total((a1 * rest.conjugate()).real)
+    x1 = total((a2 * rest.conjugate()).real)
+    det = c00 * c11 - c01 * c01
+    with np.errstate(invalid="ignore", divide="ignore"):
+        alpha1 = (x0 * c11 - x1 * c01) / det
+        alpha2 = (c00 * x1 - c01 * x0) / det
+    # degenerate fits fall back to the usual third of the chord
+    chord = np.abs(p3 - p0)
+    bad = ~(np.isfinite(alpha1) & np.isfinite(alpha2)) | (alpha1 < 1e-6 * chord) | (alpha2 < 1e-6 * chord)
+    alpha1 = np.where(bad, chord / 3, alpha1)
+    alpha2 = np.where(bad, chord / 3, alpha2)
+    return np.column_stack((p0, p0 + alpha1 * t0, p3 + alpha2 * t1, p3))
+
+
+def _evaluate(c, u):
+    b0, b1, b2, b3 = _bernstein(u)
+    return b0 * c[:, 0] + b1 * c[:, 1] + b2 * c[:, 2] + b3 * c[:, 3]
+
+
+def _reparameterized(c, p, u):
+    # one Newton step towards the closest point of the curve to every point
+    s = 1 - u
+    q = _evaluate(c, u)
+    d1 = 3 * (s ** 2 * (c[:, 1] - c[:, 0]) + 2 * s * u * (c[:, 2] - c[:, 1]) + u ** 2 * (c[:, 3] - c[:, 2]))
+    d2 = 6 * (s * (c[:, 2] - 2 * c[:, 1] + c[:, 0]) + u * (c[:, 3] - 2 * c[:, 2] + c[:, 1]))
+    numerator = ((q - p) * d1.conjugate()).real
+    denominator = (d1 * d1.conjugate()).real + ((q - p) * d2.conjugate()).real
+    with np.errstate(invalid="ignore", divide="ignore"):
+        step = numerator / denominator
+    return np.clip(np.where(np.isfinite(step) & (denominator > 0), u - step, u), 0, 1)
+
+
+def _tangents(z, lo, hi, closed, corner):
+    """
+    The unit tangent at every vertex, and whether it is a break: an end of
+    an open polyline or a corner.
+    """
+    forward = np.zeros(len(z), dtype=complex)
+    backward = np.zeros(len(z), dtype=complex)
+    forward[:-1] = z[1:] - z[:-1]
+    backward[1:] = z[1:] - z[:-1]
+    # the ends of closed polylines turn from the last edge to the first
+    backward[lo[closed]] = z[hi[closed]] - z[hi[closed] - 1]
+    forward[hi[closed]] = z[lo[closed] + 1] - z[lo[closed]]
+    forward[hi] = np.where(closed, forward[hi], 0)
+    backward[lo] = np.where(closed, backward[lo], 0)
+    turn = np.abs(np.angle(forward * backward.conjugate()))
+    breaks = (forward == 0) | (backward == 0) | (turn > np.radians(corner))
+    return _unit(forward), _unit(backward), _unit(_unit(forward) + _unit(backward)), breaks
+
+
+def refit(coords, offsets=None, tolerance=0.1, corner=_CORNER_ANGLE):
+    """
+    Fit cubic Beziers to polylines, within a tolerance of their vertices.
+
+    Every polyline is cut at its corners and fitted piece by piece with
+    Schneider's algorithm: a least-squares cubic with the end tangents of
+    the polyline, refined by reparameterizing the points, and split at its
+    worst point while it deviates by more than the tolerance. Curves meet
+    with a continuous tangent except at corners. Pieces that a straight
+    line fits become lines.
+
+    Args:
+        coords: an (N, 2) array of vertices, as returned by flatten and offset.
+        offsets: the offsets of the polylines. Default is a single polyline.
+        tolerance (float): the maximum distance of the vertices from the curves. Default is 0.1.
+        corner (float): the turn, in degrees, above which a vertex is a corner. Default is 60.
+
+    Returns:
+        list: CubicBezier and Line segments, polyline after polyline.
+    """
+    from . import Line, CubicBezier
+
+    if tolerance <= 0:
+        raise ValueError("tolerance must be positive.")
+    z = _complex(coords)
+    offsets = np.asarray([0, len(z)] if offsets is None else offsets, dtype=np.intp)
+    # repeated vertices have no direction
+    fresh = np.ones(len(z), dtype=bool)
+    fresh[1:] = z[1:] != z[:-1]
+    fresh[offsets[:-1][offsets[:-1] < len(z)]] = True
+    coords, offsets = _compressed(z, fresh, offsets)
+    z = coords[:, 0] + 1j * coords[:, 1]
+    lines = np.flatnonzero(np.diff(offsets) >= 2)
+    lo, hi = offsets[lines], offsets[lines + 1] - 1
+    closed = (hi - lo >= 3) & (z[lo] == z[hi])
+    forward, backward, smooth, breaks = _tangents(z, lo, hi, closed, corner)
+
+    # the pieces between breaks, with the tangents at their ends
+    cuts = np.zeros(len(z), dtype=bool)
+    cuts[lo] = cuts[hi] = True
+    cuts |= breaks
+    vertex_line = np.full(len(z), -1)
+    vertex_line[_ranges(lo, hi + 1)[0]] = np.repeat(np.arange(len(lo)), hi - lo + 1)
+    at = np.flatnonzero(cuts)
+    pair = (vertex_line[at[:-1]] == vertex_line[at[1:]]) & (vertex_line[at[:-1]] >= 0)
+    start, end = at[:-1][pair], at[1:][pair]
+
+    def tangent_out(i):
+        return np.where(breaks[i], forward[i], smooth[i])
+
+    def tangent_in(i):
+        return -np.where(breaks[i], backward[i], smooth[i])
+
+    t0, t1 = tangent_out(start), tangent_in(end)
+    found = []
+    for _ in range(_MAX_DEPTH):
+        if not len(start):
+            break
+        index, owner = _ranges(start, end + 1)
+        p = z[index]
+        # straight enough for a line
+        straight = np.zeros(len(start), dtype=bool)
+        inner = (index != start[owner]) & (index != end[owner])
+        distance = _segment_distance(p, z[start[owner]], z[end[owner]])
+        worst_line = np.zeros(len(start))
+        np.maximum.at(worst_line, owner[inner], distance[inner])
+        straight = worst_line <= tolerance
+        found += [(s, Line.fast(z[s], z[e])) for s, e in zip(start[straight].tolist(), end[straight].tolist())]
+
+        # chord length parameters
+        edge = np.zeros(len(index))
+        edge[1:] = np.abs(p[1:] - p[:-1])
+        edge[index == start[owner]] = 0
+        cumulative = np.cumsum(edge)
+        base = cumulative[np.flatnonzero(index == start[owner])]
+        u = cumulative - base[owner]
+        total = u[np.flatnonzero(index == end[owner])]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            u = np.where(total[owner] > 0, u / total[owner], 0)
+
+        count = len(start)
+        c = _fit(z, index, owner, count, start, end, t0, t1, u)
+        for _ in range(_FIT_ROUNDS - 1):
+            u = _reparameterized(c[owner], p, u)
+            u[index == start[owner]], u[index == end[owner]] = 0, 1
+            c = _fit(z, index, owner, count, start, end, t0, t1, u)
+        error = np.abs(_evaluate(c[owner], u) - p)
+        worst, at = _farthest(error, owner, count)
+
+        done = ~straight & (worst <= tolerance)
+        found += [(s, CubicBezier.fast(*row)) for s, row in zip(start[done].tolist(), c[done].tolist())]
+        # split at the worst point, which is an inner vertex
+        split = ~straight & ~done
+        middle = index[at[split]]
+        middle = np.where((middle > start[split]) & (middle < end[split]), middle, (start[split] + end[split]) // 2)
+        t0 = np.concatenate((t0[split], tangent_out(middle)))
+        t1 = np.concatenate((tangent_in(middle), t1[split]))
+        start, end = np.concatenate((start[split], middle)), np.concatenate((middle, end[split]))
+    else:
+        # too deep: the rest stays a polyline
+        index, owner = _ranges(start, end)
+        found += [(i, Line.fast(z[i], z[i + 1])) for i in index.tolist()]
+    found.sort(key=lambda item: item[0])
+    return [segment for _, segment in found]
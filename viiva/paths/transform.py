@@ -0,0 +1,202 @@
+"""
+Affine transforms of paths.
+
+A transform is a 3x3 homogeneous matrix as in svgpathtools, [[a, c, e],
+[b, d, f], [0, 0, 1]], which parse_transform builds from an SVG `transform`
+attribute. transform_packed maps all the control points of a PackedPath in
+one pass, and arcs through the singular value decomposition of the linear
+part applied to their ellipse: the singular values are the new radii, the
+left singular vectors the new axes, and the right ones how the angles of
+the arc turn (or mirror, when the transform is a reflection).
+"""
+import math
+import re
+from functools import lru_cache
+
+import numpy as np
+
+from .packed import PackedPath, LINE, ARC, RX, RY, ROTATION, SWEEP, CX, CY, THETA, DELTA
+
+IDENTITY = np.identity(3)
+
+_FUNCTION = re.compile(r"\s*,?\s*(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)\s*")
+_NUMBER = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+# the argument counts every transform function accepts
+_ARITY = {"matrix": (6,), "translate": (1, 2), "scale": (1, 2), "rotate": (1, 3),
+          "skewX": (1,), "skewY": (1,)}
+
+
+def _function_matrix(name, args):
+    if name == "matrix":
+        a, b, c, d, e, f = args
+        return (a, b, c, d, e, f)
+    if name == "translate":
+        return (1, 0, 0, 1, args[0], args[1] if len(args) > 1 else 0)
+    if name == "scale":
+        return (args[0], 0, 0, args[1] if len(args) > 1 else args[0], 0, 0)
+    if name == "rotate":
+        angle = math.radians(args[0])
+        cos, sin = math.cos(angle), math.sin(angle)
+        cx, cy = args[1:] if len(args) == 3 else (0, 0)
+        # rotation about (cx, cy): translate(cx, cy) rotate(a) translate(-cx, -cy)
+        return (cos, sin, -sin, cos, cx - cos * cx + sin * cy, cy - sin * cx - cos * cy)
+    if name == "skewX":
+        return (1, 0, math.tan(math.radians(args[0])), 1, 0, 0)
+    return (1, math.tan(math.radians(args[0])), 0, 1, 0, 0)
+
+
+@lru_cache(maxsize=1024)
+def _parse(text):
+    total = IDENTITY
+    position = 0
+    for match in _FUNCTION.finditer(text):
+        if match.start() != position:
+            break
+        position = match.end()
+        name = match.group(1)
+        args = [float(x) for x in _NUMBER.findall(match.group(2))]
+        if len(args) not in _ARITY[name]:
+            raise ValueError("Invalid SVG transform %s(%s)" % (name, match.group(2).strip()))
+        a, b, c, d, e, f = _function_matrix(name, args)
+        total = total @ np.array([[a, c, e], [b, d, f], [0, 0, 1]], dtype=float)
+    if text[position:].strip(", \t\n\r"):
+        raise ValueError("Invalid SVG transform %r" % text)
+    total.setflags(write=False)
+    return total
+
+
+def parse_transform(text):
+    """
+    Parse an SVG `transform` attribute into a 3x3 matrix.
+
+    The functions of the list apply from right to left, as nested groups do,
+    so the matrix is their product from left to right. The matrices of
+    repeated strings are cached.
+
+    Args:
+        text (str): the attribute, such as "translate(10, 20) rotate(45)". None,
+                    an empty string and "none" give the identity.
+
+    Returns:
+        numpy.ndarray: the read-only 3x3 matrix.
+    """
+    if text is None or not text.strip() or text.strip() == "none":
+        return IDENTITY
+    return _parse(text.strip())
+
+
+def as_matrix(matrix):
+    """
+    A transform as a 3x3 matrix.
+
+    Args:
+        matrix: a 3x3 or 2x3 matrix, the six values (a, b, c, d, e, f) of an
+                SVG matrix(), or an SVG transform string.
+
+    Returns:
+        numpy.ndarray: the 3x3 matrix.
+    """
+    if matrix is None or isinstance(matrix, str):
+        return parse_transform(matrix)
+    m = np.asarray(matrix, dtype=float)
+    if m.shape == (6,):
+        a, b, c, d, e, f = m
+        return np.array([[a, c, e], [b, d, f], [0, 0, 1]])
+    if m.shape == (2, 3):
+        return np.vstack((m, [0, 0, 1]))
+    if m.shape != (3, 3):
+        raise ValueError("Expected a 3x3 matrix, six values or a transform string, got shape %s" % (m.shape,))
+    return m
+
+
+def transform_packed(packed, matrix):
+    """
+    Apply an affine transform to every segment of a PackedPath.
+
+    Bezier control points and the ends and centers of arcs are mapped
+    directly. Arcs get the radii and rotation of the transformed ellipse,
+    and their sweep flips under a reflection; an arc whose ellipse collapses
+    to a segment (a singular matrix) becomes a Line between its ends.
+
+    Args:
+        packed (PackedPath): the segments.
+        matrix: the transform, see as_matrix.
+
+    Returns:
+        PackedPath: the transformed segments.
+    """
+    m = as_matrix(matrix)
+    (a, c, e), (b, d, f) = m[0], m[1]
+    p = packed.points
+    x, y = p.real, p.imag
+    points = (a * x + c * y + e) + 1j * (b * x + d * y + f)
+    kinds = packed.kinds.copy()
+    arcs = packed.arcs.copy()
+
+    rows = np.flatnonzero(kinds == ARC)
+    if len(rows):
+        arc = arcs[rows]
+        phi = np.radians(arc[:, ROTATION])
+        cos, sin = np.cos(phi), np.sin(phi)
+        # the ellipse of every arc maps the unit circle by E = L R(phi) diag(rx, ry)
+        ellipse = np.empty((len(rows), 2, 2))
+        ellipse[:, 0, 0] = (a * cos + c * sin) * arc[:, RX]
+        ellipse[:, 1, 0] = (b * cos + d * sin) * arc[:, RX]
+        ellipse[:, 0, 1] = (c * cos - a * sin) * arc[:, RY]
+        ellipse[:, 1, 1] = (d * cos - b * sin) * arc[:, RY]
+        u, s, vt = np.linalg.svd(ellipse)
+        # make U a rotation, so that V^T holds the reflection if any
+        flip = np.linalg.det(u) < 0
+        u[flip, :, 1] *= -1
+        vt[flip, 1, :] *= -1
+
+        arc[:, RX], arc[:, RY] = s[:, 0], s[:, 1]
+        arc[:, ROTATION] = np.degrees(np.arctan2(u[:, 1, 0], u[:, 0, 0]))
+        center = arc[:, CX] + 1j * arc[:, CY]
+        center = (a * center.real + c * center.imag + e) + 1j * (b * center.real + d * center.imag + f)
+        arc[:, CX], arc[:, CY] = center.real, center.imag
+        # the angles turn by the rotation V^T, or mirror about its axis
+        beta = np.degrees(np.arctan2(vt[:, 1, 0], vt[:, 0, 0]))
+        if a * d - b * c < 0:
+            arc[:, THETA] = beta - arc[:, THETA]
+            arc[:, DELTA] = -arc[:, DELTA]
+            arc[:, SWEEP] = 1 - arc[:, SWEEP]
+        else:
+            arc[:, THETA] = arc[:, THETA] + beta
+        arc[:, THETA] = (arc[:, THETA] + 180) % 360 - 180
+        arcs[rows] = arc
+        points[rows, 1:3] = 0
+
+        collapsed = rows[~(s[:, 1] > 1e-12 * np.maximum(s[:, 0], 1))]
+        if len(collapsed):
+            kinds[collapsed] = LINE
+            points[collapsed, 1] = points[collapsed, 0]
+            points[collapsed, 2] = points[collapsed, 3]
+            arcs[collapsed] = 0
+    return PackedPath(kinds, points, arcs)
+
+
+def transform_paths(paths, matrix):
+    """
+    Apply an affine transform to many paths at once: their segments are
+    packed together and transformed in a single pass.
+
+    Args:
+        paths: an iterable of Path objects.
+        matrix: the transform, see as_matrix.
+
+    Returns:
+        list: the transformed paths, which stay closed if they were.
+    """
+    from .path import Path
+
+    paths = list(paths)
+    packed, first = PackedPath.from_paths(paths)
+    segments = transform_packed(packed, matrix).segments()
+    result = []
+    for i, path in enumerate(paths):
+        transformed = Path(*segments[first[i]:first[i + 1]])
+        transformed._closed = getattr(path, "_closed", False)
+        result.append(transformed)
+    return result
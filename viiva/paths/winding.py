@@ -0,0 +1,154 @@
+"""
+Point-in-path tests for many points at once.
+
+The path is flattened and every subpath closed, as filling does. The edges
+are bucketed into horizontal bands, and each point is only crossed with the
+edges of its band: a ray to the right of the point counts +1 for every
+upward edge it crosses and -1 for every downward one. The pairs are
+evaluated in chunks, so millions of points take bounded memory.
+"""
+import numpy as np
+
+from .flatten import flatten
+
+RULES = ("nonzero", "evenodd")
+
+# point-edge pairs evaluated at once
+_CHUNK = 1 << 21
+
+# the default number of bands is one per this many edges
+_EDGES_PER_BAND = 2
+
+
+def _points(points):
+    # complex numbers, or (x, y) pairs in an (..., 2) array
+    points = np.asarray(points)
+    if np.iscomplexobj(points):
+        return points
+    points = points.astype(float)
+    if points.shape and points.shape[-1] == 2:
+        return points[..., 0] + 1j * points[..., 1]
+    return points + 0j
+
+
+def _edges(coords, offsets):
+    """
+    The non-horizontal edges of the closed polylines, as (x0, y0, x1, y1).
+    """
+    n = len(coords)
+    following = np.arange(1, n + 1)
+    # the last vertex of every polyline joins its first one
+    ends = offsets[1:] - 1
+    following[ends] = offsets[:-1]
+    x0, y0 = coords[:, 0], coords[:, 1]
+    x1, y1 = x0[following], y0[following]
+    keep = y0 != y1
+    return x0[keep], y0[keep], x1[keep], y1[keep]
+
+
+def winding_numbers(coords, offsets, points, bands=None):
+    """
+    Winding numbers of polylines around points, every polyline closed by an
+    edge from its last vertex back to its first.
+
+    Args:
+        coords (numpy.ndarray): (N, 2) vertices, as returned by flatten.
+        offsets (numpy.ndarray): starts of the polylines in coords, and N.
+        points: complex numbers, or an (..., 2) array of coordinates.
+        bands (int, optional): number of horizontal bands the edges are
+                               bucketed into; 1 crosses every point with every
+                               edge. Default is one band per two edges.
+
+    Returns:
+        numpy.ndarray: an int array, shaped as the points.
+    """
+    z = _points(points)
+    shape = z.shape
+    z = z.ravel()
+    winding = np.zeros(len(z), dtype=np.int64)
+    coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+    offsets = np.asarray(offsets, dtype=np.intp)
+    x0, y0, x1, y1 = _edges(coords, offsets) if len(coords) else (np.zeros(0),) * 4
+    if len(x0) == 0 or len(z) == 0:
+        return winding.reshape(shape)
+
+    # only points within the bounding box can be inside
+    px, py = z.real, z.imag
+    ymin, ymax = min(y0.min(), y1.min()), max(y0.max(), y1.max())
+    candidates = np.flatnonzero((py >= ymin) & (py <= ymax) &
+                                (px >= min(x0.min(), x1.min())) & (px <= max(x0.max(), x1.max())))
+    if len(candidates) == 0:
+        return winding.reshape(shape)
+    px, py = px[candidates], py[candidates]
+
+    if bands is None:
+        bands = len(x0) // _EDGES_PER_BAND + 1
+    if bands < 1:
+        raise ValueError("bands must be at least 1.")
+    height = (ymax - ymin) / bands or 1.0
+
+    def band(y):
+        return np.clip(((y - ymin) / height).astype(np.intp), 0, bands - 1)
+
+    # every edge in each band its y range touches, grouped by band
+    low, high = band(np.minimum(y0, y1)), band(np.maximum(y0, y1))
+    spans = high - low + 1
+    edge = np.repeat(np.arange(len(x0)), spans)
+    edge_band = low[edge] + np.arange(len(edge)) - np.repeat(np.cumsum(spans) - spans, spans)
+    order = np.argsort(edge_band, kind="stable")
+    edge = edge[order]
+    first = np.searchsorted(edge_band[order], np.arange(bands + 1))
+    ax, ay, dx, dy = x0[edge], y0[edge], x1[edge] - x0[edge], y1[edge] - y0[edge]
+    by = y1[edge]
+
+    point_band = band(py)
+    counts = first[point_band + 1] - first[point_band]
+    total = np.cumsum(counts)
+    start = 0
+    while start < len(px):
+        # as many points as fit in a chunk of pairs, at least one
+        base = total[start - 1] if start else 0
+        stop = max(int(np.searchsorted(total, base + _CHUNK, side="right")), start + 1)
+        count = counts[start:stop]
+        point = np.repeat(np.arange(start, stop), count)
+        e = first[point_band[point]] + np.arange(len(point)) - np.repeat(np.cumsum(count) - count, count)
+        x, y = px[point], py[point]
+        # the ray to the right crosses an edge that straddles the point's
+        # height and has the point on its left, counted by edge direction
+        d = dy[e]
+        crossed = (ay[e] <= y) != (by[e] <= y)
+        crossed &= (dx[e] * (y - ay[e]) - (x - ax[e]) * d) * d > 0
+        winding[candidates[start:stop]] += np.bincount(point[crossed] - start, np.sign(d[crossed]),
+                                                       stop - start).astype(np.int64)
+        start = stop
+    return winding.reshape(shape)
+
+
+def contains(path, points, rule="nonzero", flatness=0.1, bands=None):
+    """
+    Whether points lie inside the filled area of a path, every subpath
+    closed as filling does. Points on the outline may fall either way.
+
+    Args:
+        path: a Path, an iterable of segments or a PackedPath.
+        points: complex numbers, or an (..., 2) array of coordinates.
+        rule (str): the fill rule, "nonzero" or "evenodd". Default is "nonzero".
+        flatness (float): flatness of the curves. Default is 0.1.
+        bands (int, optional): see winding_numbers.
+
+    Returns:
+        numpy.ndarray: a boolean array, shaped as the points.
+    """
+    if rule not in RULES:
+        raise ValueError("rule must be one of %s, got %r" % (", ".join(RULES), rule))
+    coords, offsets = flatten(path, flatness)
+    return filled(winding_numbers(coords, offsets, points, bands), rule)
+
+
+def filled(winding, rule="nonzero"):
+    """
+    Whether winding numbers are inside under a fill rule, "nonzero" or "evenodd".
+    """
+    if rule not in RULES:
+        raise ValueError("rule must be one of %s, got %r" % (", ".join(RULES), rule))
+    return winding != 0 if rule == "nonzero" else winding % 2 == 1
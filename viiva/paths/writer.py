@@ -0,0 +1,311 @@
+"""
+Serialization of paths to SVG path data.
+
+With the default options the output is the same as svgpathtools' Path.d()
+(plus " Z" for closed subpaths, as Path.d() does), so it can replace it
+anywhere. The options trade that fidelity for size:
+
+    precision   round coordinates to this many decimals, dropping trailing zeros
+    relative    relative commands (True), absolute (False), or per command
+                whichever is shorter ("auto")
+    shorthand   H and V for axis-aligned lines, S and T for smooth curves
+    minify      no optional whitespace, no repeated command letters, no
+                leading zeros and no closing line before Z
+
+Rounding happens before relative coordinates and shorthand are worked out,
+so errors do not accumulate along the path and S, T, H and V are only used
+where they reproduce the rounded coordinates exactly.
+"""
+import itertools
+import re
+from functools import lru_cache
+
+import svgpathtools
+
+_KINDS = ((svgpathtools.Line, "L"), (svgpathtools.CubicBezier, "C"),
+          (svgpathtools.QuadraticBezier, "Q"), (svgpathtools.Arc, "A"))
+
+# segment class -> command, filled as classes are met
+_kind_cache = {}
+
+
+def _kind(segment):
+    cls = type(segment)
+    kind = _kind_cache.get(cls)
+    if kind is None:
+        for base, kind in _KINDS:
+            if isinstance(segment, base):
+                break
+        else:
+            raise TypeError("Cannot write a %s as path data." % cls.__name__)
+        _kind_cache[cls] = kind
+    return kind
+
+
+def _number(precision, minify):
+    """
+    A function formatting one number, for the options that decide per number.
+    """
+    fmt = None if precision is None else "%%.%df" % precision
+
+    def number(x):
+        if fmt is None:
+            s = repr(float(x))
+            if s[-2:] == ".0":
+                s = s[:-2]
+        else:
+            s = fmt % x
+            if "." in s:
+                s = s.rstrip("0").rstrip(".")
+        if s == "-0":
+            return "0"
+        if minify:
+            if s[:2] == "0.":
+                return s[1:]
+            if s[:3] == "-0.":
+                return "-" + s[2:]
+        return s
+    return number
+
+
+# the numbers of each command, with the spaces and commas svgpathtools writes
+_LAYOUTS = {
+    "M": "x,x", "L": "x,x", "T": "x,x", "H": "x", "V": "x",
+    "Q": "x,x x,x", "S": "x,x x,x", "C": "x,x x,x x,x",
+    "A": "x,x x x,x x,x", "Z": "",
+}
+_LAYOUTS.update({letter.lower(): layout for letter, layout in _LAYOUTS.items()})
+
+
+def _templates(spec, minify):
+    """
+    Command templates with `spec` for the numbers: with the command letter,
+    and without it for implicitly repeated commands when minifying.
+    """
+    if not minify:
+        return {letter: (letter + " " + layout).rstrip().replace("x", spec)
+                for letter, layout in _LAYOUTS.items()}, None
+    return ({letter: letter + layout.replace("x", spec) for letter, layout in _LAYOUTS.items()},
+            {letter: " " + layout.replace("x", spec) for letter, layout in _LAYOUTS.items()})
+
+
+# clean-up of whole path data written with fixed point templates
+_END = r"(?![\d.])"
+_TRAILING_ZEROS = re.compile(r"\.?0+" + _END)
+_NEGATIVE_ZERO = re.compile(r"(?<![\d.])-0" + _END)
+_LEADING_ZERO = re.compile(r"(?<![\d.])0(?=\.\d)")
+_BEFORE_MINUS = re.compile(r"[ ,](?=-)")
+_BEFORE_POINT = re.compile(r"(\.\d+)[ ,](?=\.)")
+
+
+@lru_cache(maxsize=32)
+def _writer(precision=None, relative=False, shorthand=False, minify=False):
+    """
+    Functions writing the segments of one path, see format_d, and cleaning
+    up the output, or None when there is nothing to clean up.
+    """
+    if relative not in (False, True, "auto"):
+        raise ValueError("relative must be True, False or 'auto'.")
+    auto = relative == "auto"
+    # "auto" compares the lengths of formatted numbers, and full precision
+    # numbers are minified one by one; otherwise whole commands are
+    # formatted at once and cleaned up with regular expressions
+    number = _number(precision, minify) if auto or (minify and precision is None) else None
+    fixed = number is None and precision is not None
+    explicit, implicit = _templates("%%.%df" % precision if fixed else "%s", minify)
+
+    if precision is None or not (relative or shorthand):
+        # the templates round absolute coordinates
+        def snap(z):
+            return z
+    else:
+        scale = 10.0 ** precision
+
+        def snap(z):
+            return complex(round(z.real * scale) / scale, round(z.imag * scale) / scale)
+
+    def same(a, b):
+        if precision is None:
+            return abs(a - b) <= 1e-9 * max(1.0, abs(a))
+        return snap(a) == snap(b)
+
+    def radius(r):
+        # rounded down: arc radii are often the smallest that fit, which
+        # readers scale back up exactly, while a slightly larger radius
+        # moves the center by the square root of the difference
+        if precision is None:
+            return r
+        rounded = round(r, precision)
+        return round(rounded - 10 ** -precision, precision) if rounded > r else rounded
+
+    def values(points, origin, head=()):
+        out = list(head)
+        for point in points:
+            point -= origin
+            out.append(point.real)
+            out.append(point.imag)
+        return tuple(out) if number is None else tuple(map(number, out))
+
+    def command(letter, points, current, head=()):
+        # the absolute, relative or shorter command
+        if auto:
+            absolute = values(points, 0j, head)
+            relative_ = values(points, current, head)
+            if sum(map(len, relative_)) < sum(map(len, absolute)):
+                return letter.lower(), relative_
+            return letter, absolute
+        if relative:
+            return letter.lower(), values(points, current, head)
+        return letter, values(points, 0j, head)
+
+    def axis(letter, value, origin):
+        # H and V, with their single coordinate
+        if auto:
+            absolute = number(value)
+            relative_ = number(value - origin)
+            return (letter.lower(), (relative_,)) if len(relative_) < len(absolute) else (letter, (absolute,))
+        if relative:
+            letter, value = letter.lower(), value - origin
+        return letter, ((value,) if number is None else (number(value),))
+
+    close = ("z" if relative is True else "Z", ())
+
+    def join(commands):
+        if not minify:
+            return " ".join([explicit[letter] % numbers for letter, numbers in commands])
+        # a command letter repeats implicitly, and after M (m) comes L (l)
+        parts = []
+        last = None
+        for letter, numbers in commands:
+            parts.append((implicit if letter == last else explicit)[letter] % numbers)
+            last = "L" if letter == "M" else "l" if letter == "m" else letter
+        return "".join(parts)
+
+    def cleanup(d):
+        # on any number of paths at once
+        if fixed:
+            if precision:
+                d = _TRAILING_ZEROS.sub("", d)
+            d = _NEGATIVE_ZERO.sub("0", d)
+            if minify:
+                d = _LEADING_ZERO.sub("", d)
+        if minify:
+            d = _BEFORE_POINT.sub(r"\1", _BEFORE_MINUS.sub("", d))
+        return d
+
+    def write(segments):
+        commands = []
+        append = commands.append
+        current = None      # the end of the last segment
+        first = None        # the start of the subpath
+        last_kind = None    # the kind of the last segment in the subpath
+        reflect = None      # its last control point, for S and T
+
+        for segment in segments:
+            kind = _kind_cache.get(type(segment)) or _kind(segment)
+            start = snap(segment.start)
+            end = snap(segment.end)
+            if current is None or start != current:
+                if current is not None and current == first:
+                    if minify and last_kind == "L":
+                        # Z draws the closing line
+                        commands.pop()
+                    append(close)
+                append(command("M", (start,), 0j if current is None else current))
+                first = current = start
+                last_kind = reflect = None
+
+            if kind == "L":
+                if shorthand and end.imag == current.imag and end.real != current.real:
+                    append(axis("H", end.real, current.real))
+                elif shorthand and end.real == current.real and end.imag != current.imag:
+                    append(axis("V", end.imag, current.imag))
+                else:
+                    append(command("L", (end,), current))
+            elif kind == "C":
+                control1 = snap(segment.control1)
+                control2 = snap(segment.control2)
+                if shorthand and same(control1, 2 * current - reflect if last_kind == "C" else current):
+                    append(command("S", (control2, end), current))
+                else:
+                    append(command("C", (control1, control2, end), current))
+                reflect = control2
+            elif kind == "Q":
+                control = snap(segment.control)
+                if shorthand and same(control, 2 * current - reflect if last_kind == "Q" else current):
+                    append(command("T", (end,), current))
+                else:
+                    append(command("Q", (control, end), current))
+                reflect = control
+            else:
+                rx, ry = radius(segment.radius.real), radius(segment.radius.imag)
+                append(command("A", (end,), current,
+                               (rx, ry, segment.rotation, int(segment.large_arc), int(segment.sweep))))
+            last_kind = kind
+            current = end
+
+        if current is not None and current == first:
+            if minify and last_kind == "L":
+                commands.pop()
+            append(close)
+        return join(commands)
+
+    return write, (cleanup if fixed or minify else None)
+
+
+def format_d(path, precision=None, relative=False, shorthand=False, minify=False):
+    """
+    Write a path as SVG path data.
+
+    Args:
+        path: a Path, a PackedPath or any sequence of segments.
+        precision (int, optional): decimals of the coordinates. Default is full precision.
+        relative (bool or str): relative commands, or "auto" for the shorter
+                                of the two per command. Default is False.
+        shorthand (bool): use H, V, S and T where possible. Default is False.
+        minify (bool): leave out all optional characters. Default is False.
+
+    Returns:
+        str: the path data. With the default options, the same as svgpathtools' Path.d().
+    """
+    write, cleanup = _writer(precision, relative, shorthand, minify)
+    d = write(path.segments() if hasattr(path, "kinds") else path)
+    return d if cleanup is None else cleanup(d)
+
+
+# paths cleaned up together by write_d
+_CHUNK = 256
+
+
+def write_d(paths, file=None, separator="\n", precision=None, relative=False, shorthand=False, minify=False):
+    """
+    Write many paths as SVG path data, with the options of format_d.
+
+    Args:
+        paths: an iterable of paths, consumed once.
+        file: a text file object to stream the path data to, each followed
+              by `separator`. Default is None, to return the strings instead.
+        separator (str): written after each path to a file. Default is "\\n".
+
+    Returns:
+        list or int: the path data strings, or the number of paths written to `file`.
+    """
+    write, cleanup = _writer(precision, relative, shorthand, minify)
+    result = []
+    count = 0
+    chunk = []
+    paths = iter(paths)
+    while True:
+        chunk[:] = [write(path.segments() if hasattr(path, "kinds") else path)
+                    for path in itertools.islice(paths, _CHUNK)]
+        if not chunk:
+            break
+        if cleanup is not None:
+            # path data has no line breaks
+            chunk[:] = cleanup("\n".join(chunk)).split("\n")
+        if file is None:
+            result.extend(chunk)
+        else:
+            file.write(separator.join(chunk) + separator)
+        count += len(chunk)
+    return result if file is None else count
@@ -1,30 +1,100 @@
+import math
+
+import numpy as np
 import svgpathtools
+
 from . import paths
+from .paths.path import Path
+
+
+def _points(points):
+    """
+    Points as a complex array: complex numbers, or (x, y) pairs in an (..., 2) array.
+    """
+    points = np.asarray(points)
+    if np.iscomplexobj(points):
+        return points
+    points = points.astype(float)
+    if points.shape and points.shape[-1] == 2:
+        return points[..., 0] + 1j * points[..., 1]
+    return points + 0j
+
+
+def _ellipse_perimeter(rx, ry):
+    # Gauss' arithmetic-geometric mean series, exact to rounding
+    a, b = abs(rx), abs(ry)
+    if a == 0 or b == 0:
+        return 4 * (a + b)
+    total = (a * a - b * b) / 2
+    power = 0.5
+    while abs(a - b) > 1e-15 * a:
+        c = (a - b) / 2
+        a, b = (a + b) / 2, math.sqrt(a * b)
+        power *= 2
+        total += power * c * c
+    return 2 * math.pi * (abs(rx) ** 2 - total) / a
+
+
+def _ellipse_coords(cx, cy, rx, ry, start, stop, flatness):
+    """
+    Vertices of the elliptic arc from angle start to stop (radians), with
+    the same number of pieces flattening the arc would use.
+    """
+    r = max(abs(rx), abs(ry))
+    step = 2 * math.acos(max(-1.0, 1 - flatness / r)) if r > 0 else math.pi
+    count = max(1, math.ceil(abs(stop - start) / step))
+    angle = np.linspace(start, stop, count + 1)
+    return np.column_stack((cx + rx * np.cos(angle), cy + ry * np.sin(angle)))
+
 
 class Shape:
+    """
+    An SVG shape element. Path operations that a shape does not implement
+    itself are forwarded to its path, which is built once and kept until an
+    attribute of the shape changes.
+    """
     def __str__(self):
-        return str(self.__dict__)
+        return str({key: value for key, value in self.__dict__.items() if not key.startswith("_")})
+
+    def __setattr__(self, name, value):
+        state = self.__dict__
+        state[name] = value
+        if "_path" in state and name[0] != "_":
+            del state["_path"]
 
     def element(self):
         pass
-    @property    
+    @property
     def type(self):
         return self.__class__.__name__
 
-    @property    
+    @property
     def d(self):
-        shape_def = {key: value for key, value in self.__dict__.items() if value is not None}
+        shape_def = {key: value for key, value in self.__dict__.items()
+                     if value is not None and not key.startswith("_")}
         return getattr(svgpathtools.svg_to_paths, self.tag + "2pathd")(shape_def)
 
+    def segments(self):
+        """
+        The segments of the shape, as parsing its path data gives them.
+        """
+        return list(Path(self.d))
+
     def as_path(self):
-        return paths.Path(self.d)
+        path = self.__dict__.get("_path")
+        if path is None:
+            path = Path(*self.segments())
+            path._closed = self.tag not in ("line", "polyline")
+            self._path = path
+        return path
 
     def __getattr__(self, name):
         # Check if the method exists in the parent class (svgpathtools.Path)
-        if hasattr(paths.Path, name):
+        # (not for attributes of the shape itself, such as a failing property)
+        if not name.startswith("_") and hasattr(Path, name) and not hasattr(type(self), name):
             return getattr(self.as_path(), name)
         raise AttributeError(f"Method '{name}' not found.")
-    
+
 class Rect(Shape):
     def __init__(self, x=0, y=0, width=0, height=0, rx=None, ry=None):
         self.x = x
@@ -34,7 +104,91 @@ class Rect(Shape):
         self.rx = rx
         self.ry = ry
         self.tag = "rect"
-    
+
+    def _radii(self):
+        # as rect2pathd: one radius stands for both, and none means square corners;
+        # as SVG, the used radii are at most half the width and height
+        if self.rx is None and self.ry is None:
+            return 0.0, 0.0
+        rx = self.rx if self.rx is not None else self.ry or 0
+        ry = self.ry if self.ry is not None else self.rx or 0
+        return (min(abs(float(rx)), abs(float(self.width)) / 2),
+                min(abs(float(ry)), abs(float(self.height)) / 2))
+
+    def segments(self):
+        x, y, w, h = float(self.x), float(self.y), float(self.width), float(self.height)
+        rx, ry = self._radii()
+        Line = paths.Line.fast
+        if rx == 0 or ry == 0:
+            p0, p1, p2, p3 = complex(x, y), complex(x + w, y), complex(x + w, y + h), complex(x, y + h)
+            return [Line(p0, p1), Line(p1, p2), Line(p2, p3), Line(p3, p0)]
+
+        radius = complex(rx, ry)
+
+        def corner(start, end):
+            return paths.Arc.fast(start, radius, 0.0, False, True, end)
+
+        points = [complex(x + rx, y), complex(x + w - rx, y), complex(x + w, y + ry), complex(x + w, y + h - ry),
+                  complex(x + w - rx, y + h), complex(x + rx, y + h), complex(x, y + h - ry), complex(x, y + ry)]
+        segments = []
+        for k in range(0, 8, 2):
+            # the sides vanish where the radii are clamped to half the size
+            if points[k] != points[k + 1]:
+                segments.append(Line(points[k], points[k + 1]))
+            segments.append(corner(points[k + 1], points[(k + 2) % 8]))
+        return segments
+
+    def bbox(self):
+        x, y, w, h = float(self.x), float(self.y), float(self.width), float(self.height)
+        return min(x, x + w), max(x, x + w), min(y, y + h), max(y, y + h)
+
+    def area(self):
+        rx, ry = self._radii()
+        # every corner misses a square less a quarter ellipse
+        return abs(float(self.width) * float(self.height)) - (4 - math.pi) * rx * ry
+
+    def length(self):
+        rx, ry = self._radii()
+        w, h = abs(float(self.width)), abs(float(self.height))
+        if rx == 0 or ry == 0:
+            return 2 * (w + h)
+        return 2 * (w - 2 * rx) + 2 * (h - 2 * ry) + _ellipse_perimeter(rx, ry)
+
+    def contains(self, points):
+        """
+        Whether points lie inside the rectangle or on its outline.
+
+        Args:
+            points: complex numbers, or an (..., 2) array of coordinates.
+
+        Returns:
+            numpy.ndarray: a boolean array, one value per point.
+        """
+        z = _points(points)
+        xmin, xmax, ymin, ymax = self.bbox()
+        inside = (z.real >= xmin) & (z.real <= xmax) & (z.imag >= ymin) & (z.imag <= ymax)
+        rx, ry = self._radii()
+        if rx and ry:
+            # outside the quarter ellipses in the corner squares
+            dx = np.maximum(np.maximum(xmin + rx - z.real, z.real - (xmax - rx)), 0) / rx
+            dy = np.maximum(np.maximum(ymin + ry - z.imag, z.imag - (ymax - ry)), 0) / ry
+            inside &= dx * dx + dy * dy <= 1
+        return inside
+
+    def to_shapely(self, flatness=0.1):
+        import shapely
+
+        xmin, xmax, ymin, ymax = self.bbox()
+        rx, ry = self._radii()
+        if rx == 0 or ry == 0:
+            return shapely.box(xmin, ymin, xmax, ymax)
+        corners = ((xmax - rx, ymin + ry, -math.pi / 2), (xmax - rx, ymax - ry, 0),
+                   (xmin + rx, ymax - ry, math.pi / 2), (xmin + rx, ymin + ry, math.pi))
+        coords = np.concatenate([_ellipse_coords(cx, cy, rx, ry, start, start + math.pi / 2, flatness)
+                                 for cx, cy, start in corners])
+        return shapely.Polygon(coords)
+
+
 class Circle(Shape):
     def __init__(self, cx=0, cy=0, r=0):
         self.cx = cx
@@ -44,9 +198,36 @@ class Circle(Shape):
 
     @property
     def d(self):
-        shape_def = {key: value for key, value in self.__dict__.items() if value is not None}
+        shape_def = {key: value for key, value in self.__dict__.items()
+                     if value is not None and not key.startswith("_")}
         return getattr(svgpathtools.svg_to_paths, "ellipse" + "2pathd")(shape_def)
 
+    def _radii(self):
+        return float(self.r), float(self.r)
+
+    # the geometry is an ellipse's with equal radii
+    def segments(self):
+        return Ellipse.segments(self)
+
+    def bbox(self):
+        return Ellipse.bbox(self)
+
+    def area(self):
+        return Ellipse.area(self)
+
+    def length(self):
+        return 2 * math.pi * abs(float(self.r))
+
+    def contains(self, points):
+        """
+        Whether points lie inside the circle or on it, see Rect.contains.
+        """
+        return np.abs(_points(points) - complex(float(self.cx), float(self.cy))) <= abs(float(self.r))
+
+    def to_shapely(self, flatness=0.1):
+        return Ellipse.to_shapely(self, flatness)
+
+
 class Ellipse(Shape):
     def __init__(self, cx=0, cy=0, rx=0, ry=0):
         self.cx = cx
@@ -55,6 +236,45 @@ class Ellipse(Shape):
         self.ry = ry
         self.tag = "ellipse"
 
+    def _radii(self):
+        return float(self.rx), float(self.ry)
+
+    def segments(self):
+        # two half ellipses from the left end, as ellipse2pathd
+        cx, cy = float(self.cx), float(self.cy)
+        rx, ry = self._radii()
+        left, right = complex(cx - rx, cy), complex(cx + rx, cy)
+        return [paths.Arc.fast(left, complex(rx, ry), 0.0, True, False, right),
+                paths.Arc.fast(right, complex(rx, ry), 0.0, True, False, left)]
+
+    def bbox(self):
+        cx, cy = float(self.cx), float(self.cy)
+        rx, ry = map(abs, self._radii())
+        return cx - rx, cx + rx, cy - ry, cy + ry
+
+    def area(self):
+        rx, ry = self._radii()
+        return math.pi * abs(rx * ry)
+
+    def length(self):
+        return _ellipse_perimeter(*self._radii())
+
+    def contains(self, points):
+        """
+        Whether points lie inside the ellipse or on it, see Rect.contains.
+        """
+        z = _points(points) - complex(float(self.cx), float(self.cy))
+        rx, ry = map(abs, self._radii())
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (z.real / rx) ** 2 + (z.imag / ry) ** 2 <= 1
+
+    def to_shapely(self, flatness=0.1):
+        import shapely
+
+        rx, ry = map(abs, self._radii())
+        coords = _ellipse_coords(float(self.cx), float(self.cy), rx, ry, 0, 2 * math.pi, flatness)
+        return shapely.Polygon(coords)
+
 
 
 class Line(Shape):
@@ -65,6 +285,10 @@ class Line(Shape):
         self.y2 = y2
         self.tag = "line"
 
+    def segments(self):
+        start = complex(float(self.x1), float(self.y1))
+        return [paths.Line.fast(start, complex(float(self.x2), float(self.y2)))]
+
 class Polyline(Shape):
     def __init__(self, points=None):
         if points is None: